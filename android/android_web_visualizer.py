@@ -10,11 +10,12 @@ import subprocess
 import sys
 import threading
 import time
+import uuid
 from datetime import datetime
-from flask import Flask, render_template, request
-from flask_socketio import SocketIO, emit
+from flask import Flask, Response, render_template, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 
-import os
+_startup_begin = time.perf_counter()
 
 # 获取项目根目录路径
 project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,25 +34,37 @@ socketio = SocketIO(app,
                   logger=False,            # 禁用日志减少干扰
                   engineio_logger=False)   # 禁用engineio日志
 
-# 导入iOS的内存泄漏检测模块（跨平台通用）
-sys.path.append(os.path.join(project_root, 'ios'))
-from web_visualizer import MemoryLeakDetector, MemoryLeakLogger
+# 导入跨平台内存泄漏检测核心（轻量模块，不会加载iOS设备栈）
+if project_root not in sys.path:
+    sys.path.append(project_root)
+from common.memory_leak import MemoryLeakLogger
+from common.quantile_sketch import PUSH_INTERVAL as QUANTILE_PUSH_INTERVAL, parse_percentiles
+from common.detector_registry import LeakDetectorRegistry
+from common.leak_event_index import parse_query_args, parse_time
+from common.live_frames import LiveFrames, parse_refresh_interval
+from common.wire_format import parse_wire_format
+from common.session_export import CONTENT_TYPES, Annotations, export_filename, export_session
+from common.session_catalog import CATALOG_FILE_NAME, SessionCatalog, clean_annotations, parse_catalog_args
+from common.session_compare import compare_sessions
+from common.session_import import import_session
+from common.session_store import (ANDROID_METRICS, SessionStore, iter_series_json, parse_series_args,
+                                   series_cache_info)
 
-# 全局内存泄漏检测器实例（Android专用）
-android_leak_detector = MemoryLeakDetector()
+# 内存泄漏检测器注册表：按 (平台, 设备, 包名, PID) 为每个被监控进程维护独立的检测器
+android_leak_detectors = LeakDetectorRegistry()
 android_leak_logger = MemoryLeakLogger(
-    log_file_path=os.path.join(project_root, 'logs', 'android_memory_leak_events.log')
+    log_file_path=os.path.join(project_root, 'logs', 'android_memory_leak_events.log'),
+    platform='android'
 )
 
-# 全局变量存储性能数据
-performance_data = {
-    'cpu_data': [],
-    'memory_data': [],
-    'fps_data': [],
-    'disk_reads_data': [],
-    'disk_writes_data': [],
-    'threads_data': []
-}
+# 实时事件发送：所有客户端连接时加入 LIVE_ROOM，默认每条立即发送，选择刷新间隔后按间隔合并为一帧
+LIVE_ROOM = 'android_live'
+live_frames = LiveFrames(lambda event, data, room: socketio.emit(event, data, to=room))
+
+# 性能数据按会话持久化到服务端（每个指标一个列文件），刷新页面或重启服务后仍可读取
+# 会话信息同时写入会话编目（SQLite），可按设备型号/应用版本/标签等检索
+session_store = SessionStore(os.path.join(project_root, 'data', 'sessions'),
+                             catalog=SessionCatalog(os.path.join(project_root, 'data', CATALOG_FILE_NAME)))
 
 # 监控状态管理
 monitoring_active = True
@@ -162,6 +175,19 @@ class AndroidPerformanceAnalyzer(object):
         self.fps = 0
         self.monitoring_thread = None
         self.last_thread_update = 0  # 添加缺失的属性
+        self.session_id = None  # 当前记录的会话
+        self.recorder = None
+        self.quantiles_sent_at = 0.0  # 上次推送分位数的时间
+        self.package_name = None  # 正在监控的应用
+        
+    def stop(self, timeout=5.0):
+        """停止监控：等待采集循环退出后释放该应用的泄漏检测器（重新开始监控时重新建立基线，与iOS的stop_session一致）"""
+        self.is_monitoring = False
+        thread = self.monitoring_thread
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join(timeout)
+        if self.package_name:
+            android_leak_detectors.reset('android', self.device_id, self.package_name)
         
     def get_installed_packages(self):
         """获取已安装的应用包列表（包含应用名称）"""
@@ -221,6 +247,21 @@ class AndroidPerformanceAnalyzer(object):
             print(f"⚠️ 获取应用名称失败 ({package_name}): {e}")
             return package_name.split('.')[-1].capitalize()
     
+    def get_app_version(self, package_name):
+        """获取应用的版本号（versionName）"""
+        try:
+            cmd = ['adb']
+            if self.device_id:
+                cmd.extend(['-s', self.device_id])
+            cmd.extend(['shell', 'dumpsys', 'package', package_name])
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
+            for line in result.stdout.split('\n'):
+                if 'versionName=' in line:
+                    return line.split('versionName=')[1].strip() or None
+        except Exception as e:
+            print(f"⚠️ 获取应用版本失败 ({package_name}): {e}")
+        return None
+    
     def get_app_pid(self, package_name):
         """获取应用的PID"""
         try:
@@ -633,18 +674,30 @@ class AndroidPerformanceAnalyzer(object):
             print(f"❌ 获取FPS时出错: {e}")
             return 60
     
-    def monitor_app_performance(self, package_name):
-        """监控应用性能"""
+    def monitor_app_performance(self, package_name, score_thresholds=None):
+        """监控应用性能（score_thresholds为页面上的CPU/内存阈值，服务端按此计算性能评分）"""
         if not package_name:
             print("❌ 请提供应用包名")
             return
         
         print(f"📱 开始监控Android应用 {package_name}")
-        socketio.emit('monitoring_started', {'package_name': package_name, 'platform': 'android'})
+        self.package_name = package_name
+        self.session_id = uuid.uuid4().hex[:12]
+        self.recorder = session_store.create(self.session_id, 'android', self.device_id, package_name,
+                                             ANDROID_METRICS, info={'score_thresholds': score_thresholds})
+        self.quantiles_sent_at = 0.0
+        socketio.emit('monitoring_started', {'package_name': package_name, 'platform': 'android',
+                                             'session_id': self.session_id})
         
         self.is_monitoring = True
         
         def monitoring_loop():
+            # 记录设备型号、系统版本和应用版本，供会话编目检索
+            device_info = AndroidDeviceManager().get_device_info(self.device_id) if self.device_id else {}
+            session_store.update_meta(self.session_id, device_model=device_info.get('model'),
+                                      os_version=device_info.get('version'),
+                                      app_version=self.get_app_version(package_name))
+            
             while self.is_monitoring and monitoring_active:
                 try:
                     pid = self.get_app_pid(package_name)
@@ -689,17 +742,18 @@ class AndroidPerformanceAnalyzer(object):
                     
                     # 如果有线程详情，单独发送
                     if thread_details:
-                        socketio.emit('thread_details', {
+                        live_frames.publish(LIVE_ROOM, 'thread_details', {
                             'threads': thread_details,
                             'timestamp': data['time']
                         })
                     
                     # 添加内存样本到泄漏检测器
+                    detector = android_leak_detectors.get('android', self.device_id, package_name, pid)
                     current_timestamp = time.time()
-                    android_leak_detector.add_memory_sample(perf_data['app_memory'], current_timestamp)
+                    detector.add_memory_sample(perf_data['app_memory'], current_timestamp)
                     
                     # 检测内存泄漏
-                    leak_info = android_leak_detector.detect_memory_leak()
+                    leak_info = detector.detect_memory_leak()
                     if leak_info:
                         print(f"🚨 Android检测到内存泄漏: {leak_info}")
                         
@@ -713,7 +767,7 @@ class AndroidPerformanceAnalyzer(object):
                         android_leak_logger.log_leak_event(leak_info, app_info)
                         
                         # 发送内存泄漏提醒
-                        socketio.emit('memory_leak_alert', {
+                        live_frames.publish(LIVE_ROOM, 'memory_leak_alert', {
                             'detected': True,
                             'severity': leak_info['severity'],
                             'current_memory': leak_info['current_memory'],
@@ -721,14 +775,28 @@ class AndroidPerformanceAnalyzer(object):
                             'memory_increase': leak_info['memory_increase'],
                             'time_span': leak_info['time_span'],
                             'recommendations': leak_info['recommendation'],
+                            'detection_method': leak_info.get('detection_method', 'trend'),
+                            'change_point': leak_info.get('change_point'),
+                            'retained_growth_per_cycle': leak_info.get('retained_growth_per_cycle'),
                             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                             'platform': 'Android'
                         })
                     
-                    # 立即发送数据，强制实时传输
-                    socketio.emit('performance_data', data)
+                    # 写入会话存储并附带服务端计算的性能评分，立即发送数据，强制实时传输
+                    if self.recorder.append_sample(data, data.setdefault('ts', time.time())):
+                        data['score'] = self.recorder.scores()['current']
+                    live_frames.publish(LIVE_ROOM, 'performance_data', data)
                     socketio.sleep(0)  # 强制flush
                     
+                    # 定期推送各指标分位数（服务端草图统计，不随会话时长增长）
+                    if time.monotonic() - self.quantiles_sent_at >= QUANTILE_PUSH_INTERVAL:
+                        self.quantiles_sent_at = time.monotonic()
+                        live_frames.publish(LIVE_ROOM, 'performance_quantiles', {
+                            'session_id': self.session_id,
+                            'samples': self.recorder.count,
+                            'metrics': self.recorder.quantiles()
+                        })
+                    
                     # 同时输出到控制台（详细显示CPU和内存信息）
                     print(json.dumps({
                         "Pid": pid,
@@ -751,6 +819,9 @@ class AndroidPerformanceAnalyzer(object):
                 except Exception as e:
                     print(f"❌ 性能监控时出错: {e}")
                     time.sleep(1)
+            
+            # 监控结束，关闭会话记录
+            session_store.close(self.session_id)
         
         self.monitoring_thread = threading.Thread(target=monitoring_loop)
         self.monitoring_thread.daemon = True
@@ -787,6 +858,193 @@ def api_get_devices():
     except Exception as e:
         return {'success': False, 'devices': [], 'error': str(e)}
 
+@app.route('/api/recorded_sessions')
+def api_recorded_sessions():
+    """API：服务端已记录的会话列表（含正在记录的会话）"""
+    return {'sessions': session_store.list_sessions('android'), 'success': True}
+
+@app.route('/api/sessions/catalog')
+def api_session_catalog():
+    """API：按设备型号/系统版本/应用及版本/标签/场景/时间检索会话编目（服务端分页）
+
+    参数: app, app_version, device, device_model, os_version, tag, scene, source, from, to, page, page_size
+    """
+    try:
+        params = parse_catalog_args(request.args)
+        params['platform'] = 'android'
+        result = session_store.catalog.query(**params)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    for meta in result['sessions']:
+        meta['recording'] = session_store.writer(meta['session_id']) is not None
+    result['success'] = True
+    return result
+
+@app.route('/api/sessions/<session_id>/annotations', methods=['POST'])
+def api_session_annotations(session_id):
+    """API：保存页面上的场景和标签（JSON: scenes/tags）到会话信息，同步到会话编目"""
+    meta = session_store.get_meta(session_id)
+    if meta is None or meta.get('platform') != 'android':
+        return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+    fields = clean_annotations(request.get_json(silent=True) or {})
+    if fields:
+        session_store.update_meta(session_id, **fields)
+    return {'success': True}
+
+@app.route('/api/sessions/<session_id>/quantiles')
+def api_session_quantiles(session_id):
+    """API：会话各指标的分位数统计（正在记录的会话为当前值，由服务端分位数草图计算）
+
+    参数: percentiles（逗号分隔的百分位，默认50,90,99）
+    """
+    try:
+        percentiles = parse_percentiles(request.args.get('percentiles'))
+        meta = session_store.get_meta(session_id)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    if meta is None or meta.get('platform') != 'android':
+        return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+    try:
+        metrics = session_store.quantiles(session_id, percentiles)
+    except KeyError:
+        return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+    return {'success': True, 'session_id': session_id, 'samples': meta['samples'], 'metrics': metrics}
+
+@app.route('/api/sessions/<session_id>/score')
+def api_session_score(session_id):
+    """API：会话的性能评分（服务端随采样增量计算）：current为最新样本的评分，session为会话平均评分"""
+    meta = session_store.get_meta(session_id)
+    if meta is None or meta.get('platform') != 'android':
+        return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+    try:
+        scores = session_store.scores(session_id)
+    except KeyError:
+        return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+    return dict(scores, success=True, session_id=session_id)
+
+@app.route('/api/sessions/<session_id>/series')
+def api_session_series(session_id):
+    """API：读取已记录会话的历史指标序列（自动选择汇总层级，LTTB降采样，分块输出）
+
+    参数: metrics（逗号分隔，如cpu,memory）, from, to（时间戳或'YYYY-MM-DD HH:MM:SS'）, max_points, resolution（可选）
+    支持ETag/If-None-Match，已结束的会话或已结束的时间范围可长期缓存
+    """
+    try:
+        params = parse_series_args(request.args)
+        meta = session_store.get_meta(session_id)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    if meta is None or meta.get('platform') != 'android':
+        return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+    
+    etag, cache_control = series_cache_info(meta, params)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        try:
+            result = session_store.read_series(session_id, **params)
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}, 400
+        except KeyError:
+            return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+        response = Response(iter_series_json(session_id, result), mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+@app.route('/api/sessions/<session_id>/export', methods=['GET', 'POST'])
+def api_session_export(session_id):
+    """API：流式导出已记录的会话，列与页面导出的CSV一致
+
+    参数: format（csv/csv.gz/parquet/arrow，默认csv.gz）, from, to
+    POST表单可附带页面上的场景和标签（scenes/tags，JSON数组），填入Scene/Tags列
+    """
+    fmt = request.values.get('format', 'csv.gz')
+    try:
+        meta = session_store.get_meta(session_id)
+        if meta is None or meta.get('platform') != 'android':
+            return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+        annotations = Annotations(json.loads(request.values.get('scenes') or '[]'),
+                                  json.loads(request.values.get('tags') or '[]'))
+        stream = export_session(session_store, session_id, fmt, parse_time(request.values.get('from')),
+                                parse_time(request.values.get('to')), annotations)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    
+    response = Response(stream, mimetype=CONTENT_TYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{export_filename(meta, fmt)}"'
+    return response
+
+@app.route('/api/sessions/import', methods=['POST'])
+def api_session_import():
+    """API：把页面导出的JSON/CSV文件（可gzip压缩）流式导入为服务端会话，页面随后通过历史数据API读取
+
+    请求体为文件内容（?name=文件名），或multipart表单的file字段
+    """
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload is None:
+            return {'success': False, 'error': '缺少上传文件'}, 400
+        stream, file_name = upload.stream, upload.filename
+    else:
+        stream, file_name = request.stream, request.args.get('name')
+    
+    try:
+        result = import_session(session_store, stream, 'android', file_name, ANDROID_METRICS)
+    except ValueError as e:
+        print(f"❌ 导入会话失败: {e}")
+        return {'success': False, 'error': str(e)}, 400
+    print(f"📥 已导入会话 {result['session_id']}: {result['samples']} 条记录，跳过 {result['skipped']} 条")
+    result['success'] = True
+    return result
+
+@app.route('/api/sessions/compare', methods=['GET', 'POST'])
+def api_session_compare():
+    """API：对比两个已记录的会话（基线构建 vs 候选构建），返回各指标分布差异和显著性
+
+    参数: baseline, candidate（会话ID）, align（start/tag/scene，默认start）, anchor（对齐用的标签备注或场景名称）,
+          metrics（逗号分隔，默认两个会话共有的指标）
+    POST表单可附带两个会话在页面上的场景和标签（baseline_scenes/baseline_tags/candidate_scenes/candidate_tags，JSON数组）
+    """
+    baseline, candidate = request.values.get('baseline'), request.values.get('candidate')
+    for session_id in (baseline, candidate):
+        meta = session_store.get_meta(session_id) if session_id else None
+        if meta is None or meta.get('platform') != 'android':
+            return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+    metrics = request.values.get('metrics')
+    try:
+        annotations = {role: {key: json.loads(request.values[f'{role}_{key}'])
+                              for key in ('scenes', 'tags') if request.values.get(f'{role}_{key}')}
+                       for role in ('baseline', 'candidate')}
+        report = compare_sessions(session_store, baseline, candidate, request.values.get('align', 'start'),
+                                  request.values.get('anchor'), metrics.split(',') if metrics else None,
+                                  annotations['baseline'], annotations['candidate'])
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    report['success'] = True
+    return report
+
+@app.route('/api/leak_events')
+def api_leak_events():
+    """API：按平台/应用/严重程度/时间范围查询内存泄漏事件（服务端分页）
+
+    参数: platform, app, severity（逗号分隔）, start, end（时间戳或'YYYY-MM-DD HH:MM:SS'）, page, page_size, cursor
+    """
+    try:
+        result = android_leak_logger.search_leak_events(**parse_query_args(request.args))
+        result['success'] = True
+        return result
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    except Exception as e:
+        print(f"❌ 查询内存泄漏事件失败: {e}")
+        return {'success': False, 'error': str(e)}, 500
+
+@app.route('/api/log_writer_stats')
+def api_log_writer_stats():
+    """API：日志后台写入队列深度、已写入和丢弃的记录数"""
+    return {'success': True, 'writers': [android_leak_logger.writer_stats()]}
+
 @app.route('/api/apps')
 def api_get_apps():
     """获取应用列表 API（兼容 iOS 格式）"""
@@ -816,6 +1074,7 @@ def api_get_apps():
 def handle_connect():
     """客户端连接"""
     print(f"📱 客户端已连接")
+    join_room(live_frames.join(request.sid, LIVE_ROOM))
     emit('status', {'message': 'Android性能监控已连接', 'type': 'success'})
 
 
@@ -823,6 +1082,31 @@ def handle_connect():
 def handle_disconnect():
     """客户端断开连接"""
     print(f"📱 客户端已断开")
+    live_frames.disconnect(request.sid)
+
+
+@socketio.on('set_refresh_rate')
+def handle_set_refresh_rate(data):
+    """设置本客户端的实时数据刷新间隔（interval，毫秒；0为每条立即发送），非0时按间隔合并为 performance_batch 帧"""
+    try:
+        interval = parse_refresh_interval((data or {}).get('interval'))
+    except ValueError as e:
+        emit('refresh_rate', {'success': False, 'error': str(e)})
+        return
+    for old_room, new_room in live_frames.set_interval(request.sid, interval):
+        leave_room(old_room)
+        join_room(new_room)
+    emit('refresh_rate', {'success': True, 'interval': interval})
+
+
+@socketio.on('set_wire_format')
+def handle_set_wire_format(data):
+    """选择本客户端的实时数据传输格式（format: json/struct），不支持的格式回退为JSON，回复实际使用的格式"""
+    wire_format = parse_wire_format((data or {}).get('format'))
+    for old_room, new_room in live_frames.set_format(request.sid, wire_format):
+        leave_room(old_room)
+        join_room(new_room)
+    emit('wire_format', {'success': True, 'format': wire_format})
 
 
 @socketio.on('get_devices')
@@ -946,12 +1230,10 @@ def handle_start_monitoring(data):
             })
             return
         
-        # 停止之前的监控
+        # 停止之前的监控（等待旧的采集循环退出并释放其泄漏检测器，再开始新的监控）
         monitoring_active = False
         if performance_analyzer:
-            performance_analyzer.is_monitoring = False
-        
-        time.sleep(0.5)  # 等待停止
+            performance_analyzer.stop()
         
         # 开始新的监控
         monitoring_active = True
@@ -967,7 +1249,9 @@ def handle_start_monitoring(data):
             return
         
         # 开始监控
-        performance_analyzer.monitor_app_performance(package_name)
+        score_thresholds = data.get('score_thresholds')
+        performance_analyzer.monitor_app_performance(
+            package_name, score_thresholds if isinstance(score_thresholds, dict) else None)
         
         emit('status', {
             'message': f'开始监控 {package_name} (PID: {pid})',
@@ -990,7 +1274,7 @@ def handle_stop_monitoring():
     try:
         monitoring_active = False
         if performance_analyzer:
-            performance_analyzer.is_monitoring = False
+            performance_analyzer.stop()
         
         emit('status', {
             'message': '监控已停止',
@@ -1008,28 +1292,23 @@ def handle_stop_monitoring():
 
 
 # Android内存泄漏检测配置管理事件
+def get_leak_settings_scope(data):
+    """确定设置生效范围：请求中指定device_id/package_name时只作用于对应设备/应用，否则作用于所有Android会话"""
+    if data and data.get('device_id'):
+        return {'device': data['device_id'], 'app': data.get('package_name')}
+    return {}
+
+
 @socketio.on('update_leak_settings')
 def handle_update_leak_settings(data):
     """更新内存泄漏检测设置"""
     try:
-        if 'leak_threshold' in data:
-            android_leak_detector.leak_threshold = float(data['leak_threshold'])
-        if 'time_window' in data:
-            android_leak_detector.time_window = int(data['time_window'])
-        if 'growth_rate_threshold' in data:
-            android_leak_detector.growth_rate_threshold = float(data['growth_rate_threshold'])
-        if 'alert_cooldown' in data:
-            android_leak_detector.alert_cooldown = int(data['alert_cooldown'])
-            
+        settings = android_leak_detectors.update_settings(data, 'android', **get_leak_settings_scope(data))
+        settings.pop('min_samples', None)
         print(f"📋 Android内存泄漏检测设置已更新: {data}")
         emit('leak_settings_updated', {
             'success': True,
-            'settings': {
-                'leak_threshold': android_leak_detector.leak_threshold,
-                'time_window': android_leak_detector.time_window,
-                'growth_rate_threshold': android_leak_detector.growth_rate_threshold,
-                'alert_cooldown': android_leak_detector.alert_cooldown
-            }
+            'settings': settings
         })
     except Exception as e:
         print(f"❌ 更新Android内存泄漏设置失败: {e}")
@@ -1037,24 +1316,17 @@ def handle_update_leak_settings(data):
 
 
 @socketio.on('get_leak_settings')
-def handle_get_leak_settings():
+def handle_get_leak_settings(data=None):
     """获取当前内存泄漏检测设置"""
-    emit('leak_settings', {
-        'leak_threshold': android_leak_detector.leak_threshold,
-        'time_window': android_leak_detector.time_window,
-        'growth_rate_threshold': android_leak_detector.growth_rate_threshold,
-        'alert_cooldown': android_leak_detector.alert_cooldown,
-        'min_samples': android_leak_detector.min_samples
-    })
+    emit('leak_settings', android_leak_detectors.settings_for('android', **get_leak_settings_scope(data)))
 
 
 @socketio.on('reset_leak_detector')
-def handle_reset_leak_detector():
+def handle_reset_leak_detector(data=None):
     """重置内存泄漏检测器"""
     try:
-        android_leak_detector.memory_history.clear()
-        android_leak_detector.last_alert_time = 0
-        print("🔄 Android内存泄漏检测器已重置")
+        removed = android_leak_detectors.reset('android', **get_leak_settings_scope(data))
+        print(f"🔄 Android内存泄漏检测器已重置 ({removed} 个)")
         emit('leak_detector_reset', {'success': True})
     except Exception as e:
         print(f"❌ 重置Android内存泄漏检测器失败: {e}")
@@ -1075,10 +1347,10 @@ def handle_get_leak_events(data):
 
 
 @socketio.on('clear_leak_log')
-def handle_clear_leak_log():
-    """清空内存泄漏事件日志"""
+def handle_clear_leak_log(data=None):
+    """清空内存泄漏事件日志（可通过before指定只删除该时间戳之前的历史日志段）"""
     try:
-        android_leak_logger.clear_log()
+        android_leak_logger.clear_log(data.get('before') if data else None)
         print("🗑️ Android内存泄漏事件日志已清空")
         emit('leak_log_cleared', {'success': True})
     except Exception as e:
@@ -1165,6 +1437,7 @@ if __name__ == '__main__':
     if external_ip:
         print(f"✅ 选择192.168段IP: {external_ip}")
     
+    print(f"⏱️ 模块初始化耗时: {(time.perf_counter() - _startup_begin) * 1000:.0f}ms")
     print("🚀 启动Android性能监控Web界面...")
     print("=" * 60)
     print(f"📱 本地访问地址: http://localhost:5003")
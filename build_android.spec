@@ -12,7 +12,7 @@ import os
 datas = [
     ('templates', 'templates'),
     ('android', 'android'),
-    ('ios', 'ios'),  # 包含 ios 目录以支持内存泄漏检测模块
+    ('common', 'common'),  # 跨平台内存泄漏检测模块（不再需要 ios 目录）
 ]
 
 # 只在 static 目录存在且不为空时添加
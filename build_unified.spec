@@ -13,6 +13,7 @@ datas = [
     ('templates', 'templates'),
     ('android', 'android'),
     ('ios', 'ios'),
+    ('common', 'common'),
 ]
 
 # 只在 static 目录存在且不为空时添加
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# 后台批量写入线程（iOS/Android通用，只依赖标准库）
+# 采集线程只把记录放入有界队列，由后台线程批量写盘并定期fsync，
+# 磁盘变慢时采集延迟不受影响；队列满时丢弃新记录并计数，而不是阻塞采集。
+import atexit
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class BackgroundWriter(object):
+    """有界队列 + 后台线程的批量写入器
+
+    sink(records, fsync) 在后台线程中被调用：records 为一批记录（可能为空列表，仅要求fsync），
+    fsync 为True时写入后需要将数据刷到磁盘。
+    """
+
+    def __init__(self, sink, name='writer', max_queue=10000, batch_size=256, flush_interval=0.5,
+                 fsync_interval=5.0):
+        self.sink = sink
+        self.name = name
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0  # 已入队但尚未写盘的记录数
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_error = None
+        self.last_flush = None
+        self.last_fsync = None
+        self._dirty = False  # 有已写入但尚未fsync的数据
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f'{name}-writer', daemon=True)
+        self._thread.start()
+        # 进程退出时把队列中剩余的记录写完
+        atexit.register(self.close)
+
+    def put(self, record):
+        """放入一条记录，不阻塞；队列已满或已关闭时丢弃并返回False"""
+        if self._closed:
+            with self._lock:
+                self.dropped += 1
+            return False
+        with self._lock:
+            self._pending += 1
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            with self._lock:
+                self._pending -= 1
+                self.dropped += 1
+                if self._pending == 0:
+                    self._idle.notify_all()
+            return False
+
+    def flush(self, timeout=5.0):
+        """等待已入队的记录全部写盘，超时返回False"""
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._pending > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._thread.is_alive():
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def close(self, timeout=5.0):
+        """停止后台线程，写完剩余记录并fsync"""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def stats(self):
+        """队列深度和写入/丢弃计数"""
+        with self._lock:
+            return {
+                'name': self.name,
+                'queue_depth': self._queue.qsize(),
+                'max_queue': self.max_queue,
+                'pending': self._pending,
+                'written': self.written,
+                'dropped': self.dropped,
+                'batches': self.batches,
+                'errors': self.errors,
+                'last_error': self.last_error,
+                'last_flush': self.last_flush,
+                'last_fsync': self.last_fsync,
+            }
+
+    def _run(self):
+        last_fsync = time.monotonic()
+        stopping = False
+        while not stopping:
+            batch = []
+            try:
+                record = self._queue.get(timeout=self.flush_interval)
+                if record is _STOP:
+                    stopping = True
+                else:
+                    batch.append(record)
+            except queue.Empty:
+                pass
+            # 尽量多取一些，凑成一批写入
+            while not stopping and len(batch) < self.batch_size:
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stopping = True
+                else:
+                    batch.append(record)
+
+            now = time.monotonic()
+            need_fsync = stopping or (now - last_fsync >= self.fsync_interval)
+            if batch or (need_fsync and self._dirty):
+                self._write(batch, need_fsync and (batch or self._dirty))
+                if need_fsync:
+                    last_fsync = now
+
+    def _write(self, batch, fsync):
+        try:
+            self.sink(batch, bool(fsync))
+            with self._lock:
+                self.written += len(batch)
+                if batch:
+                    self.batches += 1
+                    self.last_flush = time.time()
+                if fsync:
+                    self.last_fsync = time.time()
+            self._dirty = not fsync
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                self.dropped += len(batch)
+                self.last_error = str(e)
+            print(f"❌ {self.name} 后台写入失败: {e}")
+        finally:
+            with self._lock:
+                self._pending -= len(batch)
+                if self._pending <= 0:
+                    self._pending = 0
+                    self._idle.notify_all()
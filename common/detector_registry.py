@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+# 内存泄漏检测器注册表（iOS/Android通用）
+# 按 (platform, device, app, pid) 为每个被监控进程维护独立的 MemoryLeakDetector，
+# 取代原先各平台一个全局检测器的做法：多设备/多应用并发监控时互不干扰，
+# 应用重启（PID变化）后自动使用新的检测器和基线。
+import threading
+import time
+
+from common.memory_leak import MemoryLeakDetector
+
+DETECTION_MODES = ('trend', 'trough')
+
+
+def _detection_mode(value):
+    if value not in DETECTION_MODES:
+        raise ValueError(f"未知的检测模式: {value}")
+    return value
+
+
+# 可通过设置界面调整的检测参数及其类型
+LEAK_SETTING_TYPES = {
+    'leak_threshold': float,
+    'time_window': int,
+    'growth_rate_threshold': float,
+    'alert_cooldown': int,
+    'regression_window': int,
+    'detection_mode': _detection_mode,
+    'trough_growth_threshold': float,
+    'drop_threshold': float,
+}
+
+
+class LeakDetectorRegistry(object):
+    """按会话管理内存泄漏检测器
+
+    - 每个检测器的历史样本数有上限（max_samples），长时间监控内存占用固定
+    - 超过 idle_timeout 秒没有新样本的检测器会被淘汰
+    - 设置可以按平台、设备或应用生效，新建的检测器会继承对应范围的设置
+    """
+
+    def __init__(self, idle_timeout=1800, max_samples=6000, evict_interval=60):
+        self.idle_timeout = idle_timeout
+        self.max_samples = max_samples
+        self.evict_interval = evict_interval
+        self._entries = {}    # (platform, device, app, pid) -> [detector, last_used]
+        self._overrides = {}  # (platform, device, app)，device/app为None表示更大范围 -> settings
+        self._lock = threading.Lock()
+        self._last_evict = time.time()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def _scopes(platform, device=None, app=None):
+        """从大到小列出设置生效范围"""
+        scopes = [(platform, None, None)]
+        if device is not None:
+            scopes.append((platform, device, None))
+            if app is not None:
+                scopes.append((platform, device, app))
+        return scopes
+
+    @staticmethod
+    def _matches(key, platform, device=None, app=None, pid=None):
+        return (key[0] == platform and
+                (device is None or key[1] == device) and
+                (app is None or key[2] == app) and
+                (pid is None or key[3] == pid))
+
+    @staticmethod
+    def _apply(detector, settings):
+        for name, value in settings.items():
+            setattr(detector, name, value)
+
+    def _effective_settings(self, platform, device=None, app=None):
+        settings = {}
+        for scope in self._scopes(platform, device, app):
+            settings.update(self._overrides.get(scope, {}))
+        return settings
+
+    def get(self, platform, device, app, pid):
+        """获取（必要时创建）指定进程的检测器，并刷新其活跃时间"""
+        key = (platform, device, app, pid)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                detector = MemoryLeakDetector(max_samples=self.max_samples)
+                self._apply(detector, self._effective_settings(platform, device, app))
+                entry = self._entries[key] = [detector, now]
+                print(f"🧠 新建内存泄漏检测器: {platform}/{device}/{app} (PID {pid})")
+            else:
+                entry[1] = now
+            if now - self._last_evict > self.evict_interval:
+                self._evict_idle_locked(now)
+            return entry[0]
+
+    def settings_for(self, platform, device=None, app=None):
+        """返回指定范围当前生效的设置（含默认值）"""
+        detector = MemoryLeakDetector()
+        with self._lock:
+            self._apply(detector, self._effective_settings(platform, device, app))
+        settings = {name: getattr(detector, name) for name in LEAK_SETTING_TYPES}
+        settings['min_samples'] = detector.min_samples
+        return settings
+
+    def update_settings(self, settings, platform, device=None, app=None):
+        """更新指定范围的设置，并立即应用到该范围内已有的检测器
+
+        已有检测器重新应用各自的生效设置（从大到小合并），更小范围的设置仍然优先，与新建的检测器一致。
+
+        Returns:
+            dict: 更新后该范围生效的设置
+        """
+        converted = {name: LEAK_SETTING_TYPES[name](value)
+                     for name, value in settings.items() if name in LEAK_SETTING_TYPES}
+        scope = self._scopes(platform, device, app)[-1]
+        with self._lock:
+            self._overrides.setdefault(scope, {}).update(converted)
+            for key, entry in self._entries.items():
+                if self._matches(key, platform, device, app):
+                    self._apply(entry[0], self._effective_settings(*key[:3]))
+        return self.settings_for(platform, device, app)
+
+    def reset(self, platform, device=None, app=None, pid=None):
+        """移除指定范围（或指定进程）的检测器（下次采样时重新建立基线），返回移除数量"""
+        with self._lock:
+            keys = [key for key in self._entries if self._matches(key, platform, device, app, pid)]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def evict_idle(self, now=None):
+        """淘汰长时间没有新样本的检测器，返回淘汰数量"""
+        with self._lock:
+            return self._evict_idle_locked(now or time.time())
+
+    def _evict_idle_locked(self, now):
+        self._last_evict = now
+        idle = [key for key, (_, last_used) in self._entries.items() if now - last_used > self.idle_timeout]
+        for key in idle:
+            del self._entries[key]
+            print(f"🧹 淘汰空闲的内存泄漏检测器: {'/'.join(str(part) for part in key)}")
+        return len(idle)
+
+    def snapshot(self):
+        """列出当前所有检测器的概要信息"""
+        with self._lock:
+            return [{
+                'platform': key[0],
+                'device': key[1],
+                'app': key[2],
+                'pid': key[3],
+                'samples': len(detector.memory_history),
+                'baseline_memory': detector.baseline_memory,
+                'last_used': last_used,
+            } for key, (detector, last_used) in self._entries.items()]
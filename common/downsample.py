@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# 时间序列降采样（只依赖标准库）
+# LTTB（Largest-Triangle-Three-Buckets）：保留视觉上最重要的点（峰值、拐点），
+# 任意长度的序列都能压缩到固定点数再交给图表渲染。
+import math
+
+
+def lttb(xs, ys, threshold):
+    """LTTB降采样，返回保留下来的点在原序列中的下标（升序）
+
+    Args:
+        xs: 横坐标（时间戳，升序）
+        ys: 纵坐标，NaN点不参与选择
+        threshold: 目标点数（至少3；序列不超过该长度时原样返回全部有效点）
+    """
+    valid = [i for i in range(min(len(xs), len(ys))) if not math.isnan(ys[i])]
+    n = len(valid)
+    if threshold >= n or n <= 2:
+        return valid
+    threshold = max(3, int(threshold))
+
+    selected = [valid[0]]
+    # 首尾两点固定保留，中间的点平均分成 threshold-2 个桶
+    bucket_size = (n - 2) / (threshold - 2)
+    a = valid[0]
+    for bucket in range(threshold - 2):
+        start = int(math.floor(bucket * bucket_size)) + 1
+        end = int(math.floor((bucket + 1) * bucket_size)) + 1
+
+        # 下一个桶的平均点（最后一个桶的下一个点是终点）
+        next_start = end
+        next_end = min(int(math.floor((bucket + 2) * bucket_size)) + 1, n)
+        if next_start >= n - 1:
+            avg_x, avg_y = xs[valid[-1]], ys[valid[-1]]
+        else:
+            count = next_end - next_start
+            avg_x = sum(xs[valid[j]] for j in range(next_start, next_end)) / count
+            avg_y = sum(ys[valid[j]] for j in range(next_start, next_end)) / count
+
+        # 选出与上一个选中点、下一个桶平均点组成三角形面积最大的点
+        ax, ay = xs[a], ys[a]
+        best, best_area = valid[start], -1.0
+        for j in range(start, end):
+            i = valid[j]
+            area = abs((ax - avg_x) * (ys[i] - ay) - (ax - xs[i]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = i, area
+        selected.append(best)
+        a = best
+
+    selected.append(valid[-1])
+    return selected
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+# 内存泄漏事件查询索引（SQLite，iOS/Android共用一个数据库）
+# 日志文件仍是事件的原始记录，这里按平台/应用/严重程度/时间建立索引，
+# 支持服务端过滤和分页，几十万条事件也能快速返回。
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from common.segment_log import entry_app, entry_time
+
+DB_FILE_NAME = 'leak_events.sqlite3'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS leak_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    platform TEXT NOT NULL,
+    app TEXT,
+    severity TEXT,
+    detection_method TEXT,
+    current_memory REAL,
+    event TEXT NOT NULL,
+    UNIQUE (platform, ts, app, current_memory)
+);
+CREATE INDEX IF NOT EXISTS idx_leak_events_ts ON leak_events (ts);
+CREATE INDEX IF NOT EXISTS idx_leak_events_app ON leak_events (app, ts);
+CREATE INDEX IF NOT EXISTS idx_leak_events_severity ON leak_events (severity, ts);
+CREATE INDEX IF NOT EXISTS idx_leak_events_platform ON leak_events (platform, ts);
+'''
+
+MAX_PAGE_SIZE = 500
+
+
+class LeakEventIndex(object):
+    """泄漏事件的SQLite索引（WAL模式，iOS/Android两个服务进程可同时读写）"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:  # 正常退出时提交，异常时回滚
+                yield conn
+        finally:
+            conn.close()
+
+    def add_events(self, platform, entries):
+        """批量写入事件（重复事件自动忽略），返回新增数量"""
+        rows = []
+        for entry in entries:
+            ts = entry_time(entry)
+            if ts is None:
+                continue
+            rows.append((ts, platform, entry_app(entry), entry.get('severity'),
+                         entry.get('detection_method', 'trend'), entry.get('current_memory'),
+                         json.dumps(entry, ensure_ascii=False)))
+        if not rows:
+            return 0
+        with self._lock, self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany('INSERT OR IGNORE INTO leak_events '
+                             '(ts, platform, app, severity, detection_method, current_memory, event) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+            return conn.total_changes - before
+
+    def count(self, platform=None):
+        with self._connect() as conn:
+            if platform is None:
+                return conn.execute('SELECT COUNT(*) FROM leak_events').fetchone()[0]
+            return conn.execute('SELECT COUNT(*) FROM leak_events WHERE platform = ?', (platform,)).fetchone()[0]
+
+    def delete(self, platform, ranges=None):
+        """删除指定平台的事件（ranges为 [(start, end), ...] 时只删除这些时间范围内的事件，闭区间）"""
+        with self._lock, self._connect() as conn:
+            if ranges is None:
+                conn.execute('DELETE FROM leak_events WHERE platform = ?', (platform,))
+            else:
+                conn.executemany('DELETE FROM leak_events WHERE platform = ? AND ts BETWEEN ? AND ?',
+                                 [(platform, start, end) for start, end in ranges])
+
+    def query(self, platform=None, app=None, severity=None, start=None, end=None, page=1, page_size=50,
+              cursor=None):
+        """过滤并分页查询事件，按时间从新到旧
+
+        Args:
+            severity: 严重程度，可为列表（任一匹配）
+            start/end: 时间范围（时间戳，秒，闭区间）
+            page/page_size: 页码分页（从1开始）
+            cursor: 上一页返回的next_cursor，指定时忽略page，翻页深度不影响查询速度
+        Returns:
+            dict: events, total, page, page_size, has_more, next_cursor
+        """
+        page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+        page = max(1, int(page))
+        conditions, params = [], []
+        if platform:
+            conditions.append('platform = ?')
+            params.append(platform)
+        if app:
+            conditions.append('app = ?')
+            params.append(app)
+        if severity:
+            severities = [severity] if isinstance(severity, str) else list(severity)
+            conditions.append(f"severity IN ({','.join('?' * len(severities))})")
+            params.extend(severities)
+        if start is not None:
+            conditions.append('ts >= ?')
+            params.append(float(start))
+        if end is not None:
+            conditions.append('ts <= ?')
+            params.append(float(end))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        with self._connect() as conn:
+            total = conn.execute(f'SELECT COUNT(*) FROM leak_events {where}', params).fetchone()[0]
+            if cursor:
+                # 游标为上一页最后一条的 "ts:id"，按 (ts, id) 倒序继续
+                cursor_ts, cursor_id = str(cursor).split(':')
+                keyset = '(ts < ? OR (ts = ? AND id < ?))'
+                where_page = f'{where} AND {keyset}' if where else f'WHERE {keyset}'
+                rows = conn.execute(f'SELECT id, ts, platform, event FROM leak_events {where_page} '
+                                    f'ORDER BY ts DESC, id DESC LIMIT ?',
+                                    params + [float(cursor_ts), float(cursor_ts), int(cursor_id), page_size + 1]
+                                    ).fetchall()
+            else:
+                rows = conn.execute(f'SELECT id, ts, platform, event FROM leak_events {where} '
+                                    f'ORDER BY ts DESC, id DESC LIMIT ? OFFSET ?',
+                                    params + [page_size + 1, (page - 1) * page_size]).fetchall()
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        events = []
+        for row_id, ts, row_platform, event in rows:
+            entry = json.loads(event)
+            entry['id'] = row_id
+            entry['platform'] = row_platform
+            events.append(entry)
+        return {
+            'events': events,
+            'total': total,
+            'page': page,
+            'page_size': page_size,
+            'has_more': has_more,
+            'next_cursor': f'{rows[-1][1]!r}:{rows[-1][0]}' if has_more and rows else None,
+        }
+
+
+def parse_time(value):
+    """时间参数：时间戳（秒）或 'YYYY-MM-DD HH:MM:SS' / 'YYYY-MM-DD'"""
+    if value in (None, ''):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, fmt).timestamp()
+        except ValueError:
+            continue
+    raise ValueError(f"无法解析时间: {value}")
+
+
+def parse_query_args(args):
+    """把HTTP查询参数转换为 LeakEventIndex.query 的参数
+
+    支持: platform, app, severity（逗号分隔多个）, start, end, page, page_size, cursor
+    """
+    severity = args.get('severity')
+    return {
+        'platform': args.get('platform') or None,
+        'app': args.get('app') or None,
+        'severity': [s for s in severity.split(',') if s] if severity else None,
+        'start': parse_time(args.get('start')),
+        'end': parse_time(args.get('end')),
+        'page': int(args.get('page', 1)),
+        'page_size': int(args.get('page_size', 50)),
+        'cursor': args.get('cursor') or None,
+    }
@@ -0,0 +1,394 @@
+# -*- coding: utf-8 -*-
+# 内存泄漏检测离线回放（向量化批处理）
+# 对录制好的整段内存序列一次性计算与 MemoryLeakDetector 逐样本调用完全一致的
+# 回收检测、趋势回归和告警判定，并支持一次性扫描多组阈值参数。
+# CUSUM变点检测是逐样本递推的，不在回放范围内（对应 change_point_enabled = False）。
+# 依赖numpy（仅离线分析使用，实时监控服务不导入本模块）
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+
+if __package__ in (None, ''):
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.memory_leak import MemoryLeakDetector
+
+# 回放参数及默认值（与 MemoryLeakDetector 的属性同名）
+DEFAULT_PARAMS = {
+    'leak_threshold': 50,
+    'time_window': 300,
+    'min_samples': 10,
+    'growth_rate_threshold': 0.5,
+    'alert_cooldown': 60,
+    'no_drop_threshold': 120,
+    'drop_threshold': 20,
+    'regression_window': 10,
+}
+
+# 决定窗口统计量的参数，相同取值的参数组合共享一次趋势计算
+_WINDOW_KEYS = ('time_window', 'regression_window')
+
+# 每批同时判定的参数组合数，限制 (组合数 × 样本数) 布尔矩阵的内存占用
+_COMBO_CHUNK = 64
+
+
+def _parse_timestamps(values):
+    """把导出文件中的时间列转换为秒级时间戳数组
+
+    支持数字时间戳、ISO日期时间和仅含时分秒的标签（跨零点时自动加一天），
+    无法解析时按每秒一个样本处理。
+    """
+    values = [str(v).strip() for v in values]
+    try:
+        return np.array([float(v) for v in values], dtype=np.float64)
+    except ValueError:
+        pass
+    try:
+        return np.array([datetime.fromisoformat(v.replace('Z', '+00:00')).timestamp() for v in values],
+                        dtype=np.float64)
+    except ValueError:
+        pass
+    try:
+        seconds = []
+        day_offset = 0.0
+        previous = None
+        for v in values:
+            fmt = '%H:%M:%S.%f' if '.' in v else '%H:%M:%S'
+            t = datetime.strptime(v, fmt)
+            value = t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1e6
+            if previous is not None and value + day_offset < previous:
+                day_offset += 86400
+            previous = value + day_offset
+            seconds.append(previous)
+        return np.array(seconds, dtype=np.float64)
+    except ValueError:
+        return np.arange(len(values), dtype=np.float64)
+
+
+def load_memory_series(path):
+    """读取Web界面导出的JSON或CSV文件，返回 (timestamps, memory) 两个numpy数组"""
+    if path.lower().endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+        records = payload.get('data', payload) if isinstance(payload, dict) else payload
+        records = [r for r in records if r.get('type', 'performance') == 'performance']
+        timestamps = _parse_timestamps([r.get('timestamp', r.get('time', i)) for i, r in enumerate(records)])
+        memory = np.array([float(r.get('memory') or 0) for r in records], dtype=np.float64)
+        return timestamps, memory
+
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        return np.empty(0), np.empty(0)
+    columns = rows[0].keys()
+    memory_column = next((c for c in columns if c.startswith('Memory')), None)
+    time_column = 'Timestamp' if 'Timestamp' in columns else next(iter(columns))
+    if memory_column is None:
+        raise ValueError(f'CSV文件缺少内存列: {path}')
+    timestamps = _parse_timestamps([r[time_column] for r in rows])
+    memory = np.array([float(r[memory_column] or 0) for r in rows], dtype=np.float64)
+    return timestamps, memory
+
+
+def _regression_sums(timestamps, memory, first, width):
+    """每个样本时刻回归窗口 [first[i], i] 内以窗口末尾样本为原点的 count、Σt、Σtt、Σy、Σty
+
+    前缀和按 width 个样本分块、块内以块首样本为参考点累加（量级与会话长度无关），
+    长度不超过 width 的窗口最多跨两块，两段的累加和再平移到窗口末尾样本。
+    """
+    n = len(memory)
+    index = np.arange(n)
+    block = index // width
+    block_start = block * width
+    blocks = -(-n // width)
+
+    def local_cumsum(values):
+        padded = np.zeros(blocks * width)
+        padded[:n] = values
+        return padded.reshape(blocks, width).cumsum(axis=1).ravel()[:n]
+
+    u = timestamps - timestamps[block_start]
+    v = memory - memory[block_start]
+    columns = [np.ones(n), u, u * u, v, u * v]
+    inclusive = [local_cumsum(c) for c in columns]
+
+    first_block = block[first]
+    same = first_block == block
+    head_end = np.where(same, index, np.minimum(first_block * width + width - 1, n - 1))
+    # 两段：窗口开始所在块的部分 [first, head_end]，以及（跨块时）末尾所在块的部分 [块首, i]
+    parts = [([c[head_end] - c[first] + col[first] for c, col in zip(inclusive, columns)], first_block * width)]
+    parts.append(([np.where(same, 0.0, c) for c in inclusive], block_start))
+
+    end_t, end_y = timestamps, memory
+    count = sum_t = sum_tt = sum_y = sum_ty = 0.0
+    for (c, s_u, s_uu, s_v, s_uv), origin in parts:
+        d = timestamps[origin] - end_t  # 块参考点相对窗口末尾的时间偏移
+        e = memory[origin] - end_y
+        count = count + c
+        sum_t = sum_t + s_u + c * d
+        sum_tt = sum_tt + s_uu + 2 * d * s_u + c * d * d
+        sum_y = sum_y + s_v + c * e
+        sum_ty = sum_ty + s_uv + e * s_u + d * s_v + c * d * e
+    return count, sum_t, sum_tt, sum_y, sum_ty
+
+
+def _window_extrema(values, first):
+    """每个样本时刻 values[first[i]..i] 的最大值和最小值（first单调不减）
+
+    按2的幂逐级合并的稀疏表，每一级只保留一份数组：长度在 [2^k, 2^(k+1)) 的区间
+    由两个长度为 2^k 的块覆盖，内存 O(n)，时间 O(n·log(窗口长度))。
+    """
+    n = len(values)
+    index = np.arange(n)
+    # frexp 的指数减1即 floor(log2(长度))，不受浮点log2舍入影响
+    level = np.frexp((index - first + 1).astype(np.float64))[1] - 1
+    window_max = np.empty(n)
+    window_min = np.empty(n)
+    block_max = values.copy()
+    block_min = values.copy()
+    for k in range(int(level.max()) + 1 if n else 0):
+        if k:
+            # block_*[j] 为 values[j..j+2^k-1] 的极值（超出末尾的位置不会被查询）
+            step = 1 << (k - 1)
+            block_max[:n - step] = np.maximum(block_max[:n - step], block_max[step:])
+            block_min[:n - step] = np.minimum(block_min[:n - step], block_min[step:])
+        rows = np.flatnonzero(level == k)
+        left, right = first[rows], rows - (1 << k) + 1
+        window_max[rows] = np.maximum(block_max[left], block_max[right])
+        window_min[rows] = np.minimum(block_min[left], block_min[right])
+    return window_max, window_min
+
+
+def _window_stats(timestamps, memory, time_window, regression_window):
+    """计算每个样本时刻的窗口统计量（与逐样本调用时的检测器状态一致）
+
+    返回 dict：history_len（时间窗口内样本数）、slope（MB/秒）、time_span（秒）、
+    window_max、window_min、trend_len（回归窗口样本数）、first_in_window（时间窗口首个样本下标）
+    回归的累加和由分块前缀和得到，极值由稀疏表得到，内存与回归窗口长度无关。
+    """
+    n = len(memory)
+    index = np.arange(n)
+    # 时间窗口：保留 t_i - t_j <= time_window 的样本
+    first_in_window = np.searchsorted(timestamps, timestamps - time_window, side='left')
+    history_len = index - first_in_window + 1
+    width = max(2, int(regression_window))
+    trend_len = np.minimum(history_len, width)
+    first_trend = index - trend_len + 1
+
+    count, sum_t, sum_tt, sum_y, sum_ty = _regression_sums(timestamps, memory, first_trend, width)
+    denominator = count * sum_tt - sum_t * sum_t
+    time_span = timestamps - timestamps[first_trend]
+    # 窗口内时间跨度为0时回归无意义（前缀和相减的舍入误差可能使分母略大于0）
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where((trend_len >= 2) & (time_span > 0) & (denominator > 0),
+                         (count * sum_ty - sum_t * sum_y) / denominator, 0.0)
+
+    window_max, window_min = _window_extrema(memory, first_trend)
+    return {
+        'history_len': history_len,
+        'slope': slope,
+        'time_span': time_span,
+        'window_max': window_max,
+        'window_min': window_min,
+        'trend_len': trend_len,
+        'first_in_window': first_in_window,
+    }
+
+
+def _last_drop_times(timestamps, memory, drop_threshold):
+    """每个样本时刻最近一次内存回收（相邻样本下降超过阈值）的时间，无回收为NaN"""
+    drops = np.zeros(len(memory), dtype=bool)
+    drops[1:] = (memory[:-1] - memory[1:]) > drop_threshold
+    drop_times = np.where(drops, timestamps, -np.inf)
+    last_drop = np.maximum.accumulate(drop_times) if len(drop_times) else drop_times
+    return np.where(np.isfinite(last_drop), last_drop, np.nan)
+
+
+def _apply_cooldown(candidate_indices, timestamps, alert_cooldown):
+    """按冷却时间从候选告警中挑出实际告警（last_alert_time初始为0，与检测器一致）"""
+    if len(candidate_indices) == 0:
+        return candidate_indices
+    candidate_times = timestamps[candidate_indices]
+    alerts = []
+    last_alert = 0.0
+    position = 0
+    while position < len(candidate_indices):
+        # 跳到第一个满足 now - last_alert > cooldown 的候选样本
+        position = np.searchsorted(candidate_times, last_alert + alert_cooldown, side='right')
+        if position >= len(candidate_indices):
+            break
+        alerts.append(candidate_indices[position])
+        last_alert = candidate_times[position]
+        position += 1
+    return np.array(alerts, dtype=np.int64)
+
+
+def _evaluate(timestamps, memory, stats, combos):
+    """对共享窗口统计量的一批参数组合做向量化判定，返回每个组合的告警下标数组"""
+    params = {key: np.array([c[key] for c in combos], dtype=np.float64)[:, None]
+              for key in ('leak_threshold', 'min_samples', 'growth_rate_threshold', 'no_drop_threshold')}
+    growth_rate = stats['slope'][None, :] * 60
+    memory_increase = (stats['window_max'] - stats['window_min'])[None, :]
+    current = memory[None, :]
+    baseline = memory[0]
+
+    is_leak = ((growth_rate > params['growth_rate_threshold']) &
+               (memory_increase > params['leak_threshold']) &
+               (current > stats['window_min'][None, :] + params['leak_threshold']))
+    candidates = (is_leak &
+                  (stats['history_len'][None, :] >= params['min_samples']) &
+                  (current - baseline > params['leak_threshold']))
+
+    results = []
+    drop_cache = {}
+    for row, combo in enumerate(combos):
+        drop_threshold = combo['drop_threshold']
+        if drop_threshold not in drop_cache:
+            drop_cache[drop_threshold] = _last_drop_times(timestamps, memory, drop_threshold)
+        last_drop = drop_cache[drop_threshold]
+        # 与检测器相同：从未回收，或距上次回收超过 no_drop_threshold
+        no_recent_drop = np.isnan(last_drop) | (timestamps - last_drop > combo['no_drop_threshold'])
+        candidate_indices = np.flatnonzero(candidates[row] & no_recent_drop)
+        results.append((_apply_cooldown(candidate_indices, timestamps, combo['alert_cooldown']), last_drop))
+    return results
+
+
+def _build_alerts(timestamps, memory, stats, alert_indices, last_drop):
+    """为实际告警样本生成与 detect_memory_leak() 返回值相同结构的 leak_info"""
+    reference = MemoryLeakDetector()
+    alerts = []
+    for i in alert_indices:
+        growth_rate = float(stats['slope'][i] * 60)
+        memory_increase = float(stats['window_max'][i] - stats['window_min'][i])
+        no_recycle_from = last_drop[i] if not np.isnan(last_drop[i]) else timestamps[stats['first_in_window'][i]]
+        alerts.append({
+            'index': int(i),
+            'timestamp': float(timestamps[i]),
+            'is_leak': True,
+            'current_memory': float(memory[i]),
+            'growth_rate': round(growth_rate, 2),
+            'memory_increase': round(memory_increase, 2),
+            'time_span': round(float(stats['time_span'][i]) / 60, 1),
+            'samples_count': int(stats['trend_len'][i]),
+            'severity': reference._calculate_severity(growth_rate, memory_increase),
+            'recommendation': reference._get_recommendation(growth_rate, memory_increase),
+            'baseline_memory': float(memory[0]),
+            'no_recycle_duration': float(timestamps[i] - no_recycle_from),
+            'detection_method': 'trend',
+            'change_point': None,
+        })
+    return alerts
+
+
+def replay_leak_detection(timestamps, memory, **params):
+    """对整段内存序列回放泄漏检测，结果与逐样本调用 MemoryLeakDetector 一致
+
+    Args:
+        timestamps: 样本时间戳（秒，单调递增）
+        memory: 内存使用量（MB）
+        **params: 覆盖 DEFAULT_PARAMS 中的检测参数
+
+    Returns:
+        dict: params、alerts（leak_info列表）、growth_rate（每个样本的MB/分钟）、
+              drop_indices（回收发生的样本下标）
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    memory = np.asarray(memory, dtype=np.float64)
+    combo = dict(DEFAULT_PARAMS, **params)
+    if len(memory) == 0:
+        return {'params': combo, 'alerts': [], 'growth_rate': np.empty(0), 'drop_indices': np.empty(0, dtype=np.int64)}
+
+    stats = _window_stats(timestamps, memory, combo['time_window'], combo['regression_window'])
+    (alert_indices, last_drop), = _evaluate(timestamps, memory, stats, [combo])
+    drop_indices = np.flatnonzero(np.diff(memory) < -combo['drop_threshold']) + 1
+    return {
+        'params': combo,
+        'alerts': _build_alerts(timestamps, memory, stats, alert_indices, last_drop),
+        'growth_rate': stats['slope'] * 60,
+        'drop_indices': drop_indices,
+    }
+
+
+def sweep_leak_detection(timestamps, memory, param_grid):
+    """一次性评估多组检测参数
+
+    Args:
+        param_grid: {参数名: 取值列表}，未给出的参数使用默认值，对所有取值做笛卡尔积
+
+    Returns:
+        list[dict]: 每个参数组合的 params、alert_count、first_alert_time、alert_timestamps
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    memory = np.asarray(memory, dtype=np.float64)
+    unknown = set(param_grid) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f'未知的检测参数: {", ".join(sorted(unknown))}')
+
+    keys = list(DEFAULT_PARAMS)
+    values = [list(param_grid.get(key, [DEFAULT_PARAMS[key]])) for key in keys]
+    combos = [dict(zip(keys, combination)) for combination in itertools.product(*values)]
+
+    # 按窗口参数分组：同组组合共享滑动窗口统计量，只做廉价的阈值比较
+    groups = {}
+    for position, combo in enumerate(combos):
+        groups.setdefault(tuple(combo[k] for k in _WINDOW_KEYS), []).append(position)
+
+    results = [None] * len(combos)
+    for (time_window, regression_window), positions in groups.items():
+        if len(memory) == 0:
+            stats = None
+        else:
+            stats = _window_stats(timestamps, memory, time_window, regression_window)
+        for start in range(0, len(positions), _COMBO_CHUNK):
+            chunk = positions[start:start + _COMBO_CHUNK]
+            chunk_combos = [combos[p] for p in chunk]
+            if stats is None:
+                evaluated = [(np.empty(0, dtype=np.int64), None)] * len(chunk)
+            else:
+                evaluated = _evaluate(timestamps, memory, stats, chunk_combos)
+            for p, combo, (alert_indices, _) in zip(chunk, chunk_combos, evaluated):
+                alert_times = timestamps[alert_indices] if len(alert_indices) else np.empty(0)
+                results[p] = {
+                    'params': combo,
+                    'alert_count': int(len(alert_indices)),
+                    'first_alert_time': float(alert_times[0]) if len(alert_times) else None,
+                    'alert_timestamps': alert_times,
+                }
+    return results
+
+
+def _parse_grid_value(text):
+    return [float(v) for v in text.split(',') if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='离线回放内存泄漏检测（支持多组阈值参数扫描）')
+    parser.add_argument('path', help='Web界面导出的JSON或CSV文件')
+    for key, default in DEFAULT_PARAMS.items():
+        parser.add_argument(f'--{key.replace("_", "-")}', dest=key, type=_parse_grid_value,
+                            default=[default], help=f'逗号分隔的取值列表（默认 {default}）')
+    args = parser.parse_args()
+
+    timestamps, memory = load_memory_series(args.path)
+    grid = {key: getattr(args, key) for key in DEFAULT_PARAMS}
+    print(f"📂 已加载 {len(memory)} 个内存样本: {args.path}")
+
+    results = sweep_leak_detection(timestamps, memory, grid)
+    varying = [key for key in DEFAULT_PARAMS if len(grid[key]) > 1] or ['leak_threshold']
+    print("=" * 70)
+    print('  '.join(f'{key:>22}' for key in varying) + f'  {"告警次数":>8}  {"首次告警(秒)":>12}')
+    for result in results:
+        first = result['first_alert_time']
+        offset = f'{first - timestamps[0]:.1f}' if first is not None else '-'
+        print('  '.join(f'{result["params"][key]:>22g}' for key in varying) +
+              f'  {result["alert_count"]:>8}  {offset:>12}')
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+# 实时事件按客户端刷新间隔合并发送（iOS/Android通用，只依赖标准库）
+# 默认（刷新间隔0）每个事件立即发送，与原来相同；客户端选择刷新间隔后改为加入 <房间>@<毫秒> 房间，
+# 同一会话、同一间隔的所有客户端共用一个缓冲，每个间隔只发送一帧 performance_batch：
+#   {'interval': 毫秒, 'events': [[事件名, 数据], ...]}
+# 性能数据逐条保留（图表需要每个点），线程详情和分位数只保留最新一条，其他事件（如监控开始/出错）不缓冲。
+# 客户端还可以选择二进制传输格式（见 wire_format），房间名再加 .<格式>，同一组客户端的二进制帧只编码一次。
+import threading
+import time
+
+from common.wire_format import BINARY_EVENT, WIRE_FORMATS, encode_samples
+
+BATCH_EVENT = 'performance_batch'
+# 可选的刷新间隔（毫秒），客户端请求的间隔取最接近的一档
+REFRESH_INTERVALS = (0, 250, 500, 1000, 2000, 5000)
+# 合并发送的事件；其中 LATEST_ONLY_EVENTS 在一帧内只保留最新一条
+BATCHED_EVENTS = ('performance_data', 'thread_details', 'memory_leak_alert', 'performance_quantiles')
+LATEST_ONLY_EVENTS = ('thread_details', 'performance_quantiles')
+# 一帧最多缓冲的事件数，超出时丢弃最旧的
+MAX_FRAME_EVENTS = 5000
+
+
+def parse_refresh_interval(value):
+    """客户端请求的刷新间隔（毫秒）取最接近的一档，无效时抛出ValueError"""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"无效的刷新间隔: {value}")
+    if value < 0:
+        raise ValueError(f"无效的刷新间隔: {value}")
+    return min(REFRESH_INTERVALS, key=lambda interval: abs(interval - value))
+
+
+def batch_room(room, interval, wire_format='json'):
+    """刷新间隔和传输格式对应的实际房间名（立即发送的JSON客户端使用原房间）"""
+    name = f'{room}@{interval}' if interval else room
+    return name if wire_format == 'json' else f'{name}.{wire_format}'
+
+
+def _samples_payload(events):
+    """二进制格式的帧：性能数据编码为一个二进制块，其他事件仍为JSON"""
+    samples = [data for event, data in events if event == 'performance_data']
+    others = [item for item in events if item[0] != 'performance_data']
+    return others, encode_samples(samples) if samples else None
+
+
+class LiveFrames(object):
+    """按房间和刷新间隔合并实时事件
+
+    send(event, data, room) 负责实际发送（如 socketio.emit），join/leave/set_interval/set_format
+    返回需要加入/离开的实际房间名，由调用方执行 join_room/leave_room。
+    background为False时不启动后台发送线程，由调用方调用 flush()。
+    """
+
+    def __init__(self, send, tick=0.05, background=True):
+        self.send = send
+        self.tick = tick
+        self.background = background
+        self._lock = threading.Lock()
+        self._clients = {}  # sid -> {'mode': (刷新间隔毫秒, 传输格式), 'rooms': set()}
+        self._subscribers = {}  # room -> {(interval, wire_format): 客户端数}
+        self._frames = {}  # (room, interval, wire_format) -> {'due': 发送时间, 'events': [[event, data], ...]}
+        self._thread = None
+
+    def _client(self, sid):
+        return self._clients.setdefault(sid, {'mode': (0, 'json'), 'rooms': set()})
+
+    def _count(self, room, mode, delta):
+        counts = self._subscribers.setdefault(room, {})
+        counts[mode] = counts.get(mode, 0) + delta
+        if counts[mode] <= 0:
+            del counts[mode]
+            self._frames.pop((room,) + mode, None)
+        if not counts:
+            del self._subscribers[room]
+
+    def join(self, sid, room):
+        """客户端订阅房间，返回按其刷新间隔和传输格式应加入的实际房间"""
+        with self._lock:
+            client = self._client(sid)
+            if room not in client['rooms']:
+                client['rooms'].add(room)
+                self._count(room, client['mode'], 1)
+            return batch_room(room, *client['mode'])
+
+    def leave(self, sid, room):
+        """客户端取消订阅房间，返回应离开的实际房间（未订阅时返回None）"""
+        with self._lock:
+            client = self._clients.get(sid)
+            if client is None or room not in client['rooms']:
+                return None
+            client['rooms'].discard(room)
+            self._count(room, client['mode'], -1)
+            return batch_room(room, *client['mode'])
+
+    def disconnect(self, sid):
+        with self._lock:
+            client = self._clients.pop(sid, None)
+            for room in client['rooms'] if client else ():
+                self._count(room, client['mode'], -1)
+
+    def members(self, room):
+        """订阅了房间的客户端sid列表"""
+        with self._lock:
+            return [sid for sid, client in self._clients.items() if room in client['rooms']]
+
+    def _set_mode(self, sid, interval=None, wire_format=None):
+        moves = []
+        with self._lock:
+            client = self._client(sid)
+            old = client['mode']
+            mode = (old[0] if interval is None else interval, old[1] if wire_format is None else wire_format)
+            client['mode'] = mode
+            if old == mode:
+                return moves
+            for room in client['rooms']:
+                self._count(room, old, -1)
+                self._count(room, mode, 1)
+                moves.append((batch_room(room, *old), batch_room(room, *mode)))
+        if mode[0] and self.background:
+            self.start()
+        return moves
+
+    def set_interval(self, sid, interval):
+        """修改客户端的刷新间隔（毫秒，需为 REFRESH_INTERVALS 之一），返回 [(离开的房间, 加入的房间), ...]"""
+        if interval not in REFRESH_INTERVALS:
+            raise ValueError(f"不支持的刷新间隔: {interval}")
+        return self._set_mode(sid, interval=interval)
+
+    def set_format(self, sid, wire_format):
+        """修改客户端的传输格式（WIRE_FORMATS 之一），返回 [(离开的房间, 加入的房间), ...]"""
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"不支持的传输格式: {wire_format}")
+        return self._set_mode(sid, wire_format=wire_format)
+
+    def interval(self, sid):
+        with self._lock:
+            client = self._clients.get(sid)
+            return client['mode'][0] if client else 0
+
+    def wire_format(self, sid):
+        with self._lock:
+            client = self._clients.get(sid)
+            return client['mode'][1] if client else 'json'
+
+    def publish(self, room, event, data):
+        """发布一个事件：立即发给实时客户端，缓冲到各刷新间隔的下一帧（不合并的事件立即发给所有客户端）"""
+        self.send(event, data, room)
+        targets = []
+        with self._lock:
+            now = time.monotonic()
+            for interval, wire_format in self._subscribers.get(room, ()):
+                if not interval and wire_format == 'json':
+                    continue  # 已发送到原房间
+                target = batch_room(room, interval, wire_format)
+                if event not in BATCHED_EVENTS:
+                    targets.append((event, data, target))
+                elif interval:
+                    self._buffer((room, interval, wire_format), event, data, now)
+                elif event == 'performance_data':
+                    targets.append((BINARY_EVENT, None, target))
+                else:
+                    targets.append((event, data, target))
+        binary = None
+        for name, payload, target in targets:
+            if name == BINARY_EVENT:
+                binary = binary or encode_samples([data])
+                payload = binary
+            self.send(name, payload, target)
+
+    def _buffer(self, key, event, data, now):
+        frame = self._frames.get(key)
+        if frame is None:
+            frame = self._frames[key] = {'due': now + key[1] / 1000.0, 'events': []}
+        events = frame['events']
+        if event in LATEST_ONLY_EVENTS:
+            events[:] = [item for item in events if item[0] != event]
+        events.append([event, data])
+        if len(events) > MAX_FRAME_EVENTS:
+            del events[0]
+
+    def flush(self, now=None, force=False):
+        """发送已到期的帧，返回发送的帧数"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            due = [(key, frame) for key, frame in self._frames.items() if force or frame['due'] <= now]
+            for key, _ in due:
+                del self._frames[key]
+        for (room, interval, wire_format), frame in due:
+            payload = {'interval': interval, 'events': frame['events']}
+            if wire_format != 'json':
+                payload['events'], payload['samples'] = _samples_payload(frame['events'])
+            self.send(BATCH_EVENT, payload, batch_room(room, interval, wire_format))
+        return len(due)
+
+    def start(self):
+        """启动后台发送线程（第一个客户端选择刷新间隔时）"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='live-frames', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"⚠️ 发送合并帧失败: {e}")
+            time.sleep(self.tick)
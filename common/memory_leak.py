@@ -0,0 +1,858 @@
+# -*- coding: utf-8 -*-
+# 内存泄漏检测核心（iOS/Android通用）
+# 只依赖标准库，供两个平台的Web服务共享，导入时不会加载任何设备通信模块
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from itertools import islice
+
+from common.background_writer import BackgroundWriter
+from common.leak_event_index import DB_FILE_NAME, LeakEventIndex
+from common.segment_log import SegmentedJsonLog
+
+
+# 滑动窗口线性回归（增量维护，供趋势分析使用）
+class SlidingLinearRegression:
+    """对最近 max_samples 个 (timestamp, value) 样本做最小二乘回归
+
+    维护 Σt、Σy、Σt²、Σty 的滑动和，以及单调队列维护窗口内最大/最小值，
+    每次追加/淘汰样本都是均摊O(1)。时间戳以窗口内首个样本为参考点，避免大数相减损失精度。
+    """
+
+    # 每淘汰这么多样本后从头重算一次滑动和，消除浮点累积误差
+    RECOMPUTE_INTERVAL = 1024
+
+    def __init__(self, max_samples):
+        self.max_samples = max(2, int(max_samples))
+        self.samples = deque()   # (timestamp, value)
+        self._max_queue = deque()  # (seq, value)，值单调递减
+        self._min_queue = deque()  # (seq, value)，值单调递增
+        self.reset()
+
+    def reset(self):
+        """清空窗口"""
+        self.samples.clear()
+        self._max_queue.clear()
+        self._min_queue.clear()
+        self._next_seq = 0    # 下一个样本的序号
+        self._first_seq = 0   # 窗口内首个样本的序号
+        self._t_ref = None
+        self._pops_since_recompute = 0
+        self._sum_t = self._sum_y = self._sum_tt = self._sum_ty = 0.0
+
+    def __len__(self):
+        return len(self.samples)
+
+    def push(self, timestamp, value):
+        """追加样本，超出 max_samples 时淘汰最旧样本"""
+        if self._t_ref is None:
+            self._t_ref = timestamp
+        t = timestamp - self._t_ref
+        self.samples.append((timestamp, value))
+        self._sum_t += t
+        self._sum_y += value
+        self._sum_tt += t * t
+        self._sum_ty += t * value
+
+        seq = self._next_seq
+        self._next_seq += 1
+        while self._max_queue and self._max_queue[-1][1] <= value:
+            self._max_queue.pop()
+        self._max_queue.append((seq, value))
+        while self._min_queue and self._min_queue[-1][1] >= value:
+            self._min_queue.pop()
+        self._min_queue.append((seq, value))
+
+        while len(self.samples) > self.max_samples:
+            self.popleft()
+
+    def popleft(self):
+        """淘汰最旧样本"""
+        timestamp, value = self.samples.popleft()
+        t = timestamp - self._t_ref
+        self._sum_t -= t
+        self._sum_y -= value
+        self._sum_tt -= t * t
+        self._sum_ty -= t * value
+
+        self._first_seq += 1
+        if self._max_queue[0][0] < self._first_seq:
+            self._max_queue.popleft()
+        if self._min_queue[0][0] < self._first_seq:
+            self._min_queue.popleft()
+
+        self._pops_since_recompute += 1
+        if not self.samples:
+            self.reset()
+        elif self._pops_since_recompute >= self.RECOMPUTE_INTERVAL:
+            self._recompute()
+
+    def evict_before(self, cutoff):
+        """淘汰时间戳早于 cutoff 的样本（与时间窗口保持一致）"""
+        while self.samples and self.samples[0][0] < cutoff:
+            self.popleft()
+
+    def resize(self, max_samples):
+        """修改窗口长度（缩小时立即淘汰多余样本）"""
+        self.max_samples = max(2, int(max_samples))
+        while len(self.samples) > self.max_samples:
+            self.popleft()
+
+    def _recompute(self):
+        """以当前首个样本为参考点重新计算滑动和"""
+        self._t_ref = self.samples[0][0]
+        self._sum_t = self._sum_y = self._sum_tt = self._sum_ty = 0.0
+        for timestamp, value in self.samples:
+            t = timestamp - self._t_ref
+            self._sum_t += t
+            self._sum_y += value
+            self._sum_tt += t * t
+            self._sum_ty += t * value
+        self._pops_since_recompute = 0
+
+    def slope(self):
+        """回归斜率（value单位/秒），样本不足或时间跨度为0时返回0"""
+        n = len(self.samples)
+        if n < 2:
+            return 0.0
+        denominator = n * self._sum_tt - self._sum_t * self._sum_t
+        if denominator <= 0:
+            return 0.0
+        return (n * self._sum_ty - self._sum_t * self._sum_y) / denominator
+
+    def intercept(self):
+        """回归直线在窗口首个样本时刻的值（与slope一起描述拟合直线），无样本时返回None"""
+        n = len(self.samples)
+        if n == 0:
+            return None
+        return self._sum_y / n + self.slope() * (self.samples[0][0] - self._t_ref - self._sum_t / n)
+
+    def time_span(self):
+        """窗口内首尾样本的时间跨度（秒）"""
+        if len(self.samples) < 2:
+            return 0.0
+        return self.samples[-1][0] - self.samples[0][0]
+
+    def max(self):
+        return self._max_queue[0][1] if self._max_queue else None
+
+    def min(self):
+        return self._min_queue[0][1] if self._min_queue else None
+
+
+# 在线变点检测（双边CUSUM，每个样本O(1)，供检测内存水位的持续抬升）
+class ChangePointDetector:
+    """基于CUSUM的内存水位变点检测
+
+    以预热阶段样本的均值/标准差作为参考水位，累积标准化偏差：
+        S⁺ = max(0, S⁺ + (x - μ)/σ - k)，S⁻ = max(0, S⁻ + (μ - x)/σ - k)
+    S⁺ 从0开始上升的时刻即变点的起始时间估计。为了不把GC锯齿误判为水位变化，
+    除了 S⁺ 超过 h，还要求内存连续 min_duration 秒都比参考水位高出 min_shift MB（中间回落即重新计时）。
+    确认变点后以新水位重新作为参考，继续检测下一次变化；状态大小固定，不保存历史样本。
+    """
+
+    def __init__(self, k=0.5, h=8.0, min_shift=10.0, min_duration=120.0, warmup=60,
+                 sigma_floor=1.0, adapt_rate=0.01):
+        self.k = k                        # 允许偏差（σ单位），小于此的波动不累积
+        self.h = h                        # 报警阈值（σ单位）
+        self.min_shift = min_shift        # 最小水位变化（MB）
+        self.min_duration = min_duration  # 水位变化需持续的时间（秒），与 no_drop_threshold 一致
+        self.warmup = warmup              # 估计参考水位所需样本数
+        self.sigma_floor = sigma_floor    # σ下限（MB），避免内存几乎不变时过于敏感
+        self.adapt_rate = adapt_rate      # 无变化时参考水位的缓慢跟随速率
+        self.reset()
+
+    def reset(self):
+        """清空状态，重新预热"""
+        self.mean = None
+        self.sigma = None
+        self._warmup_count = 0
+        self._warmup_mean = 0.0
+        self._warmup_m2 = 0.0
+        self._pos = self._neg = None   # 两个方向各自的累积状态
+        self.last_change = None        # 最近一次确认的变点
+
+    @staticmethod
+    def _new_side():
+        # sum: 累积和，start: 本轮累积开始时间，level_sum/level_count: 累积期间样本均值，
+        # shifted_since: 内存连续偏离参考水位 min_shift 以上的起始时间
+        return {'sum': 0.0, 'start': None, 'level_sum': 0.0, 'level_count': 0, 'shifted_since': None}
+
+    def update(self, timestamp, value):
+        """加入一个样本，确认变点时返回变点信息，否则返回None"""
+        if self.mean is None:
+            # Welford在线估计参考水位和波动
+            self._warmup_count += 1
+            delta = value - self._warmup_mean
+            self._warmup_mean += delta / self._warmup_count
+            self._warmup_m2 += delta * (value - self._warmup_mean)
+            if self._warmup_count >= self.warmup:
+                variance = self._warmup_m2 / max(1, self._warmup_count - 1)
+                self._set_reference(self._warmup_mean, variance ** 0.5)
+            return None
+
+        deviation = value - self.mean
+        change = (self._accumulate(self._pos, deviation, timestamp, value, 'up') or
+                  self._accumulate(self._neg, -deviation, timestamp, value, 'down'))
+        if change:
+            return change
+
+        if self._pos['sum'] == 0 and self._neg['sum'] == 0:
+            # 处于稳定状态时参考水位缓慢跟随，σ同步更新
+            self.mean += self.adapt_rate * deviation
+            variance = (1 - self.adapt_rate) * (self.sigma ** 2 + self.adapt_rate * deviation * deviation)
+            self.sigma = max(variance ** 0.5, self.sigma_floor)
+        return None
+
+    def _set_reference(self, mean, sigma):
+        self.mean = mean
+        self.sigma = max(sigma, self.sigma_floor)
+        self._pos = self._new_side()
+        self._neg = self._new_side()
+
+    def _accumulate(self, side, deviation, timestamp, value, direction):
+        previous = side['sum']
+        side['sum'] = max(0.0, previous + deviation / self.sigma - self.k)
+        if side['sum'] == 0:
+            side.update(self._new_side())
+            return None
+        if previous == 0:
+            side['start'] = timestamp
+        side['level_sum'] += value
+        side['level_count'] += 1
+
+        if deviation < self.min_shift:
+            side['shifted_since'] = None
+            return None
+        if side['shifted_since'] is None:
+            side['shifted_since'] = timestamp
+        if side['sum'] <= self.h or timestamp - side['shifted_since'] < self.min_duration:
+            return None
+
+        level = side['level_sum'] / side['level_count']
+        change = {
+            'direction': direction,
+            'start_time': side['start'],
+            'detected_time': timestamp,
+            'baseline': round(self.mean, 2),
+            'level': round(level, 2),
+            'shift': round(level - self.mean, 2),
+            'duration': round(timestamp - side['start'], 1),
+        }
+        self.last_change = change
+        self._set_reference(level, self.sigma)
+        return change
+
+
+# 谷值包络追踪（每次GC回收后的内存低点，供"每次回收后残留增长"分析使用）
+class TroughEnvelope:
+    """增量识别内存序列的局部最小值（谷值），并对最近 window 个谷值做回归
+
+    使用滞回阈值区分GC锯齿：下降阶段记录最低点，内存回升超过 hysteresis MB 时确认一个谷值；
+    上升阶段记录最高点，回落超过 hysteresis MB 时重新进入下降阶段。
+    谷值按GC周期序号和时间戳分别回归，得到每周期残留增长（MB/次）和残留增长速率（MB/分钟）。
+    只保存最近 window 个谷值，内存占用固定，适合长时间稳定性测试。
+    """
+
+    def __init__(self, hysteresis=20, window=8):
+        self.hysteresis = hysteresis
+        self._by_cycle = SlidingLinearRegression(window)  # (周期序号, 谷值)
+        self._by_time = SlidingLinearRegression(window)   # (时间戳, 谷值)
+        self.reset()
+
+    def reset(self):
+        """清空状态"""
+        self._by_cycle.reset()
+        self._by_time.reset()
+        self._falling = True
+        self._extreme_time = None
+        self._extreme_value = None
+        self.cycles = 0          # 已确认的谷值总数
+        self.last_trough = None  # (timestamp, memory_mb)
+
+    def __len__(self):
+        return len(self._by_cycle)
+
+    def update(self, timestamp, value):
+        """加入一个样本，确认新谷值时返回 (timestamp, memory_mb)，否则返回None"""
+        if self._extreme_value is None:
+            self._extreme_time, self._extreme_value = timestamp, value
+            return None
+
+        if self._falling:
+            if value <= self._extreme_value:
+                self._extreme_time, self._extreme_value = timestamp, value
+            elif value - self._extreme_value >= self.hysteresis:
+                trough = (self._extreme_time, self._extreme_value)
+                self._by_cycle.push(self.cycles, trough[1])
+                self._by_time.push(trough[0], trough[1])
+                self.cycles += 1
+                self.last_trough = trough
+                self._falling = False
+                self._extreme_time, self._extreme_value = timestamp, value
+                return trough
+        else:
+            if value >= self._extreme_value:
+                self._extreme_time, self._extreme_value = timestamp, value
+            elif self._extreme_value - value >= self.hysteresis:
+                self._falling = True
+                self._extreme_time, self._extreme_value = timestamp, value
+        return None
+
+    def retained_per_cycle(self):
+        """每个GC周期的残留增长（MB/次）"""
+        return self._by_cycle.slope()
+
+    def growth_rate(self):
+        """谷值的增长速率（MB/分钟）"""
+        return self._by_time.slope() * 60
+
+    def retained_growth(self):
+        """窗口内首尾谷值之间的拟合增长（MB）"""
+        return self.retained_per_cycle() * max(0, len(self) - 1)
+
+    def time_span(self):
+        """窗口内首尾谷值的时间跨度（秒）"""
+        return self._by_time.time_span()
+
+    def to_dict(self):
+        return {
+            'retained_per_cycle': round(self.retained_per_cycle(), 2),
+            'retained_growth': round(self.retained_growth(), 2),
+            'growth_rate': round(self.growth_rate(), 2),
+            'trough_count': len(self),
+            'gc_cycles': self.cycles,
+            'last_trough': self.last_trough[1] if self.last_trough else None,
+        }
+
+
+# 内存泄漏检测算法
+class MemoryLeakDetector:
+    """内存泄漏检测器"""
+    
+    def __init__(self, max_samples=None):
+        # 时间窗口内的样本，元素为 (timestamp, memory_mb)，按时间顺序追加、从队首淘汰；
+        # max_samples 限制样本数上限，保证长时间监控时内存占用固定
+        self.memory_history = deque(maxlen=max_samples)
+        self.leak_threshold = 50  # MB
+        self.time_window = 300    # 5分钟
+        self.min_samples = 10
+        self.growth_rate_threshold = 0.5  # MB/分钟
+        # 趋势回归窗口（样本数），可独立于min_samples调整
+        self._trend = SlidingLinearRegression(10)
+        self.last_alert_time = 0
+        self.alert_cooldown = 60  # 1分钟冷却
+        
+        # 新增：基线追踪和回收检测
+        self.baseline_memory = None  # 初始基线内存
+        self.peak_memory = 0  # 峰值内存
+        self.last_drop_time = None  # 上次内存下降的时间
+        self.no_drop_threshold = 120  # 120秒内没有内存下降才认为可能泄漏
+        self._drop_threshold = 20  # 内存下降超过20MB认为是回收
+        self.verbose = True  # 打印回收和水位抬升日志（离线回放时关闭）
+        
+        # 新增：CUSUM变点检测，与趋势分析并行运行，捕捉内存水位的持续抬升
+        self.change_detector = ChangePointDetector()
+        self.change_point_enabled = True  # 关闭后只使用趋势分析（与离线回放 leak_replay 的结果一致）
+        self.pending_change_point = None  # 最近一次尚未提醒的水位抬升
+        
+        # 新增：谷值包络模式（detection_mode = 'trough'），按每次GC回收后的内存低点判断泄漏
+        self.detection_mode = 'trend'
+        self.trough_envelope = TroughEnvelope(hysteresis=self._drop_threshold)
+        self.min_troughs = 4  # 至少经历这么多次回收才判断
+        self.trough_growth_threshold = 1.0  # 每次回收后残留增长阈值（MB/次）
+        self.retained_threshold = 20  # 最近几次回收累计残留增长阈值（MB）
+        self._new_trough = False
+        
+    @property
+    def drop_threshold(self):
+        """内存下降超过该值（MB）认为是回收，同时是谷值包络确认谷值的滞回阈值"""
+        return self._drop_threshold
+
+    @drop_threshold.setter
+    def drop_threshold(self, value):
+        self._drop_threshold = value
+        self.trough_envelope.hysteresis = value
+
+    @property
+    def regression_window(self):
+        """趋势回归使用的最近样本数"""
+        return self._trend.max_samples
+
+    @regression_window.setter
+    def regression_window(self, value):
+        self._trend.resize(value)
+        # 窗口变大时用时间窗口内的历史样本补齐
+        self._trend.reset()
+        history = self.memory_history
+        for timestamp, memory_mb in islice(history, max(0, len(history) - self._trend.max_samples), None):
+            self._trend.push(timestamp, memory_mb)
+
+    def add_memory_sample(self, memory_mb, timestamp):
+        """添加内存样本数据"""
+        # 设置初始基线
+        if self.baseline_memory is None:
+            self.baseline_memory = memory_mb
+        
+        history = self.memory_history
+        if not history:
+            # 历史被清空（如重置检测器）时同步清空回归窗口和变点检测状态
+            self._trend.reset()
+            self.change_detector.reset()
+            self.pending_change_point = None
+            self.trough_envelope.reset()
+        
+        # 检测内存下降（回收）
+        if history:
+            last_memory = history[-1][1]
+            # 如果内存下降超过阈值，认为发生了回收
+            if last_memory - memory_mb > self.drop_threshold:
+                self.last_drop_time = timestamp
+                if self.verbose:
+                    print(f"🔄 检测到内存回收: {last_memory:.1f}MB -> {memory_mb:.1f}MB (下降{last_memory - memory_mb:.1f}MB)")
+        
+        # 更新峰值
+        if memory_mb > self.peak_memory:
+            self.peak_memory = memory_mb
+        
+        history.append((timestamp, memory_mb))
+        self._trend.push(timestamp, memory_mb)
+        
+        change = self.change_detector.update(timestamp, memory_mb) if self.change_point_enabled else None
+        if change:
+            if change['direction'] == 'up':
+                self.pending_change_point = change
+                if self.verbose:
+                    print(f"📈 检测到内存水位抬升: {change['baseline']:.1f}MB -> {change['level']:.1f}MB "
+                          f"(起始于 {datetime.fromtimestamp(change['start_time']).strftime('%H:%M:%S')})")
+            else:
+                # 水位回落说明之前的抬升已被回收
+                self.pending_change_point = None
+        
+        if self.trough_envelope.update(timestamp, memory_mb):
+            self._new_trough = True
+        
+        # 清理超出时间窗口的旧数据（样本按时间递增，只需从队首弹出，均摊O(1)）
+        while timestamp - history[0][0] > self.time_window:
+            history.popleft()
+        self._trend.evict_before(history[0][0])
+        
+    def detect_memory_leak(self, now=None):
+        """检测内存泄漏 - 改进版：考虑实际使用场景
+
+        now为判断冷却和回收使用的当前时间（默认time.time()），离线回放时传入样本时间。
+        """
+        if len(self.memory_history) < self.min_samples:
+            return None
+        
+        current_time = time.time() if now is None else now
+        current_memory = self.memory_history[-1][1]
+        
+        change_point = self.pending_change_point
+        if change_point and current_time - change_point['detected_time'] > self.time_window:
+            # 超出时间窗口的变点不再提醒
+            change_point = self.pending_change_point = None
+        
+        if self.detection_mode == 'trough':
+            # 谷值包络模式：GC回收本身就是判断依据，不使用"最近有回收不报警"的规则
+            return self._detect_trough_leak(current_time, change_point)
+        
+        # 关键改进1：检查是否有内存回收
+        # 如果最近有内存下降（回收），说明不是泄漏，是正常的加载-回收循环
+        if self.last_drop_time and (current_time - self.last_drop_time < self.no_drop_threshold):
+            # 最近有回收，不报警
+            return None
+        
+        # 关键改进2：只有在长时间持续增长且没有回收时才报警
+        leak_info = self._analyze_memory_trend()
+        
+        if not leak_info or not leak_info['is_leak']:
+            if change_point and self.change_point_enabled:
+                return self._change_point_alert(change_point, current_time)
+            return None
+        
+        # 关键改进3：检查是否超出合理范围
+        # 如果当前内存比基线高太多，且长时间没有回收，才认为是泄漏
+        memory_increase_from_baseline = current_memory - self.baseline_memory
+        
+        # 判断条件：
+        # 1. 内存持续增长
+        # 2. 超过基线50MB以上
+        # 3. 120秒内没有发生内存回收
+        if (leak_info['is_leak'] and 
+            memory_increase_from_baseline > self.leak_threshold and
+            (self.last_drop_time is None or current_time - self.last_drop_time > self.no_drop_threshold)):
+            
+            # 检查是否需要发送提醒（冷却时间）
+            if current_time - self.last_alert_time > self.alert_cooldown:
+                self.last_alert_time = current_time
+                leak_info['baseline_memory'] = self.baseline_memory
+                leak_info['no_recycle_duration'] = (
+                    current_time - self.last_drop_time if self.last_drop_time 
+                    else current_time - self.memory_history[0][0]
+                )
+                leak_info['detection_method'] = 'trend'
+                leak_info['change_point'] = change_point
+                if change_point:
+                    self.pending_change_point = None
+                    leak_info['recommendation'].insert(0, self._describe_change_point(change_point))
+                return leak_info
+            
+        return None
+    
+    def _detect_trough_leak(self, current_time, change_point):
+        """谷值包络模式：每次确认新谷值时判断回收后的残留内存是否持续增长"""
+        if not self._new_trough:
+            return None
+        self._new_trough = False
+        
+        envelope = self.trough_envelope
+        if len(envelope) < self.min_troughs:
+            return None
+        retained_per_cycle = envelope.retained_per_cycle()
+        retained_growth = envelope.retained_growth()
+        if retained_per_cycle <= self.trough_growth_threshold or retained_growth <= self.retained_threshold:
+            return None
+        if current_time - self.last_alert_time <= self.alert_cooldown:
+            return None
+        self.last_alert_time = current_time
+        
+        growth_rate = envelope.growth_rate()
+        recommendations = self._get_recommendation(growth_rate, retained_growth)
+        recommendations[0] = (f"⚠️ 关键问题：每次回收后仍残留约 {retained_per_cycle:.1f}MB，"
+                              f"最近 {len(envelope)} 次回收的内存低点累计抬升 {retained_growth:.1f}MB")
+        return {
+            'is_leak': True,
+            'detection_method': 'trough',
+            'change_point': change_point,
+            'retained_growth_per_cycle': round(retained_per_cycle, 2),
+            'trough_envelope': envelope.to_dict(),
+            'current_memory': self.memory_history[-1][1],
+            'growth_rate': round(growth_rate, 2),
+            'memory_increase': round(retained_growth, 2),
+            'time_span': round(envelope.time_span() / 60, 1),
+            'samples_count': len(envelope),
+            'severity': self._calculate_severity(growth_rate, retained_growth),
+            'recommendation': recommendations,
+            'baseline_memory': self.baseline_memory,
+            'no_recycle_duration': current_time - envelope.last_trough[0],
+        }
+    
+    def _change_point_alert(self, change_point, current_time):
+        """由CUSUM变点单独触发的提醒，字段与趋势提醒保持一致"""
+        if current_time - self.last_alert_time <= self.alert_cooldown:
+            return None
+        self.last_alert_time = current_time
+        self.pending_change_point = None
+        
+        memory_increase = change_point['shift']
+        duration = max(change_point['duration'], 1.0)
+        growth_rate = memory_increase / duration * 60
+        recommendations = self._get_recommendation(growth_rate, memory_increase)
+        recommendations[0] = self._describe_change_point(change_point)
+        return {
+            'is_leak': True,
+            'detection_method': 'change_point',
+            'change_point': change_point,
+            'current_memory': self.memory_history[-1][1],
+            'growth_rate': round(growth_rate, 2),
+            'memory_increase': round(memory_increase, 2),
+            'time_span': round(duration / 60, 1),
+            'samples_count': len(self.memory_history),
+            'severity': self._calculate_severity(growth_rate, memory_increase),
+            'recommendation': recommendations,
+            'baseline_memory': self.baseline_memory,
+            'no_recycle_duration': (
+                current_time - self.last_drop_time if self.last_drop_time
+                else current_time - self.memory_history[0][0]
+            ),
+        }
+    
+    @staticmethod
+    def _describe_change_point(change_point):
+        start = datetime.fromtimestamp(change_point['start_time']).strftime('%H:%M:%S')
+        return (f"⚠️ 内存水位从 {start} 起持续抬升：{change_point['baseline']:.1f}MB -> "
+                f"{change_point['level']:.1f}MB（+{change_point['shift']:.1f}MB），期间没有回落")
+        
+    def _analyze_memory_trend(self):
+        """分析内存使用趋势"""
+        if len(self.memory_history) < self.min_samples:
+            return None
+            
+        # 基于真实时间戳的增量回归：斜率单位为MB/秒，样本间隔不均匀时依然准确
+        trend = self._trend
+        growth_rate_per_minute = trend.slope() * 60
+        time_span_minutes = trend.time_span() / 60
+            
+        # 计算当前内存使用量
+        current_memory = self.memory_history[-1][1]
+        max_memory = trend.max()
+        min_memory = trend.min()
+        memory_increase = max_memory - min_memory
+        
+        # 判断是否存在内存泄漏
+        is_leak = (
+            growth_rate_per_minute > self.growth_rate_threshold and
+            memory_increase > self.leak_threshold and
+            current_memory > min_memory + self.leak_threshold
+        )
+        
+        return {
+            'is_leak': is_leak,
+            'current_memory': current_memory,
+            'growth_rate': round(growth_rate_per_minute, 2),
+            'memory_increase': round(memory_increase, 2),
+            'time_span': round(time_span_minutes, 1),
+            'samples_count': len(trend),
+            'severity': self._calculate_severity(growth_rate_per_minute, memory_increase),
+            'recommendation': self._get_recommendation(growth_rate_per_minute, memory_increase)
+        }
+        
+    def _calculate_severity(self, growth_rate, memory_increase):
+        """计算泄漏严重程度"""
+        if growth_rate > 2.0 or memory_increase > 200:
+            return 'critical'  # 严重
+        elif growth_rate > 1.0 or memory_increase > 100:
+            return 'warning'   # 警告
+        else:
+            return 'minor'     # 轻微
+            
+    def _get_recommendation(self, growth_rate, memory_increase):
+        """获取优化建议 - 改进版"""
+        recommendations = []
+        
+        # 强调：长时间没有回收才是问题
+        recommendations.append("⚠️ 关键问题：长时间内存持续增长且没有回收")
+        
+        if growth_rate > 2.0:
+            recommendations.append("内存增长率过快，建议检查是否有循环引用或监听器未移除")
+        elif growth_rate > 1.0:
+            recommendations.append("内存持续增长，建议检查对象生命周期管理")
+            
+        if memory_increase > 200:
+            recommendations.append("内存增长超过200MB，建议检查：")
+            recommendations.append("  • 大对象（图片、视频）是否正确释放")
+            recommendations.append("  • 缓存策略是否合理")
+        elif memory_increase > 100:
+            recommendations.append("建议检查资源释放逻辑（如页面切换、播放器销毁）")
+        
+        # 提示正常场景
+        recommendations.append("💡 注意：进入播放器等场景的内存增长是正常的")
+        recommendations.append("💡 问题关键：退出后内存是否能回收")
+            
+        return recommendations
+
+
+# 内存泄漏事件日志记录
+class MemoryLeakLogger:
+    """内存泄漏事件日志记录器
+
+    日志按大小/时长滚动，旧日志压缩保存并建立时间索引（见 common/segment_log.py），
+    按时间范围和应用查询时只读取相关的日志段。
+    写盘由后台线程批量完成（async_write=False 时同步写入），采集线程不会被慢磁盘阻塞。
+    事件同时写入同目录下的SQLite索引（iOS/Android共用，按platform区分），供服务端过滤分页查询。
+    """
+    
+    def __init__(self, log_file_path=None, max_bytes=5 * 1024 * 1024, max_age=24 * 3600, max_segments=100,
+                 async_write=True, platform='ios', use_index=True):
+        self.log_file_path = log_file_path or os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
+            'logs', 
+            'memory_leak_events.log'
+        )
+        self.ensure_log_directory()
+        self._evicted_ranges = []  # 写入过程中被删除的旧段时间范围
+        self._evicted_lock = threading.Lock()
+        self.store = SegmentedJsonLog(self.log_file_path, max_bytes=max_bytes, max_age=max_age,
+                                      max_segments=max_segments, on_evict=self._on_segments_evicted)
+        self.platform = platform
+        self.index = None
+        if use_index:
+            try:
+                self.index = LeakEventIndex(os.path.join(os.path.dirname(self.log_file_path), DB_FILE_NAME))
+                if self.index.count(platform) == 0:
+                    # 已有日志但索引为空（首次启用或索引被删除），后台补建索引
+                    threading.Thread(target=self._backfill_index, daemon=True).start()
+            except Exception as e:
+                print(f"⚠️ 内存泄漏事件索引不可用，查询将直接扫描日志: {e}")
+                self.index = None
+        self.writer = None
+        if async_write:
+            self.writer = BackgroundWriter(self._write_events,
+                                           name=os.path.basename(self.log_file_path), max_queue=10000)
+        
+    def _on_segments_evicted(self, ranges):
+        """滚动时超出 max_segments 的旧段被删除，同步删除其索引，索引查询与日志保持一致
+
+        同一批写入中的事件在写入日志之后才加入索引，记下时间范围，加入索引后再删除一次。
+        """
+        with self._evicted_lock:
+            self._evicted_ranges.extend(ranges)
+        self._delete_index_ranges(ranges)
+    
+    def _delete_index_ranges(self, ranges):
+        if self.index is not None and ranges:
+            try:
+                self.index.delete(self.platform, ranges)
+            except Exception as e:
+                print(f"⚠️ 删除过期日志段的索引失败: {e}")
+        
+    def ensure_log_directory(self):
+        """确保日志目录存在"""
+        log_dir = os.path.dirname(self.log_file_path)
+        if not os.path.exists(log_dir):
+            os.makedirs(log_dir, exist_ok=True)
+    
+    def log_leak_event(self, leak_info, app_info=None):
+        """记录内存泄漏事件"""
+        try:
+            now = time.time()
+            timestamp = datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S')
+            
+            log_entry = {
+                'timestamp': timestamp,
+                'ts': now,
+                'event_type': 'memory_leak_detected',
+                'severity': leak_info['severity'],
+                'current_memory': leak_info['current_memory'],
+                'growth_rate': leak_info['growth_rate'],
+                'memory_increase': leak_info['memory_increase'],
+                'time_span': leak_info['time_span'],
+                'samples_count': leak_info['samples_count'],
+                'recommendations': leak_info['recommendation'],
+                'detection_method': leak_info.get('detection_method', 'trend'),
+                'change_point': leak_info.get('change_point'),
+                'retained_growth_per_cycle': leak_info.get('retained_growth_per_cycle'),
+                'app_info': app_info or {}
+            }
+            
+            # 写入日志文件（超过大小/时长时自动滚动压缩），异步模式下只放入队列
+            if self.writer is None:
+                self._write_events([log_entry])
+            elif not self.writer.put(log_entry):
+                print(f"⚠️ 内存泄漏事件写入队列已满，丢弃本条事件")
+                return
+            
+            print(f"📝 内存泄漏事件已记录到日志: {self.log_file_path}")
+            
+        except Exception as e:
+            print(f"❌ 记录内存泄漏事件失败: {e}")
+    
+    def get_recent_leak_events(self, limit=50):
+        """获取最近的内存泄漏事件（按时间顺序，最多limit条）"""
+        try:
+            if limit <= 0:
+                return []
+            
+            self.flush()
+            # 从当前段末尾向前读取，不够时再依次读取更早的压缩段，日志再大也只读需要的部分
+            events = []
+            for event in self.store.iter_recent():
+                events.append(event)
+                if len(events) >= limit:
+                    break
+            
+            events.reverse()
+            return events
+            
+        except Exception as e:
+            print(f"❌ 读取内存泄漏事件日志失败: {e}")
+            return []
+    
+    def query_leak_events(self, start=None, end=None, app=None):
+        """按时间范围（时间戳，秒）和应用查询事件，按时间顺序返回，只读取相关的日志段"""
+        try:
+            self.flush()
+            return list(self.store.iter_events(start, end, app))
+        except Exception as e:
+            print(f"❌ 查询内存泄漏事件日志失败: {e}")
+            return []
+    
+    def search_leak_events(self, platform=None, app=None, severity=None, start=None, end=None, page=1,
+                           page_size=50, cursor=None):
+        """服务端过滤分页查询（平台/应用/严重程度/时间范围），按时间从新到旧
+
+        有SQLite索引时走索引；索引不可用时扫描本平台日志（只读取时间和应用相关的日志段）。
+        """
+        self.flush()
+        if self.index is not None:
+            return self.index.query(platform, app, severity, start, end, page, page_size, cursor)
+        
+        if platform and platform != self.platform:
+            events = []
+        else:
+            severities = [severity] if isinstance(severity, str) else severity
+            events = [event for event in self.store.iter_events(start, end, app)
+                      if not severities or event.get('severity') in severities]
+            events.reverse()
+        page_size = max(1, min(int(page_size), 500))
+        page = max(1, int(page))
+        offset = (page - 1) * page_size
+        return {
+            'events': events[offset:offset + page_size],
+            'total': len(events),
+            'page': page,
+            'page_size': page_size,
+            'has_more': offset + page_size < len(events),
+            'next_cursor': None,
+        }
+    
+    def _write_events(self, entries, fsync=False):
+        """写入日志文件和查询索引（异步模式下在后台写入线程中调用）"""
+        self.store.append_entries(entries, fsync)
+        if self.index is not None and entries:
+            try:
+                self.index.add_events(self.platform, entries)
+            except Exception as e:
+                print(f"⚠️ 写入内存泄漏事件索引失败: {e}")
+        with self._evicted_lock:
+            ranges, self._evicted_ranges = self._evicted_ranges, []
+        # 本批中随旧段一起被删除的事件
+        self._delete_index_ranges(ranges)
+    
+    def _backfill_index(self):
+        try:
+            batch, added = [], 0
+            for entry in self.store.iter_events():
+                batch.append(entry)
+                if len(batch) >= 1000:
+                    added += self.index.add_events(self.platform, batch)
+                    batch = []
+            added += self.index.add_events(self.platform, batch)
+            if added:
+                print(f"📇 已为 {added} 条历史内存泄漏事件建立索引")
+        except Exception as e:
+            print(f"⚠️ 补建内存泄漏事件索引失败: {e}")
+    
+    def clear_log(self, before=None):
+        """清空日志；指定before（时间戳）时只删除早于该时间的历史日志段"""
+        try:
+            self.flush()
+            removed = self.store.clear(before)
+            if self.index is not None:
+                # 只删除实际删除的日志段对应的索引，保留段和当前文件中的事件仍可查询
+                self.index.delete(self.platform, None if before is None else removed)
+            print(f"🗑️ 内存泄漏事件日志已清空")
+        except Exception as e:
+            print(f"❌ 清空内存泄漏事件日志失败: {e}")
+    
+    def flush(self, timeout=5.0):
+        """等待后台写入线程把已记录的事件写盘"""
+        if self.writer is not None:
+            return self.writer.flush(timeout)
+        return True
+    
+    def close(self):
+        """停止后台写入线程（写完剩余事件）"""
+        if self.writer is not None:
+            self.writer.close()
+    
+    def writer_stats(self):
+        """后台写入队列深度、已写入和丢弃的事件数"""
+        if self.writer is None:
+            return {'name': os.path.basename(self.log_file_path), 'async': False}
+        stats = self.writer.stats()
+        stats['async'] = True
+        return stats
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# 性能评分（iOS/Android共用，与页面原先的 calculatePerformanceScores/getGradeFromScore 规则一致）
+# CPU和内存按占阈值的百分比分档，FPS按占60帧的百分比分档，总分为三项的平均。
+# 评分在服务端随采样增量计算：每个样本只做几次比较，会话累计各项评分的平均值，结束时写入会话信息。
+import math
+
+# 评分阈值默认值（与页面上的告警阈值默认值一致）
+DEFAULT_THRESHOLDS = {'cpu': 80.0, 'memory': 200.0}
+FULL_FPS = 60.0
+SCORE_ITEMS = ('cpu', 'memory', 'fps')
+
+# (最低分数, 等级)，从高到低
+GRADES = ((90, 'A+'), (80, 'A'), (70, 'B'), (60, 'C'), (50, 'D'))
+
+
+def round_score(value):
+    """四舍五入（与JS的Math.round一致，.5向上）"""
+    return int(math.floor(value + 0.5))
+
+
+def grade_from_score(score):
+    for low, grade in GRADES:
+        if score >= low:
+            return grade
+    return 'F'
+
+
+def threshold_score(value, threshold):
+    """CPU/内存评分：占阈值50%以内100分，70%以内90分，85%以内75分，100%以内60分，超出后每1%扣0.5分"""
+    if value is None or not value > 0:
+        return 100.0
+    percent = value / threshold * 100
+    if percent <= 50:
+        return 100.0
+    if percent <= 70:
+        return 90.0
+    if percent <= 85:
+        return 75.0
+    if percent <= 100:
+        return 60.0
+    return max(0.0, 60 - (percent - 100) * 0.5)
+
+
+def fps_score(fps):
+    """FPS评分：达到60帧的90%为100分，75%为90分，50%为75分，33%为60分，再低按比例"""
+    if fps is None or not fps > 0:
+        return 100.0
+    percent = fps / FULL_FPS * 100
+    if percent >= 90:
+        return 100.0
+    if percent >= 75:
+        return 90.0
+    if percent >= 50:
+        return 75.0
+    if percent >= 33:
+        return 60.0
+    return max(0.0, percent * 1.8)
+
+
+def _item(score):
+    """显示四舍五入后的分数，等级按原始分数判定（与页面一致，59.75分为D）"""
+    return {'score': round_score(score), 'grade': grade_from_score(score)}
+
+
+def clean_thresholds(thresholds):
+    """合并默认阈值，忽略非正数和非数值"""
+    result = dict(DEFAULT_THRESHOLDS)
+    for name, value in (thresholds or {}).items():
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            continue
+        if name in result and value > 0:
+            result[name] = value
+    return result
+
+
+class PerformanceScorer(object):
+    """按采样流增量计算评分
+
+    current 为最新样本的评分（页面显示的实时评分），summary() 为会话累计的平均评分。
+    FPS为0（页面静止或不支持FPS）时沿用上一次的FPS，与页面统计一致。
+    """
+
+    def __init__(self, thresholds=None):
+        self.thresholds = clean_thresholds(thresholds)
+        self.samples = 0
+        self._fps = 0.0
+        self._totals = dict.fromkeys(SCORE_ITEMS + ('overall',), 0.0)
+        self.current = None
+
+    def add(self, cpu, memory, fps):
+        """加入一个样本（缺失值为None或NaN），返回该样本的评分"""
+        if fps is not None and fps > 0:
+            self._fps = fps
+        scores = {
+            'cpu': threshold_score(cpu, self.thresholds['cpu']),
+            'memory': threshold_score(memory, self.thresholds['memory']),
+            'fps': fps_score(self._fps),
+        }
+        current = {name: _item(score) for name, score in scores.items()}
+        overall = round_score(sum(current[name]['score'] for name in SCORE_ITEMS) / len(SCORE_ITEMS))
+        current['overall'] = {'score': overall, 'grade': grade_from_score(overall)}
+        for name, item in current.items():
+            self._totals[name] += item['score']
+        self.samples += 1
+        self.current = current
+        return current
+
+    def add_sample(self, values):
+        """加入一条 {指标: 数值} 数据"""
+        return self.add(*(_number(values.get(name)) for name in SCORE_ITEMS))
+
+    def summary(self):
+        """会话平均评分：thresholds, samples, cpu/memory/fps/overall 的 {score, grade}"""
+        result = {'thresholds': self.thresholds, 'samples': self.samples}
+        if self.samples:
+            result.update({name: _item(total / self.samples) for name, total in self._totals.items()})
+        return result
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+# 流式分位数草图（对数分桶，相对误差有界，只依赖标准库）
+# 数值x落入第 ceil(log_γ(x)) 个桶（γ=(1+α)/(1-α)），取桶的代表值时相对误差不超过α；
+# 每个样本只做一次对数运算和一次字典计数（O(1)），两个草图合并即桶计数相加，
+# 可以先按时间段/设备分别统计再合并。桶数超过上限时合并最小的几个桶（只影响最低分位数），内存固定。
+import math
+
+# 默认相对误差1%：0.01~100万的数值约需要930个桶
+DEFAULT_ACCURACY = 0.01
+MAX_BUCKETS = 2048
+# 绝对值小于此值的数计入零桶
+MIN_VALUE = 1e-9
+# 会话统计默认推送的分位数（百分位）
+DEFAULT_PERCENTILES = (50, 90, 99)
+# 服务端推送各指标分位数（performance_quantiles 事件）的间隔（秒）
+PUSH_INTERVAL = 5.0
+
+
+class QuantileSketch(object):
+    """单个指标的可合并分位数草图"""
+
+    def __init__(self, relative_accuracy=DEFAULT_ACCURACY, max_buckets=MAX_BUCKETS):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"相对误差需在(0, 1)之间: {relative_accuracy}")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self._positive = {}  # 桶号 -> 样本数
+        self._negative = {}  # 负数按绝对值分桶
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self):
+        return self.count
+
+    def _key(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key):
+        """桶 (γ^(k-1), γ^k] 的代表值，与桶内任意数的相对误差不超过α"""
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value):
+        """加入一个样本，NaN/无穷大忽略；返回是否计入"""
+        if math.isnan(value) or math.isinf(value):
+            return False
+        if value > MIN_VALUE:
+            store = self._positive
+            key = self._key(value)
+        elif value < -MIN_VALUE:
+            store = self._negative
+            key = self._key(-value)
+        else:
+            store = None
+            self.zero_count += 1
+        if store is not None:
+            if key in store:
+                store[key] += 1
+            else:
+                store[key] = 1
+                if len(store) > self.max_buckets:
+                    self._collapse(store)
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        return True
+
+    def _collapse(self, store):
+        """把绝对值最小的几个桶并入第 max_buckets 小的桶"""
+        keys = sorted(store)
+        extra = len(keys) - self.max_buckets
+        if extra <= 0:
+            return
+        target = keys[extra]
+        for key in keys[:extra]:
+            store[target] += store.pop(key)
+
+    def merge(self, other):
+        """合并另一个草图（相对误差须相同）"""
+        if not math.isclose(self.gamma, other.gamma):
+            raise ValueError(f"相对误差不同的草图不能合并: {self.relative_accuracy} != {other.relative_accuracy}")
+        for store, source in ((self._positive, other._positive), (self._negative, other._negative)):
+            for key, count in source.items():
+                store[key] = store.get(key, 0) + count
+            self._collapse(store)
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """分位数（q在[0, 1]之间），没有样本时返回None"""
+        if not 0 <= q <= 1:
+            raise ValueError(f"分位数需在[0, 1]之间: {q}")
+        if not self.count:
+            return None
+        # 两端直接取精确的最小/最大值
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self._negative, reverse=True):
+            seen += self._negative[key]
+            if seen > rank:
+                return self._clamp(-self._value(key))
+        seen += self.zero_count
+        if seen > rank:
+            return self._clamp(0.0)
+        for key in sorted(self._positive):
+            seen += self._positive[key]
+            if seen > rank:
+                return self._clamp(self._value(key))
+        return self.max
+
+    def _clamp(self, value):
+        return min(max(value, self.min), self.max)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def summary(self, percentiles=DEFAULT_PERCENTILES, digits=2):
+        """样本数、平均/最小/最大值和各百分位数（如p50/p90/p99）"""
+        if not self.count:
+            return {'count': 0}
+        result = {'count': self.count, 'mean': round(self.mean, digits),
+                  'min': round(self.min, digits), 'max': round(self.max, digits)}
+        for p in percentiles:
+            result[f'p{p:g}'] = round(self.quantile(p / 100.0), digits)
+        return result
+
+    def to_dict(self):
+        return {
+            'accuracy': self.relative_accuracy,
+            'count': self.count,
+            'sum': self.sum,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'zero': self.zero_count,
+            'positive': {str(k): v for k, v in self._positive.items()},
+            'negative': {str(k): v for k, v in self._negative.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data, max_buckets=MAX_BUCKETS):
+        sketch = cls(data.get('accuracy', DEFAULT_ACCURACY), max_buckets)
+        sketch._positive = {int(k): int(v) for k, v in (data.get('positive') or {}).items()}
+        sketch._negative = {int(k): int(v) for k, v in (data.get('negative') or {}).items()}
+        sketch.zero_count = int(data.get('zero', 0))
+        sketch.count = int(data.get('count', 0))
+        sketch.sum = float(data.get('sum', 0.0))
+        if sketch.count:
+            sketch.min = float(data['min'])
+            sketch.max = float(data['max'])
+        return sketch
+
+
+class MetricSketches(object):
+    """一个会话各指标的分位数草图
+
+    与统计面板、会话对比一致，FPS为0（页面静止或设备不支持FPS）不计入。
+    """
+
+    def __init__(self, metrics, relative_accuracy=DEFAULT_ACCURACY):
+        self.metrics = tuple(metrics)
+        self.sketches = {name: QuantileSketch(relative_accuracy) for name in self.metrics}
+        self.samples = 0  # 加入过的行数
+
+    def __getitem__(self, metric):
+        return self.sketches[metric]
+
+    def add_row(self, row):
+        """加入一行数值（与metrics一一对应，缺失为NaN）"""
+        for name, value in zip(self.metrics, row):
+            if name == 'fps' and value <= 0:
+                continue
+            self.sketches[name].add(value)
+        self.samples += 1
+
+    def add_column(self, name, values):
+        """加入一个指标的一列数值（用于由已记录的数据重建，不计入行数）"""
+        sketch = self.sketches[name]
+        skip_zero = name == 'fps'
+        for value in values:
+            if skip_zero and value <= 0:
+                continue
+            sketch.add(value)
+
+    def add(self, values):
+        """加入一条 {指标: 数值} 数据"""
+        row = []
+        for name in self.metrics:
+            try:
+                row.append(float(values.get(name)))
+            except (TypeError, ValueError):
+                row.append(math.nan)
+        self.add_row(row)
+
+    def merge(self, other):
+        for name, sketch in other.sketches.items():
+            if name in self.sketches:
+                self.sketches[name].merge(sketch)
+        self.samples += other.samples
+        return self
+
+    def summary(self, percentiles=DEFAULT_PERCENTILES):
+        """{指标: 统计}，没有有效样本的指标不输出"""
+        return {name: sketch.summary(percentiles) for name, sketch in self.sketches.items() if sketch.count}
+
+    def to_dict(self):
+        return {'samples': self.samples, 'metrics': {name: s.to_dict() for name, s in self.sketches.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        result = cls(data['metrics'])
+        result.sketches = {name: QuantileSketch.from_dict(item) for name, item in data['metrics'].items()}
+        result.samples = int(data.get('samples', 0))
+        return result
+
+
+def parse_percentiles(text, default=DEFAULT_PERCENTILES):
+    """逗号分隔的百分位（如 '50,90,99,99.9'）"""
+    if not text:
+        return default
+    values = []
+    for item in str(text).split(','):
+        item = item.strip()
+        if not item:
+            continue
+        value = float(item)
+        if not 0 <= value <= 100:
+            raise ValueError(f"百分位需在0~100之间: {item}")
+        values.append(value)
+    return tuple(values) or default
@@ -0,0 +1,336 @@
+# -*- coding: utf-8 -*-
+# 分段滚动的JSONL事件日志（iOS/Android通用，只依赖标准库）
+# 当前段为普通JSONL文件，超过大小或时长后压缩为 .jsonl.gz 段文件，
+# 旁路索引 <名称>.index.json 记录每个段及段内各压缩块的时间范围、偏移和应用列表，
+# 按时间/应用查询时只解压相关的段和块。
+import gzip
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+INDEX_VERSION = 1
+
+
+def iter_lines_reversed(file_path, block_size=64 * 1024):
+    """从文件末尾向前逐行读取，返回不含换行符的bytes
+
+    按块从后往前seek，块边界处被截断的行与前一块拼接后再返回；
+    文件末尾没有换行符的行（正在写入）也会作为第一行返回，由调用方判断是否完整。
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b''
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + remainder).split(b'\n')
+            remainder = lines[0]  # 行首可能在前一块中
+            for line in reversed(lines[1:]):
+                yield line
+        if remainder:
+            yield remainder
+
+
+def _parse_line(line):
+    """解析一行JSON，空行/损坏行/不完整行返回None"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        entry = json.loads(line.decode('utf-8') if isinstance(line, bytes) else line)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return entry if isinstance(entry, dict) else None
+
+
+def entry_time(entry):
+    """事件的时间戳（秒）：优先使用ts字段，兼容只有'%Y-%m-%d %H:%M:%S'字符串的旧日志"""
+    ts = entry.get('ts')
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    try:
+        return datetime.strptime(entry.get('timestamp', ''), '%Y-%m-%d %H:%M:%S').timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def entry_app(entry):
+    """事件所属应用：iOS为bundle_id，Android为package_name"""
+    app_info = entry.get('app_info') or {}
+    return app_info.get('bundle_id') or app_info.get('package_name') or app_info.get('name')
+
+
+def _segment_ranges(segments):
+    """段的时间范围 [(start, end), ...]（忽略没有时间戳的段）"""
+    return [(s['start'], s['end']) for s in segments if s.get('start') is not None and s.get('end') is not None]
+
+
+class SegmentedJsonLog(object):
+    """按大小/时长滚动、已关闭段gzip压缩并带时间索引的JSONL日志
+
+    - 已关闭的段由多个gzip member顺序拼接（每 block_events 条一个），本身仍是合法的gzip文件，
+      索引记录每个member的压缩偏移/长度和时间范围，读取时可以直接seek到需要的块
+    - 只保留最近 max_segments 个段，超出时删除最旧的段（on_evict(ranges) 收到被删除段的时间范围）
+    """
+
+    def __init__(self, file_path, max_bytes=5 * 1024 * 1024, max_age=24 * 3600, max_segments=100,
+                 block_events=256, on_evict=None):
+        self.file_path = file_path
+        self.on_evict = on_evict
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_segments = max_segments
+        self.block_events = block_events
+        self.directory = os.path.dirname(os.path.abspath(file_path))
+        self.base_name = os.path.splitext(os.path.basename(file_path))[0]
+        self.index_path = os.path.join(self.directory, f'{self.base_name}.index.json')
+        self._lock = threading.RLock()
+        os.makedirs(self.directory, exist_ok=True)
+        self.segments = self._load_index()
+        self._active_start = self._read_active_start()
+
+    # ------------------------------------------------------------------ 索引
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return []
+        segments = index.get('segments', []) if index.get('version') == INDEX_VERSION else []
+        # 忽略已被手动删除的段文件
+        return [s for s in segments if os.path.exists(os.path.join(self.directory, s['file']))]
+
+    def _save_index(self):
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'segments': self.segments}, f, ensure_ascii=False)
+        os.replace(temp_path, self.index_path)
+
+    def _read_active_start(self):
+        """当前段第一条事件的时间，用于按时长滚动"""
+        try:
+            with open(self.file_path, 'rb') as f:
+                for line in f:
+                    entry = _parse_line(line)
+                    if entry is not None:
+                        return entry_time(entry)
+        except OSError:
+            pass
+        return None
+
+    # ------------------------------------------------------------------ 写入
+
+    def append(self, entry):
+        """追加一条事件，必要时先滚动当前段"""
+        self.append_entries([entry])
+
+    def append_entries(self, entries, fsync=False):
+        """批量追加事件（后台写入线程按批调用），逐条判断是否需要滚动；fsync为True时写入后刷盘"""
+        with self._lock:
+            pending, pending_bytes = [], 0
+            for entry in entries:
+                ts = entry_time(entry)
+                if self._should_rotate(ts, pending_bytes):
+                    self._write_lines(pending)
+                    pending, pending_bytes = [], 0
+                    self.rotate()
+                line = json.dumps(entry, ensure_ascii=False) + '\n'
+                pending.append(line)
+                pending_bytes += len(line.encode('utf-8'))
+                if self._active_start is None:
+                    self._active_start = ts if ts is not None else time.time()
+            self._write_lines(pending, fsync)
+
+    def _write_lines(self, lines, fsync=False):
+        if not lines and not fsync:
+            return
+        with open(self.file_path, 'a', encoding='utf-8') as f:
+            f.writelines(lines)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _should_rotate(self, now, pending_bytes=0):
+        try:
+            size = os.path.getsize(self.file_path) + pending_bytes
+        except OSError:
+            size = pending_bytes
+        if size == 0:
+            return False
+        if size >= self.max_bytes:
+            return True
+        now = now if now is not None else time.time()
+        return self._active_start is not None and now - self._active_start >= self.max_age
+
+    def rotate(self):
+        """把当前段压缩为段文件并写入索引，然后清空当前段"""
+        with self._lock:
+            if not os.path.exists(self.file_path) or os.path.getsize(self.file_path) == 0:
+                return None
+            segment = self._compress_active()
+            if segment is None:
+                open(self.file_path, 'w').close()
+                self._active_start = None
+                return None
+            self.segments.append(segment)
+            evicted = []
+            while len(self.segments) > self.max_segments:
+                evicted.append(self.segments.pop(0))
+                self._remove_segment(evicted[-1])
+            # 先更新索引再清空当前段：中途异常最多导致重复，不会丢事件
+            self._save_index()
+            open(self.file_path, 'w').close()
+            self._active_start = None
+            ranges = _segment_ranges(evicted)
+            if ranges and self.on_evict is not None:
+                self.on_evict(ranges)
+            return segment
+
+    def _compress_active(self):
+        blocks, apps = [], set()
+        block_lines, block_start, block_end = [], None, None
+        segment_start = segment_end = None
+        count = 0
+
+        stamp = datetime.fromtimestamp(self._active_start or time.time()).strftime('%Y%m%d-%H%M%S')
+        file_name = f'{self.base_name}.{stamp}.jsonl.gz'
+        suffix = 1
+        while os.path.exists(os.path.join(self.directory, file_name)):
+            suffix += 1
+            file_name = f'{self.base_name}.{stamp}-{suffix}.jsonl.gz'
+        segment_path = os.path.join(self.directory, file_name)
+        temp_path = segment_path + '.tmp'
+
+        with open(self.file_path, 'rb') as source, open(temp_path, 'wb') as target:
+            def flush_block():
+                offset = target.tell()
+                target.write(gzip.compress(b''.join(block_lines)))
+                blocks.append({'offset': offset, 'length': target.tell() - offset,
+                               'start': block_start, 'end': block_end, 'count': len(block_lines)})
+
+            for raw_line in source:
+                entry = _parse_line(raw_line)
+                if entry is None:
+                    continue
+                ts = entry_time(entry)
+                if ts is None:
+                    ts = block_end if block_end is not None else segment_end
+                app = entry_app(entry)
+                if app:
+                    apps.add(app)
+                if ts is not None:
+                    block_start = ts if block_start is None else min(block_start, ts)
+                    block_end = ts if block_end is None else max(block_end, ts)
+                    segment_start = ts if segment_start is None else min(segment_start, ts)
+                    segment_end = ts if segment_end is None else max(segment_end, ts)
+                block_lines.append(raw_line if raw_line.endswith(b'\n') else raw_line + b'\n')
+                count += 1
+                if len(block_lines) >= self.block_events:
+                    flush_block()
+                    block_lines, block_start, block_end = [], None, None
+            if block_lines:
+                flush_block()
+
+        if count == 0:
+            os.remove(temp_path)
+            return None
+        os.replace(temp_path, segment_path)
+        return {'file': file_name, 'start': segment_start, 'end': segment_end, 'count': count,
+                'apps': sorted(apps), 'blocks': blocks}
+
+    def _remove_segment(self, segment):
+        try:
+            os.remove(os.path.join(self.directory, segment['file']))
+        except OSError:
+            pass
+
+    # ------------------------------------------------------------------ 读取
+
+    @staticmethod
+    def _overlaps(item, start, end):
+        if item.get('start') is None or item.get('end') is None:
+            return True
+        return (start is None or item['end'] >= start) and (end is None or item['start'] <= end)
+
+    def _read_block(self, segment, block):
+        with open(os.path.join(self.directory, segment['file']), 'rb') as f:
+            f.seek(block['offset'])
+            data = gzip.decompress(f.read(block['length']))
+        return data.split(b'\n')
+
+    def iter_recent(self):
+        """从新到旧逐条返回事件"""
+        with self._lock:
+            segments = list(self.segments)
+        if os.path.exists(self.file_path):
+            for line in iter_lines_reversed(self.file_path):
+                entry = _parse_line(line)
+                if entry is not None:
+                    yield entry
+        for segment in reversed(segments):
+            for block in reversed(segment['blocks']):
+                for line in reversed(self._read_block(segment, block)):
+                    entry = _parse_line(line)
+                    if entry is not None:
+                        yield entry
+
+    def iter_events(self, start=None, end=None, app=None):
+        """按时间顺序返回 [start, end] 时间范围内（可选指定应用）的事件，只读取相关的段和块"""
+        with self._lock:
+            segments = list(self.segments)
+        for segment in segments:
+            if not self._overlaps(segment, start, end):
+                continue
+            if app is not None and app not in segment.get('apps', []):
+                continue
+            for block in segment['blocks']:
+                if not self._overlaps(block, start, end):
+                    continue
+                for line in self._read_block(segment, block):
+                    entry = self._match(_parse_line(line), start, end, app)
+                    if entry is not None:
+                        yield entry
+        if os.path.exists(self.file_path):
+            with open(self.file_path, 'rb') as f:
+                for line in f:
+                    entry = self._match(_parse_line(line), start, end, app)
+                    if entry is not None:
+                        yield entry
+
+    @staticmethod
+    def _match(entry, start, end, app):
+        if entry is None:
+            return None
+        if start is not None or end is not None:
+            ts = entry_time(entry)
+            if ts is None or (start is not None and ts < start) or (end is not None and ts > end):
+                return None
+        if app is not None and entry_app(entry) != app:
+            return None
+        return entry
+
+    # ------------------------------------------------------------------ 清理
+
+    def clear(self, before=None):
+        """清空日志；指定before时只删除结束时间早于before的段
+
+        Returns:
+            list: 删除的段的时间范围 [(start, end), ...]（不含当前写入的文件）
+        """
+        with self._lock:
+            if before is None:
+                removed = list(self.segments)
+                open(self.file_path, 'w').close()
+                self._active_start = None
+            else:
+                removed = [s for s in self.segments if s.get('end') is not None and s['end'] < before]
+            for segment in removed:
+                self._remove_segment(segment)
+            self.segments = [s for s in self.segments if s not in removed]
+            self._save_index()
+            return _segment_ranges(removed)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+# 会话编目（SQLite，iOS/Android共用一个数据库）
+# 会话数据仍按目录保存在会话存储中（meta.json为原始记录），这里按设备型号/系统版本/应用及版本/时间
+# 以及页面上的标签和场景建立索引，几千个会话中按条件检索也能立即返回。
+import contextlib
+import json
+import os
+import sqlite3
+import threading
+
+from common.leak_event_index import parse_time
+
+CATALOG_FILE_NAME = 'session_catalog.sqlite3'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    platform TEXT NOT NULL,
+    device TEXT,
+    device_name TEXT,
+    device_model TEXT COLLATE NOCASE,
+    os_version TEXT,
+    app TEXT,
+    app_version TEXT,
+    started_at REAL,
+    ended_at REAL,
+    samples INTEGER,
+    source TEXT,
+    meta TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_started ON sessions (started_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_platform ON sessions (platform, started_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_app ON sessions (app, app_version, started_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_model ON sessions (device_model, os_version, started_at);
+CREATE INDEX IF NOT EXISTS idx_sessions_device ON sessions (device, started_at);
+CREATE TABLE IF NOT EXISTS session_labels (
+    session_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    ts REAL
+);
+CREATE INDEX IF NOT EXISTS idx_session_labels_name ON session_labels (kind, name, session_id);
+CREATE INDEX IF NOT EXISTS idx_session_labels_session ON session_labels (session_id);
+'''
+
+# 编目中单独建列（可过滤）的会话信息字段
+CATALOG_FIELDS = ('platform', 'device', 'device_name', 'device_model', 'os_version', 'app', 'app_version',
+                  'started_at', 'ended_at', 'samples', 'source')
+
+MAX_PAGE_SIZE = 500
+
+
+def clean_annotations(data):
+    """页面提交的场景和标签：只保留字典项，场景去掉附带的性能数据（data）"""
+    fields = {}
+    if isinstance(data.get('scenes'), list):
+        fields['scenes'] = [{k: v for k, v in scene.items() if k != 'data'}
+                            for scene in data['scenes'] if isinstance(scene, dict)]
+    if isinstance(data.get('tags'), list):
+        fields['tags'] = [tag for tag in data['tags'] if isinstance(tag, dict)]
+    return fields
+
+
+def _labels(meta):
+    """会话信息中的标签（备注）和场景（名称）"""
+    labels = []
+    for tag in meta.get('tags') or []:
+        if tag.get('note'):
+            labels.append(('tag', str(tag['note']), _time(tag.get('time'))))
+    for scene in meta.get('scenes') or []:
+        if scene.get('name'):
+            labels.append(('scene', str(scene['name']), _time(scene.get('startTime'))))
+    return labels
+
+
+def _time(value):
+    try:
+        return parse_time(value)
+    except ValueError:
+        return None
+
+
+class SessionCatalog(object):
+    """会话信息的SQLite索引（WAL模式，iOS/Android两个服务进程可同时读写）"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        try:
+            with conn:  # 正常退出时提交，异常时回滚
+                yield conn
+        finally:
+            conn.close()
+
+    def put(self, meta):
+        """写入或更新一个会话的信息（标签和场景整体替换）"""
+        meta = {k: v for k, v in meta.items() if k != 'recording'}
+        session_id = meta['session_id']
+        with self._lock, self._connect() as conn:
+            conn.execute(f"INSERT OR REPLACE INTO sessions (session_id, {', '.join(CATALOG_FIELDS)}, meta) "
+                         f"VALUES ({', '.join('?' * (len(CATALOG_FIELDS) + 2))})",
+                         [session_id] + [meta.get(field) for field in CATALOG_FIELDS]
+                         + [json.dumps(meta, ensure_ascii=False)])
+            conn.execute('DELETE FROM session_labels WHERE session_id = ?', (session_id,))
+            conn.executemany('INSERT INTO session_labels (session_id, kind, name, ts) VALUES (?, ?, ?, ?)',
+                             [(session_id,) + label for label in _labels(meta)])
+
+    def remove(self, session_id):
+        with self._lock, self._connect() as conn:
+            conn.execute('DELETE FROM sessions WHERE session_id = ?', (session_id,))
+            conn.execute('DELETE FROM session_labels WHERE session_id = ?', (session_id,))
+
+    def session_ids(self):
+        with self._connect() as conn:
+            return {row[0] for row in conn.execute('SELECT session_id FROM sessions')}
+
+    def count(self, platform=None):
+        with self._connect() as conn:
+            if platform is None:
+                return conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+            return conn.execute('SELECT COUNT(*) FROM sessions WHERE platform = ?', (platform,)).fetchone()[0]
+
+    def query(self, platform=None, app=None, app_version=None, device=None, device_model=None, os_version=None,
+              tag=None, scene=None, source=None, start=None, end=None, page=1, page_size=50):
+        """按条件查询会话，按开始时间从新到旧
+
+        Args:
+            device: 设备标识（UDID/序列号）或设备名称
+            device_model: 设备型号（如 Pixel 7、iPhone15,2，不区分大小写）
+            tag/scene: 页面上添加的标签备注/场景名称
+            start/end: 会话开始时间范围（时间戳，秒，闭区间）
+        Returns:
+            dict: sessions（会话信息列表）, total, page, page_size, has_more
+        """
+        page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+        page = max(1, int(page))
+        conditions, params = [], []
+        for column, value in (('platform', platform), ('app', app), ('app_version', app_version),
+                              ('device_model', device_model), ('os_version', os_version), ('source', source)):
+            if value:
+                conditions.append(f'{column} = ?')
+                params.append(value)
+        if device:
+            conditions.append('(device = ? OR device_name = ?)')
+            params.extend([device, device])
+        for kind, value in (('tag', tag), ('scene', scene)):
+            if value:
+                conditions.append('session_id IN (SELECT session_id FROM session_labels WHERE kind = ? AND name = ?)')
+                params.extend([kind, value])
+        if start is not None:
+            conditions.append('started_at >= ?')
+            params.append(float(start))
+        if end is not None:
+            conditions.append('started_at <= ?')
+            params.append(float(end))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        with self._connect() as conn:
+            total = conn.execute(f'SELECT COUNT(*) FROM sessions {where}', params).fetchone()[0]
+            rows = conn.execute(f'SELECT meta FROM sessions {where} ORDER BY started_at DESC, session_id '
+                                f'LIMIT ? OFFSET ?', params + [page_size + 1, (page - 1) * page_size]).fetchall()
+
+        has_more = len(rows) > page_size
+        return {
+            'sessions': [json.loads(row[0]) for row in rows[:page_size]],
+            'total': total,
+            'page': page,
+            'page_size': page_size,
+            'has_more': has_more,
+        }
+
+
+def parse_catalog_args(args):
+    """把HTTP查询参数转换为 SessionCatalog.query 的参数
+
+    支持: platform, app, app_version, device, device_model, os_version, tag, scene, source, from, to, page, page_size
+    """
+    params = {key: args.get(key) or None for key in ('platform', 'app', 'app_version', 'device', 'device_model',
+                                                     'os_version', 'tag', 'scene', 'source')}
+    params.update({
+        'start': parse_time(args.get('from')),
+        'end': parse_time(args.get('to')),
+        'page': int(args.get('page', 1)),
+        'page_size': int(args.get('page_size', 50)),
+    })
+    return params
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+# 会话对比（基线构建 vs 候选构建）
+# 对同一场景在两个构建上录制的会话，按起点/标签/场景对齐到相同时长的时间窗口，
+# 逐指标比较分布（均值、P50/P90/P99、峰值，FPS另比较P1/P5低帧和Jank次数），
+# 并用分块自助法（block bootstrap，保留相邻采样间的相关性）估计差异的置信区间和显著性。
+# 所有统计量对全部重采样一次性向量化计算，一小时的会话对比在百毫秒量级完成。
+# 依赖numpy（可选依赖，未安装时接口返回错误提示）
+import math
+
+try:
+    import numpy as np
+except ImportError:  # 未安装numpy时不支持会话对比
+    np = None
+
+from common.session_export import Annotations
+
+ALIGN_MODES = ('start', 'tag', 'scene')
+
+# 各指标比较的分位数；FPS关注低帧（P1/P5），其余指标关注高位（P90/P99）
+PERCENTILES = (50, 90, 99)
+FPS_PERCENTILES = (1, 5, 50)
+# 数值变大为劣化的指标方向为1，FPS变小为劣化
+WORSE_DIRECTION = {'fps': -1}
+
+BOOTSTRAP_ROUNDS = 200
+# 单个指标重采样矩阵的最大元素数，会话很长时相应减少重采样次数
+MAX_BOOTSTRAP_CELLS = 4000000
+MIN_BOOTSTRAP_ROUNDS = 50
+BLOCK_SIZE = 10  # 秒级采样的自相关长度
+MIN_SAMPLES = 10  # 有效样本少于该数时不估计显著性
+ALPHA = 0.05
+
+# 只有秒级FPS，按帧耗时翻倍的思路近似统计卡顿：
+# FPS低于前 JANK_WINDOW 个采样均值的一半且低于 JANK_FPS 记为一次Jank，其中低于 BIG_JANK_FPS 的为BigJank
+JANK_WINDOW = 3
+JANK_FPS = 24
+BIG_JANK_FPS = 12
+
+
+def _check_numpy():
+    if np is None:
+        raise ValueError('会话对比需要安装numpy: pip install numpy')
+
+
+def _session_annotations(meta, override=None):
+    """会话的场景和标签：优先使用请求中提供的（页面上的），否则使用导入时保存在会话信息中的"""
+    override = override or {}
+    return Annotations(override.get('scenes') if override.get('scenes') is not None else meta.get('scenes'),
+                       override.get('tags') if override.get('tags') is not None else meta.get('tags'))
+
+
+def resolve_window(reader, annotations, align='start', anchor=None):
+    """对齐窗口 (start, end)：start为会话起点、指定标签的时间或指定场景的开始时间"""
+    if not len(reader):
+        raise ValueError('会话没有数据')
+    first, last = reader.timestamps(0, 1)[0], reader.timestamps(len(reader) - 1)[0]
+    if align == 'start':
+        return first, last
+    if not anchor:
+        raise ValueError(f'按{"标签" if align == "tag" else "场景"}对齐需要指定anchor')
+    if align == 'tag':
+        for ts, note in annotations.tags:
+            if note == anchor:
+                return ts, last
+        raise ValueError(f'会话中没有标签: {anchor}')
+    if align == 'scene':
+        for start, end, name in annotations.scenes:
+            if name == anchor:
+                return start, end
+        raise ValueError(f'会话中没有场景: {anchor}')
+    raise ValueError(f"不支持的对齐方式: {align}，可选 {', '.join(ALIGN_MODES)}")
+
+
+def valid_values(metric, values):
+    """去掉缺失值；FPS为0表示页面静止或设备不支持FPS，也不参与统计"""
+    values = np.frombuffer(values, dtype=np.float64) if not isinstance(values, np.ndarray) else values
+    mask = ~np.isnan(values)
+    if metric == 'fps':
+        mask &= values > 0
+    return values[mask]
+
+
+def count_jank(fps):
+    """返回 (Jank次数, BigJank次数)"""
+    if len(fps) <= JANK_WINDOW:
+        return 0, 0
+    # previous[i] 为 fps[i:i+JANK_WINDOW] 的均值，即 fps[i+JANK_WINDOW] 之前的窗口
+    previous = np.convolve(fps, np.ones(JANK_WINDOW) / JANK_WINDOW, 'valid')[:-1]
+    current = fps[JANK_WINDOW:]
+    jank = (current < previous / 2) & (current < JANK_FPS)
+    return int(jank.sum()), int((jank & (current < BIG_JANK_FPS)).sum())
+
+
+def _stats(matrix, percentiles):
+    """对矩阵每一行计算均值和分位数，返回 {统计量: 数组}"""
+    result = {'mean': matrix.mean(axis=1)}
+    for p, row in zip(percentiles, np.percentile(matrix, percentiles, axis=1)):
+        result[f'p{p}'] = row
+    return result
+
+
+def _block_resample(values, rounds, rng):
+    """分块自助重采样：返回 rounds × len(values) 的矩阵，每行由随机起点的连续块拼接而成"""
+    n = len(values)
+    block = min(BLOCK_SIZE, n)
+    blocks = -(-n // block)
+    starts = rng.integers(0, n - block + 1, size=(rounds, blocks))
+    index = (starts[:, :, None] + np.arange(block)).reshape(rounds, -1)[:, :n]
+    return values[index]
+
+
+def _describe(values, percentiles):
+    if not len(values):
+        return None
+    result = {name: float(v[0]) for name, v in _stats(values[None, :], percentiles).items()}
+    result.update({'samples': int(len(values)), 'min': float(values.min()), 'max': float(values.max())})
+    return result
+
+
+def _delta(baseline, candidate):
+    delta = candidate - baseline
+    return {
+        'baseline': baseline,
+        'candidate': candidate,
+        'delta': delta,
+        'percent': delta / abs(baseline) * 100 if baseline else None,
+        'ci': None,
+        'p_value': None,
+        'significant': None,
+        'regression': None,
+    }
+
+
+def _significance(item, p_value, direction):
+    """填入p值；显著且朝劣化方向变化时标记为回归"""
+    item['p_value'] = p_value
+    item['significant'] = p_value < ALPHA
+    item['regression'] = item['significant'] and item['delta'] * direction > 0
+    return item
+
+
+def compare_metric(metric, baseline, candidate, rng):
+    """比较一个指标在两个窗口中的分布，baseline/candidate 为去掉缺失值后的numpy数组"""
+    percentiles = FPS_PERCENTILES if metric == 'fps' else PERCENTILES
+    direction = WORSE_DIRECTION.get(metric, 1)
+    result = {'baseline': _describe(baseline, percentiles), 'candidate': _describe(candidate, percentiles),
+              'deltas': {}}
+    if result['baseline'] is None or result['candidate'] is None:
+        return result
+
+    names = ['mean'] + [f'p{p}' for p in percentiles]
+    deltas = {name: _delta(result['baseline'][name], result['candidate'][name]) for name in names}
+    if min(len(baseline), len(candidate)) >= MIN_SAMPLES:
+        rounds = max(MIN_BOOTSTRAP_ROUNDS,
+                     min(BOOTSTRAP_ROUNDS, MAX_BOOTSTRAP_CELLS // max(len(baseline), len(candidate))))
+        base_stats = _stats(_block_resample(baseline, rounds, rng), percentiles)
+        cand_stats = _stats(_block_resample(candidate, rounds, rng), percentiles)
+        for name in names:
+            diffs = cand_stats[name] - base_stats[name]
+            low, high = np.percentile(diffs, [ALPHA / 2 * 100, (1 - ALPHA / 2) * 100])
+            deltas[name]['ci'] = [float(low), float(high)]
+            # 双侧自助法p值：重采样差异中与观测差异符号相反（含0）的比例的两倍
+            p_value = 2 * min(float((diffs <= 0).mean()), float((diffs >= 0).mean()))
+            _significance(deltas[name], min(1.0, p_value), direction)
+
+    # 峰值（内存即高水位）只有一个观测值，不估计显著性
+    deltas['max'] = _delta(result['baseline']['max'], result['candidate']['max'])
+    result['deltas'] = deltas
+
+    if metric == 'fps':
+        for name, base_count, cand_count in zip(('jank', 'big_jank'), count_jank(baseline), count_jank(candidate)):
+            result['baseline'][name], result['candidate'][name] = base_count, cand_count
+            # 两个窗口时长相同，次数按泊松分布比较（条件二项检验的正态近似）
+            total = base_count + cand_count
+            p_value = math.erfc(abs(cand_count - base_count) / math.sqrt(total) / math.sqrt(2)) if total else 1.0
+            deltas[name] = _significance(_delta(base_count, cand_count), p_value, 1)
+    return result
+
+
+def compare_sessions(store, baseline_id, candidate_id, align='start', anchor=None, metrics=None,
+                     baseline_annotations=None, candidate_annotations=None, seed=0):
+    """对比两个已记录的会话，返回差异报告
+
+    Args:
+        align: start（从会话起点对齐）/ tag（从同名标签处对齐）/ scene（取同名场景的区间）
+        anchor: 对齐用的标签备注或场景名称
+        metrics: 对比的指标，默认为两个会话共有的指标
+        baseline_annotations/candidate_annotations: 页面上的场景和标签 {'scenes': [...], 'tags': [...]}，
+                                                    未提供时使用会话信息中保存的
+        seed: 自助法随机种子，相同输入得到相同报告
+    """
+    _check_numpy()
+    if align not in ALIGN_MODES:
+        raise ValueError(f"不支持的对齐方式: {align}，可选 {', '.join(ALIGN_MODES)}")
+    metas = [store.get_meta(baseline_id), store.get_meta(candidate_id)]
+    for session_id, meta in zip((baseline_id, candidate_id), metas):
+        if meta is None:
+            raise KeyError(session_id)
+    if metrics is None:
+        metrics = [m for m in metas[0]['metrics'] if m in metas[1]['metrics']]
+
+    readers = [store.open(baseline_id), store.open(candidate_id)]
+    try:
+        windows = [resolve_window(reader, _session_annotations(meta, override), align, anchor)
+                   for reader, meta, override in zip(readers, metas, (baseline_annotations, candidate_annotations))]
+        # 两个窗口截成相同时长，保证Jank等计数类指标可比
+        duration = max(0.0, min(end - start for start, end in windows))
+        columns = [reader.read(metrics, start, start + duration)[1] for reader, (start, _) in zip(readers, windows)]
+    finally:
+        for reader in readers:
+            reader.close()
+
+    rng = np.random.default_rng(seed)
+    report_metrics = {}
+    regressions = []
+    for metric in metrics:
+        if metric not in columns[0] or metric not in columns[1]:
+            continue
+        result = compare_metric(metric, valid_values(metric, columns[0][metric]),
+                                valid_values(metric, columns[1][metric]), rng)
+        report_metrics[metric] = result
+        for name, item in result['deltas'].items():
+            if item['regression']:
+                regressions.append({'metric': metric, 'stat': name, 'delta': item['delta'],
+                                    'percent': item['percent'], 'p_value': item['p_value']})
+
+    def session_info(session_id, meta, window):
+        return {'session_id': session_id, 'device': meta.get('device'), 'app': meta.get('app'),
+                'start': window[0], 'end': window[0] + duration}
+
+    return {
+        'baseline': session_info(baseline_id, metas[0], windows[0]),
+        'candidate': session_info(candidate_id, metas[1], windows[1]),
+        'align': align,
+        'anchor': anchor,
+        'duration': duration,
+        'metrics': report_metrics,
+        'regressions': regressions,
+    }
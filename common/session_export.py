@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+# 会话数据流式导出（gzip CSV / Parquet / Arrow IPC）
+# 从会话存储按块读取（每块 CHUNK_ROWS 行），边读边编码边输出，内存占用与会话长度无关。
+# 列与页面"导出CSV"一致：Timestamp, Time, CPU Usage (%), Memory Usage (MB), FPS, Thread Count, Scene, Tags，
+# 下游分析脚本无需修改。Parquet/Arrow 需要pyarrow（可选依赖），CSV只依赖标准库。
+import csv
+import io
+import math
+import zlib
+from datetime import datetime
+
+from common.leak_event_index import parse_time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 未安装pyarrow时只支持CSV导出
+    pa = pq = None
+
+CHUNK_ROWS = 4096
+EXPORT_FORMATS = ('csv', 'csv.gz', 'parquet', 'arrow')
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'csv.gz': 'application/gzip',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+
+CSV_HEADERS = ['Timestamp', 'Time', 'CPU Usage (%)', 'Memory Usage (MB)', 'FPS', 'Thread Count', 'Scene', 'Tags']
+# 数值列对应的会话指标和保留的小数位数（与页面导出的 toFixed 一致，Thread Count为整数）
+CSV_METRICS = (('CPU Usage (%)', 'cpu', 2), ('Memory Usage (MB)', 'memory', 2), ('FPS', 'fps', 1),
+               ('Thread Count', 'threads', 0))
+
+TAG_TOLERANCE = 5.0  # 标签匹配的时间误差（秒），与页面导出一致
+
+
+def _number(value, digits):
+    """缺失值按0处理（与页面导出一致）"""
+    value = 0.0 if math.isnan(value) else value
+    return int(round(value)) if digits == 0 else round(value, digits)
+
+
+class Annotations(object):
+    """页面上的场景（时间区间）和标签（时间点），导出时填入Scene/Tags列"""
+
+    def __init__(self, scenes=None, tags=None):
+        self.scenes = []
+        for scene in scenes or []:
+            start, end = self._time(scene.get('startTime')), self._time(scene.get('endTime'))
+            if start is not None and end is not None:
+                self.scenes.append((start, end, scene.get('name', '')))
+        self.tags = []
+        for tag in tags or []:
+            ts = self._time(tag.get('time'))
+            if ts is not None:
+                self.tags.append((ts, tag.get('note') or 'Tag'))
+
+    @staticmethod
+    def _time(value):
+        try:
+            return parse_time(value)
+        except ValueError:
+            return None
+
+    def scene_at(self, ts):
+        for start, end, name in self.scenes:
+            if start <= ts <= end:
+                return name
+        return ''
+
+    def tag_at(self, ts):
+        for tag_ts, note in self.tags:
+            if abs(ts - tag_ts) < TAG_TOLERANCE:
+                return note
+        return ''
+
+
+def iter_row_chunks(reader, start=None, end=None, annotations=None, chunk_rows=CHUNK_ROWS):
+    """按块返回导出行：每块为 {列名: 值列表}"""
+    annotations = annotations or Annotations()
+    i0, i1 = reader.index_range(start, end)
+    for a in range(i0, i1, chunk_rows):
+        b = min(a + chunk_rows, i1)
+        timestamps = reader.timestamps(a, b)
+        times = [datetime.fromtimestamp(ts) for ts in timestamps]
+        chunk = {
+            'Timestamp': [t.strftime('%Y-%m-%d %H:%M:%S') for t in times],
+            # 页面使用 toLocaleString('zh-CN')，格式如 2024/1/5 09:03:05
+            'Time': [f'{t.year}/{t.month}/{t.day} {t:%H:%M:%S}' for t in times],
+        }
+        for header, metric, digits in CSV_METRICS:
+            chunk[header] = [_number(v, digits) for v in reader.column(metric, a, b)] if metric in reader.metrics \
+                else [0] * (b - a)
+        chunk['Scene'] = [annotations.scene_at(ts) for ts in timestamps]
+        chunk['Tags'] = [annotations.tag_at(ts) for ts in timestamps]
+        yield chunk
+
+
+def iter_csv(reader, start=None, end=None, annotations=None, compress=False):
+    """流式输出CSV（带BOM，Excel可直接打开中文），compress为True时输出gzip"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def encode(text):
+        data = text.encode('utf-8')
+        return compressor.compress(data) if compressor else data
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(CSV_HEADERS)
+    yield encode('\ufeff' + buffer.getvalue())
+    for chunk in iter_row_chunks(reader, start, end, annotations):
+        # 与页面导出的 toFixed 一致，保留末尾的0（如 3.00）
+        for header, _, digits in CSV_METRICS:
+            if digits:
+                chunk[header] = [f'{value:.{digits}f}' for value in chunk[header]]
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(zip(*(chunk[h] for h in CSV_HEADERS)))
+        data = encode(buffer.getvalue())
+        if data:
+            yield data
+    if compressor:
+        yield compressor.flush()
+
+
+class _ChunkSink(object):
+    """供pyarrow写入的文件对象，写入的数据由生成器取走后清空"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data, self.chunks = b''.join(self.chunks), []
+        return data
+
+
+def _arrow_schema():
+    return pa.schema([
+        ('Timestamp', pa.string()),
+        ('Time', pa.string()),
+        ('CPU Usage (%)', pa.float64()),
+        ('Memory Usage (MB)', pa.float64()),
+        ('FPS', pa.float64()),
+        ('Thread Count', pa.int64()),
+        ('Scene', pa.string()),
+        ('Tags', pa.string()),
+    ])
+
+
+def iter_arrow(reader, start=None, end=None, annotations=None, fmt='parquet'):
+    """流式输出Parquet（每块一个row group）或Arrow IPC stream（每块一个record batch）"""
+    if pa is None:
+        raise RuntimeError('导出Parquet/Arrow需要安装pyarrow: pip install pyarrow')
+    schema = _arrow_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='zstd') if fmt == 'parquet' \
+        else pa.ipc.new_stream(sink, schema)
+    try:
+        for chunk in iter_row_chunks(reader, start, end, annotations):
+            batch = pa.record_batch([chunk[name] for name in schema.names], schema=schema)
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def check_format(fmt):
+    """校验导出格式，不支持时抛出ValueError"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt}，可选 {', '.join(EXPORT_FORMATS)}")
+    if fmt in ('parquet', 'arrow') and pa is None:
+        raise ValueError('导出Parquet/Arrow需要安装pyarrow: pip install pyarrow')
+
+
+def export_session(store, session_id, fmt='csv.gz', start=None, end=None, annotations=None):
+    """流式导出一个会话，返回bytes生成器（生成器结束时关闭会话读取器）"""
+    check_format(fmt)
+    reader = store.open(session_id)
+
+    def generate():
+        try:
+            if fmt in ('csv', 'csv.gz'):
+                yield from iter_csv(reader, start, end, annotations, compress=(fmt == 'csv.gz'))
+            else:
+                yield from iter_arrow(reader, start, end, annotations, fmt)
+        finally:
+            reader.close()
+
+    return generate()
+
+
+def export_filename(meta, fmt):
+    """与页面导出一致的文件名：<平台>_performance_YYYYMMDD_HHMM.<格式>"""
+    started = datetime.fromtimestamp(meta.get('started_at') or 0)
+    return f"{meta.get('platform', 'ios')}_performance_{started:%Y%m%d_%H%M}.{fmt}"
@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+# 导出文件流式导入会话存储（只依赖标准库）
+# 支持页面导出的JSON（{"data": [...], "scenes": [...], "tags": [...]}）和CSV（可为gzip压缩），
+# 边读边解析边写入，逐行校验：无效行跳过并记录原因，错误过多时中止并删除已写入的部分。
+# 大文件不需要整体读入内存，导入后页面通过历史数据API读取。
+import csv
+import gzip
+import io
+import json
+import math
+import uuid
+from datetime import datetime, timedelta
+
+from common.session_store import IOS_METRICS
+
+READ_SIZE = 64 * 1024
+MAX_VALUE_READ = 16 * 1024 * 1024
+MAX_ERROR_MESSAGES = 20
+
+# CSV列名 -> 指标（页面导出的列名，也兼容直接使用指标名的列）
+CSV_COLUMNS = {
+    'CPU Usage (%)': 'cpu',
+    'Memory Usage (MB)': 'memory',
+    'FPS': 'fps',
+    'Thread Count': 'threads',
+}
+TIME_COLUMNS = ('Timestamp', 'timestamp', 'time', 'Time')
+REQUIRED_CSV_COLUMNS = ('Timestamp', 'CPU Usage (%)', 'Memory Usage (MB)', 'FPS', 'Thread Count')
+
+_decoder = json.JSONDecoder()
+
+
+class _PrefixedStream(io.RawIOBase):
+    """先返回已读出的开头几个字节，再继续读原始流"""
+
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.prefix:
+            size = min(len(buffer), len(self.prefix))
+            buffer[:size] = self.prefix[:size]
+            self.prefix = self.prefix[size:]
+            return size
+        data = self.stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def open_text(stream):
+    """把上传的二进制流包装为文本流（自动识别gzip，去掉UTF-8 BOM）"""
+    head = stream.read(2)
+    binary = io.BufferedReader(_PrefixedStream(head, stream), READ_SIZE)
+    if head == b'\x1f\x8b':
+        binary = gzip.GzipFile(fileobj=binary)
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+class _JsonStream(object):
+    """增量JSON读取：逐个取出数组元素和对象的键值，缓冲区只保留未解析的部分"""
+
+    def __init__(self, text, head=''):
+        self.text = text
+        self.buffer = head
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size=None):
+        chunk = self.text.read(size or READ_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """下一个非空白字符，读到结尾返回空字符串"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def take(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"JSON格式错误：位置附近应为 '{char}'，实际为 '{found or '文件结尾'}'")
+        self.pos += 1
+
+    def value(self):
+        """读取一个完整的JSON值，缓冲区不够时继续读取（读取量逐次翻倍）"""
+        self.peek()
+        size = READ_SIZE
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # 数字可能在缓冲区末尾被截断，后面还有数据时需要再读一些确认
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except ValueError as e:
+                if self.eof:
+                    raise ValueError(f'JSON格式错误: {e}')
+            self._fill(size)
+            size = min(size * 2, MAX_VALUE_READ)
+
+    def items(self):
+        """逐个返回数组元素"""
+        self.take('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            found = self.peek()
+            self.pos += 1
+            if found == ']':
+                return
+            if found != ',':
+                raise ValueError("JSON格式错误：数组元素之间应为 ','")
+
+
+def iter_json_export(text, head=''):
+    """解析页面导出的JSON：返回 ('meta', 键, 值) 和 ('item', 数据记录)"""
+    stream = _JsonStream(text, head)
+    if stream.peek() == '[':
+        for item in stream.items():
+            yield 'item', item
+        return
+    stream.take('{')
+    if stream.peek() == '}':
+        return
+    while True:
+        key = stream.value()
+        stream.take(':')
+        if key == 'data' and stream.peek() == '[':
+            for item in stream.items():
+                yield 'item', item
+        else:
+            yield 'meta', key, stream.value()
+        if stream.peek() == ',':
+            stream.pos += 1
+            continue
+        stream.take('}')
+        return
+
+
+def _iter_lines(head, text):
+    """先返回已读出开头部分的各行，再继续逐行读取（csv模块负责处理引号内的换行）"""
+    lines = io.StringIO(head).readlines()
+    pending = lines.pop() if lines and not lines[-1].endswith('\n') else ''
+    yield from lines
+    for line in text:
+        if pending:
+            line, pending = pending + line, ''
+        yield line
+    if pending:
+        yield pending
+
+
+def parse_row_time(value, reference=None):
+    """记录时间：时间戳（秒或毫秒）、日期时间字符串，或只有时分秒（与reference的日期组合，跨零点顺延一天）"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value / 1000.0 if value > 1e11 else float(value)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError('缺少时间')
+    value = value.strip()
+    try:
+        ts = float(value)
+        return ts / 1000.0 if ts > 1e11 else ts
+    except ValueError:
+        pass
+    # fromisoformat 是C实现，比strptime快得多，页面导出的 'YYYY-MM-DD HH:MM:SS' 走这里
+    for parse in (lambda v: datetime.fromisoformat(v.replace('Z', '+00:00')),
+                  lambda v: datetime.strptime(v, '%Y/%m/%d %H:%M:%S')):
+        try:
+            return parse(value).timestamp()
+        except ValueError:
+            continue
+    for fmt in ('%H:%M:%S', '%H:%M:%S.%f'):
+        try:
+            clock = datetime.strptime(value, fmt).time()
+        except ValueError:
+            continue
+        base = datetime.fromtimestamp(reference) if reference is not None else datetime.now()
+        ts = datetime.combine(base.date(), clock).timestamp()
+        if reference is not None and ts < reference - 12 * 3600:
+            ts = (datetime.combine(base.date(), clock) + timedelta(days=1)).timestamp()
+        return ts
+    raise ValueError(f'无法解析时间: {value}')
+
+
+def _number(value):
+    if value is None or value == '':
+        return math.nan
+    if isinstance(value, str):
+        value = value.strip().rstrip('%')
+    number = float(value)
+    if math.isinf(number):
+        raise ValueError(f'无效数值: {value}')
+    return number
+
+
+class SessionImporter(object):
+    """把解析出的记录逐条校验后写入会话存储"""
+
+    def __init__(self, store, platform, file_name=None, metrics=IOS_METRICS, max_errors=1000):
+        self.store = store
+        self.platform = platform
+        self.file_name = file_name
+        self.metrics = tuple(metrics)
+        self.max_errors = max_errors
+        self.session_id = uuid.uuid4().hex[:12]
+        self.writer = None
+        self.info = {}
+        self.reference = None  # 只有时分秒的记录使用的日期
+        self.last_ts = None
+        self.first_ts = None
+        self.samples = 0
+        self.skipped = 0
+        self.errors = []
+        self.scenes = []
+        self.tags = []
+
+    def error(self, where, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_ERROR_MESSAGES:
+            self.errors.append(f'{where}: {message}')
+        if self.skipped > self.max_errors:
+            raise ValueError(f'无效记录超过 {self.max_errors} 条，已中止导入（{self.errors[0]}）')
+
+    def add(self, where, time_value, values):
+        """校验并写入一条记录，无效记录跳过并记录原因"""
+        try:
+            ts = parse_row_time(time_value, self.last_ts if self.last_ts is not None else self.reference)
+            row = {name: _number(values.get(name)) for name in self.metrics}
+        except (TypeError, ValueError) as e:
+            self.error(where, str(e))
+            return None
+        if all(math.isnan(v) for v in row.values()):
+            self.error(where, '没有性能数据')
+            return None
+        if self.last_ts is not None and ts < self.last_ts:
+            self.error(where, f'时间倒序（{time_value}）')
+            return None
+        if self.writer is None:
+            self.writer = self.store.create(self.session_id, self.platform, self.info.get('device'),
+                                            self.info.get('app'), self.metrics, started_at=ts)
+            self.first_ts = ts
+        self.writer.append(ts, row)
+        self.last_ts = ts
+        self.samples += 1
+        return ts
+
+    def import_json(self, text, head=''):
+        for event in iter_json_export(text, head):
+            if event[0] == 'meta':
+                _, key, value = event
+                if key == 'device_udid' or key == 'device_id':
+                    self.info['device'] = value
+                elif key in ('bundle_id', 'package_name'):
+                    self.info['app'] = value
+                elif key == 'timestamp' and isinstance(value, str):
+                    try:
+                        self.reference = parse_row_time(value)
+                    except ValueError:
+                        pass
+                elif key == 'scenes' and isinstance(value, list):
+                    # 场景中的data是区间内数据的副本，导入后可从会话中读取，不再保存
+                    self.scenes = [{k: v for k, v in scene.items() if k != 'data'}
+                                   for scene in value if isinstance(scene, dict)]
+                elif key == 'tags' and isinstance(value, list):
+                    self.tags = [tag for tag in value if isinstance(tag, dict)]
+                continue
+            item = event[1]
+            where = f'第{self.samples + self.skipped + 1}条记录'
+            if not isinstance(item, dict):
+                self.error(where, '不是对象')
+                continue
+            if item.get('cpu') is None and item.get('memory') is None and item.get('type') != 'performance':
+                continue  # 不是性能数据（兼容页面的其他记录类型）
+            self.add(where, item.get('time', item.get('timestamp')), item)
+
+    def import_csv(self, text, head=''):
+        reader = csv.reader(_iter_lines(head, text))
+        headers = [h.strip() for h in next(reader, [])]
+        missing = [name for name in REQUIRED_CSV_COLUMNS if name not in headers]
+        if missing and not ({'cpu', 'memory'} <= set(headers) and set(TIME_COLUMNS) & set(headers)):
+            raise ValueError(f"CSV文件缺少必要列: {', '.join(missing)}")
+        time_index = next(headers.index(name) for name in TIME_COLUMNS if name in headers)
+        columns = [(headers.index(header), metric) for header, metric in CSV_COLUMNS.items() if header in headers]
+        columns += [(i, name) for i, name in enumerate(headers) if name in self.metrics]
+        scene_index = headers.index('Scene') if 'Scene' in headers else None
+        tag_index = headers.index('Tags') if 'Tags' in headers else None
+        scenes = {}
+
+        for line_no, values in enumerate(reader, start=2):
+            if not values or not any(v.strip() for v in values):
+                continue
+            if len(values) <= time_index:
+                self.error(f'第{line_no}行', '列数不足')
+                continue
+            row = {metric: values[i] for i, metric in columns if i < len(values)}
+            if self.add(f'第{line_no}行', values[time_index], row) is None:
+                continue
+            label = values[time_index].strip()
+            # 与页面导入一致：同名场景取首尾时间，Tags列每行一个标签
+            if scene_index is not None and scene_index < len(values) and values[scene_index].strip():
+                name = values[scene_index].strip()
+                scenes.setdefault(name, {'name': name, 'startTime': label})['endTime'] = label
+            if tag_index is not None and tag_index < len(values) and values[tag_index].strip():
+                self.tags.append({'time': label, 'note': values[tag_index].strip(), 'id': f'csv_tag_{line_no}'})
+        self.scenes = list(scenes.values())
+
+    def run(self, stream):
+        """解析并导入整个文件，返回导入结果；文件无效时抛出ValueError（已写入的部分会被删除）"""
+        try:
+            text = open_text(stream)
+            head = text.read(READ_SIZE)
+            if head.lstrip()[:1] in ('{', '['):
+                file_format = 'json'
+                self.import_json(text, head)
+            else:
+                file_format = 'csv'
+                self.import_csv(text, head)
+            if not self.samples:
+                raise ValueError('文件中没有有效的性能数据' + (f'（{self.errors[0]}）' if self.errors else ''))
+        except (ValueError, UnicodeDecodeError, OSError, EOFError, csv.Error) as e:
+            self.discard()
+            raise ValueError(str(e)) from e
+        except Exception:
+            self.discard()
+            raise
+
+        self.writer.meta.update({'source': 'import', 'file_name': self.file_name,
+                                 'scenes': self.scenes, 'tags': self.tags})
+        self.store.close(self.session_id)
+        return {
+            'session_id': self.session_id,
+            'format': file_format,
+            'samples': self.samples,
+            'skipped': self.skipped,
+            'errors': self.errors,
+            'start': self.first_ts,
+            'end': self.last_ts,
+            'device': self.info.get('device'),
+            'app': self.info.get('app'),
+            'scenes': self.scenes,
+            'tags': self.tags,
+        }
+
+    def discard(self):
+        if self.writer is not None:
+            self.store.delete(self.session_id)
+            self.writer = None
+
+
+def import_session(store, stream, platform, file_name=None, metrics=IOS_METRICS, max_errors=1000):
+    """把上传的导出文件（JSON/CSV，可gzip压缩）流式导入为一个新会话，返回导入结果"""
+    return SessionImporter(store, platform, file_name, metrics, max_errors).run(stream)
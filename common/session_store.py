@@ -0,0 +1,742 @@
+# -*- coding: utf-8 -*-
+# 服务端会话数据存储（iOS/Android通用，只依赖标准库）
+# 每个监控会话一个目录，每个指标一个只追加的定长float64列文件，另有一列时间戳：
+#   <根目录>/<session_id>/meta.json   会话信息（平台/设备/应用/指标列表/开始结束时间）
+#   <根目录>/<session_id>/ts.f64      采样时间戳（秒）
+#   <根目录>/<session_id>/<指标>.f64  指标值，缺失为NaN
+#   <根目录>/<session_id>/rollup_10s/, rollup_60s/  汇总层级，每个时间桶一行 <指标>.min/.max/.avg 和 count
+#   <根目录>/<session_id>/sketches.json  各指标的分位数草图（会话结束时写入）
+# 性能评分随数据到达增量计算，会话结束时写入 meta.json 的 score。
+# 写入时只在内存中追加，按批写盘；读取时mmap映射列文件，按时间二分定位，几小时的会话也能立即读取。
+# 汇总层级随数据到达增量维护，长时间范围直接读取汇总层级，不必扫描原始数据。
+# 分位数草图同样随数据到达更新，任意时长的会话都能以固定内存给出 P50/P90/P99。
+import atexit
+import bisect
+import hashlib
+import json
+import math
+import mmap
+import os
+import shutil
+import sys
+import threading
+import time
+from array import array
+
+from common.downsample import lttb
+from common.leak_event_index import parse_time
+from common.performance_score import SCORE_ITEMS, PerformanceScorer
+from common.quantile_sketch import DEFAULT_PERCENTILES, MetricSketches
+
+STORE_VERSION = 1
+TIMESTAMP_COLUMN = 'ts'
+COLUMN_SUFFIX = '.f64'
+SKETCH_FILE_NAME = 'sketches.json'
+ITEM_SIZE = array('d').itemsize
+
+# 各平台默认记录的数值指标（与 performance_data 事件字段一致）
+IOS_METRICS = ('cpu', 'memory', 'fps', 'threads', 'disk_reads', 'disk_writes')
+ANDROID_METRICS = IOS_METRICS + ('system_cpu', 'system_memory_used', 'system_memory_total')
+
+# 汇总层级（时间桶长度，秒）；0 表示原始数据
+ROLLUP_TIERS = (10, 60)
+RESOLUTIONS = (0,) + ROLLUP_TIERS
+ROLLUP_STATS = ('min', 'max', 'avg')
+COUNT_COLUMN = 'count'
+# 选择分辨率时允许的行数为目标点数的倍数，超出时改用更粗的层级，再由LTTB降到目标点数
+OVERSAMPLE = 4
+MAX_SERIES_POINTS = 10000
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _column_path(directory, name):
+    return os.path.join(directory, name + COLUMN_SUFFIX)
+
+
+def rollup_dir(directory, seconds):
+    return os.path.join(directory, f'rollup_{seconds}s')
+
+
+def _read_column(directory, name, count):
+    """直接读取列文件的前count行（不存在的列返回空array）"""
+    column = array('d')
+    path = _column_path(directory, name)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            column.frombytes(f.read(count * ITEM_SIZE))
+    return column
+
+
+def _load_sketches(directory, metrics, count):
+    """读取会话的分位数草图；文件不存在或与行数不符（如异常退出）时由原始数据重建"""
+    try:
+        with open(os.path.join(directory, SKETCH_FILE_NAME), 'r', encoding='utf-8') as f:
+            sketches = MetricSketches.from_dict(json.load(f))
+        if sketches.samples == count and set(sketches.metrics) == set(metrics):
+            return sketches
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    sketches = MetricSketches(metrics)
+    for name in metrics:
+        sketches.add_column(name, _read_column(directory, name, count))
+    sketches.samples = count
+    return sketches
+
+
+def _replay_scores(directory, meta, count):
+    """由已记录的数据重新计算评分（用于重新打开的会话和记录评分之前的会话）"""
+    scorer = PerformanceScorer(meta.get('score_thresholds'))
+    columns = [_read_column(directory, name, count) if name in meta['metrics'] else None for name in SCORE_ITEMS]
+    for i in range(count):
+        scorer.add(*(column[i] if column is not None and i < len(column) else None for column in columns))
+    return scorer
+
+
+def _write_sketches(directory, sketches):
+    temp_path = os.path.join(directory, SKETCH_FILE_NAME + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(sketches.to_dict(), f)
+    os.replace(temp_path, os.path.join(directory, SKETCH_FILE_NAME))
+
+
+def rollup_columns(metrics):
+    """汇总层级的列名：每个指标的 min/max/avg，以及桶内样本数"""
+    return [f'{name}.{stat}' for name in metrics for stat in ROLLUP_STATS] + [COUNT_COLUMN]
+
+
+class SessionWriter(object):
+    """单个会话的列式追加写入器
+
+    append() 只追加到内存缓冲，每 batch_size 条或 flush_interval 秒写一次盘；
+    列文件长度以最短的一列为准，异常退出时未写完的半行会在下次打开时截掉。
+    sketches 为各指标的分位数草图，scorer 为性能评分（汇总层级的写入器不维护这两项）。
+    """
+
+    def __init__(self, directory, meta, batch_size=64, flush_interval=5.0, rollups=ROLLUP_TIERS, aggregates=True):
+        self.directory = directory
+        self.meta = meta
+        self.metrics = tuple(meta['metrics'])
+        self.columns = (TIMESTAMP_COLUMN,) + self.metrics
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._buffers = {name: array('d') for name in self.columns}
+        self._last_flush = time.monotonic()
+        self.closed = False
+        os.makedirs(directory, exist_ok=True)
+        self.count = self._align_columns()
+        self._files = {name: open(_column_path(directory, name), 'ab') for name in self.columns}
+        self.last_ts = meta.get('last_ts')
+        self.rollups = [RollupTier(directory, seconds, self.metrics, batch_size, flush_interval)
+                        for seconds in rollups]
+        self.sketches = _load_sketches(directory, self.metrics, self.count) if aggregates else None
+        self.scorer = _replay_scores(directory, meta, self.count) if aggregates else None
+        self._score_index = [self.metrics.index(name) if name in self.metrics else None for name in SCORE_ITEMS]
+
+    def _align_columns(self):
+        """把各列截断到相同的完整行数，返回已有的行数"""
+        sizes = []
+        for name in self.columns:
+            path = _column_path(self.directory, name)
+            sizes.append(os.path.getsize(path) if os.path.exists(path) else 0)
+        count = min(sizes) // ITEM_SIZE
+        for name, size in zip(self.columns, sizes):
+            if size != count * ITEM_SIZE:
+                with open(_column_path(self.directory, name), 'r+b') as f:
+                    f.truncate(count * ITEM_SIZE)
+        return count
+
+    def append(self, ts, values):
+        """追加一行：ts为时间戳（秒），values为 {指标: 数值}，缺失或非数值的指标记为NaN"""
+        with self._lock:
+            if self.closed:
+                return False
+            ts = float(ts)
+            row = [_to_float(values.get(name)) for name in self.metrics]
+            self._buffers[TIMESTAMP_COLUMN].append(ts)
+            for name, value in zip(self.metrics, row):
+                self._buffers[name].append(value)
+            for tier in self.rollups:
+                tier.add(ts, row)
+            if self.sketches is not None:
+                self.sketches.add_row(row)
+            if self.scorer is not None:
+                self.scorer.add(*(None if i is None else row[i] for i in self._score_index))
+            self.count += 1
+            self.last_ts = ts
+            if (len(self._buffers[TIMESTAMP_COLUMN]) >= self.batch_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush_locked()
+            return True
+
+    def append_sample(self, data, ts=None):
+        """追加一条 performance_data 事件数据"""
+        return self.append(time.time() if ts is None else ts, data)
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self.closed and len(self._buffers[TIMESTAMP_COLUMN]):
+            # 先写指标列、最后写时间戳列，读取方以最短列为准，不会读到不完整的行
+            for name in self.metrics + (TIMESTAMP_COLUMN,):
+                buffer = self._buffers[name]
+                self._files[name].write(buffer.tobytes())
+                self._files[name].flush()
+                del buffer[:]
+        for tier in self.rollups:
+            tier.writer.flush()
+        self._last_flush = time.monotonic()
+
+    def update_meta(self, fields):
+        """更新会话信息并写盘"""
+        with self._lock:
+            self.meta.update(fields)
+            _write_meta(self.directory, self.meta)
+
+    def quantiles(self, percentiles=DEFAULT_PERCENTILES):
+        """当前各指标的样本数、平均/最小/最大值和分位数"""
+        with self._lock:
+            return self.sketches.summary(percentiles) if self.sketches is not None else {}
+
+    def scores(self):
+        """性能评分：current 为最新样本的评分，session 为会话平均评分"""
+        with self._lock:
+            if self.scorer is None:
+                return {'current': None, 'session': None}
+            return {'current': self.scorer.current, 'session': self.scorer.summary()}
+
+    def pending_rollup(self, seconds):
+        """汇总层级中尚未结束的时间桶 (ts, values)，没有时返回None"""
+        with self._lock:
+            for tier in self.rollups:
+                if tier.seconds == seconds:
+                    return tier.pending()
+        return None
+
+    def close(self):
+        """写完缓冲并关闭列文件，记录结束时间"""
+        with self._lock:
+            if self.closed:
+                return
+            self._flush_locked()
+            self.closed = True
+            for f in self._files.values():
+                f.close()
+            for tier in self.rollups:
+                tier.close()
+            if self.sketches is not None:
+                _write_sketches(self.directory, self.sketches)
+            if self.scorer is not None:
+                self.meta['score'] = self.scorer.summary()
+            self.meta['ended_at'] = time.time()
+            self.meta['samples'] = self.count
+            self.meta['last_ts'] = self.last_ts
+            _write_meta(self.directory, self.meta)
+
+
+class RollupTier(object):
+    """一个汇总层级：同一时间桶内的样本汇总为一行 min/max/avg，桶结束时追加到层级的列文件"""
+
+    def __init__(self, directory, seconds, metrics, batch_size=64, flush_interval=5.0):
+        self.seconds = seconds
+        self.metrics = tuple(metrics)
+        tier_dir = rollup_dir(directory, seconds)
+        os.makedirs(tier_dir, exist_ok=True)
+        meta = _read_meta(tier_dir) or {
+            'version': STORE_VERSION,
+            'resolution': seconds,
+            'metrics': rollup_columns(self.metrics),
+            'byteorder': sys.byteorder,
+        }
+        _write_meta(tier_dir, meta)
+        self.writer = SessionWriter(tier_dir, meta, batch_size, flush_interval, rollups=(), aggregates=False)
+        self.bucket = None
+        self.samples = 0
+        self._stats = None
+
+    def add(self, ts, row):
+        """加入一个样本（row与metrics一一对应），进入新的时间桶时把上一个桶写出"""
+        bucket = math.floor(ts / self.seconds) * self.seconds
+        if self.bucket is None or bucket > self.bucket:
+            self._emit()
+            self.bucket = bucket
+            self.samples = 0
+            self._stats = [[math.inf, -math.inf, 0.0, 0] for _ in self.metrics]
+        # 时钟回拨的样本归入当前桶
+        self.samples += 1
+        for stats, value in zip(self._stats, row):
+            if math.isnan(value):
+                continue
+            if value < stats[0]:
+                stats[0] = value
+            if value > stats[1]:
+                stats[1] = value
+            stats[2] += value
+            stats[3] += 1
+
+    def _values(self):
+        values = {COUNT_COLUMN: self.samples}
+        for name, (low, high, total, count) in zip(self.metrics, self._stats):
+            values[f'{name}.min'] = low if count else math.nan
+            values[f'{name}.max'] = high if count else math.nan
+            values[f'{name}.avg'] = total / count if count else math.nan
+        return values
+
+    def pending(self):
+        if self.bucket is None or not self.samples:
+            return None
+        return self.bucket, self._values()
+
+    def _emit(self):
+        if self.bucket is not None and self.samples:
+            self.writer.append(self.bucket, self._values())
+
+    def close(self):
+        self._emit()
+        self.bucket = None
+        self.writer.close()
+
+
+class SessionReader(object):
+    """mmap映射的会话只读视图，行数为打开时各列的最短长度
+
+    pending 为汇总层级中尚未结束的时间桶 (ts, values)，read() 时追加在末尾。
+    """
+
+    def __init__(self, directory, meta, pending=None):
+        self.directory = directory
+        self.meta = meta
+        self.resolution = meta.get('resolution', 0)
+        self.pending = pending
+        self.metrics = tuple(meta['metrics'])
+        if meta.get('byteorder', sys.byteorder) != sys.byteorder:
+            raise ValueError(f"会话数据字节序为 {meta['byteorder']}，与本机不一致")
+        self._maps = {}
+        self._files = []
+        sizes = []
+        for name in (TIMESTAMP_COLUMN,) + self.metrics:
+            path = _column_path(directory, name)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            sizes.append(size)
+            if size:
+                f = open(path, 'rb')
+                self._files.append(f)
+                self._maps[name] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.count = min(sizes) // ITEM_SIZE
+        # 时间戳列的只读视图，用于二分查找
+        self._ts = memoryview(self._maps[TIMESTAMP_COLUMN]).cast('B')[:self.count * ITEM_SIZE].cast('d') \
+            if self.count else None
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._ts is not None:
+            self._ts.release()
+            self._ts = None
+        for m in self._maps.values():
+            m.close()
+        for f in self._files:
+            f.close()
+        self._maps, self._files = {}, []
+
+    def index_range(self, start=None, end=None):
+        """时间范围 [start, end] 对应的行号区间 (i0, i1)，i1不包含"""
+        if not self.count:
+            return 0, 0
+        i0 = 0 if start is None else bisect.bisect_left(self._ts, start)
+        i1 = self.count if end is None else bisect.bisect_right(self._ts, end)
+        return i0, max(i0, i1)
+
+    def column(self, name, i0=0, i1=None):
+        """读取一列的 [i0, i1) 行（复制为array('d')，不持有映射）"""
+        i1 = self.count if i1 is None else min(i1, self.count)
+        result = array('d')
+        if name not in self._maps or i0 >= i1:
+            return result
+        result.frombytes(self._maps[name][i0 * ITEM_SIZE:i1 * ITEM_SIZE])
+        return result
+
+    def timestamps(self, i0=0, i1=None):
+        return self.column(TIMESTAMP_COLUMN, i0, i1)
+
+    def read(self, metrics=None, start=None, end=None):
+        """读取时间范围内的时间戳和指标列：返回 (timestamps, {指标: array})"""
+        metrics = self.metrics if metrics is None else [m for m in metrics if m in self.metrics]
+        i0, i1 = self.index_range(start, end)
+        timestamps, columns = self.timestamps(i0, i1), {name: self.column(name, i0, i1) for name in metrics}
+        if self.pending is not None:
+            ts, values = self.pending
+            last = self._ts[self.count - 1] if self.count else None
+            if (last is None or ts > last) and (start is None or ts >= start) and (end is None or ts <= end):
+                timestamps.append(ts)
+                for name in metrics:
+                    columns[name].append(_to_float(values.get(name)))
+        return timestamps, columns
+
+
+def _write_meta(directory, meta):
+    temp_path = os.path.join(directory, 'meta.json.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(temp_path, os.path.join(directory, 'meta.json'))
+
+
+def _read_meta(directory):
+    try:
+        with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class SessionStore(object):
+    """所有会话的存储根目录，管理正在记录的会话的写入器
+
+    catalog 为可选的会话编目（SessionCatalog），会话创建、信息更新、结束和删除时同步更新。
+    """
+
+    def __init__(self, root_dir, batch_size=64, flush_interval=5.0, catalog=None):
+        self.root_dir = root_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._writers = {}  # session_id -> SessionWriter
+        os.makedirs(root_dir, exist_ok=True)
+        if catalog is not None:
+            self.sync_catalog()
+        # 进程退出时写完缓冲中的数据
+        atexit.register(self.close_all)
+
+    def _session_dir(self, session_id):
+        session_id = str(session_id)
+        if not session_id or os.sep in session_id or '/' in session_id or session_id.startswith('.'):
+            raise ValueError(f"无效的会话ID: {session_id}")
+        return os.path.join(self.root_dir, session_id)
+
+    def create(self, session_id, platform, device=None, app=None, metrics=IOS_METRICS, started_at=None, info=None):
+        """开始记录一个会话，返回其写入器（同一会话重复调用返回同一个写入器）
+
+        Args:
+            info: 其他会话信息，如 device_name/device_model/os_version/app_version，
+                  以及评分阈值 score_thresholds（{'cpu': %, 'memory': MB}）
+        """
+        directory = self._session_dir(session_id)
+        with self._lock:
+            writer = self._writers.get(session_id)
+            if writer is not None:
+                return writer
+            meta = _read_meta(directory) or {
+                'version': STORE_VERSION,
+                'session_id': session_id,
+                'platform': platform,
+                'device': device,
+                'app': app,
+                'metrics': list(metrics),
+                'byteorder': sys.byteorder,
+                'started_at': started_at if started_at is not None else time.time(),
+                'ended_at': None,
+                'samples': 0,
+            }
+            meta.update({k: v for k, v in (info or {}).items() if v is not None})
+            meta['ended_at'] = None
+            os.makedirs(directory, exist_ok=True)
+            _write_meta(directory, meta)
+            writer = SessionWriter(directory, meta, self.batch_size, self.flush_interval)
+            self._writers[session_id] = writer
+        self._catalog_put(session_id)
+        return writer
+
+    def writer(self, session_id):
+        with self._lock:
+            return self._writers.get(session_id)
+
+    def close(self, session_id):
+        """结束记录一个会话（会话信息中记录摘要统计）"""
+        with self._lock:
+            writer = self._writers.pop(session_id, None)
+        if writer is not None:
+            writer.close()
+            self.update_meta(session_id, summary=self.summarize(session_id))
+
+    def close_all(self):
+        with self._lock:
+            session_ids = list(self._writers)
+        for session_id in session_ids:
+            self.close(session_id)
+
+    def update_meta(self, session_id, **fields):
+        """更新会话信息（如设备型号、系统版本、页面上的场景和标签）并同步到编目，会话不存在返回None"""
+        writer = self.writer(session_id)
+        if writer is not None:
+            writer.update_meta(fields)
+        else:
+            directory = self._session_dir(session_id)
+            with self._lock:
+                meta = _read_meta(directory)
+                if meta is None:
+                    return None
+                meta.update(fields)
+                _write_meta(directory, meta)
+        return self._catalog_put(session_id)
+
+    def _catalog_put(self, session_id):
+        meta = self.get_meta(session_id)
+        if self.catalog is not None and meta is not None:
+            self.catalog.put(meta)
+        return meta
+
+    def sync_catalog(self):
+        """编目与存储目录对齐：补入编目中没有的会话（如建立编目之前记录的），删除目录已不存在的条目"""
+        cataloged = self.catalog.session_ids()
+        existing = set()
+        for name in os.listdir(self.root_dir):
+            if not os.path.isdir(os.path.join(self.root_dir, name)):
+                continue
+            existing.add(name)
+            if name not in cataloged:
+                self._catalog_put(name)
+        for session_id in cataloged - existing:
+            self.catalog.remove(session_id)
+
+    def summarize(self, session_id):
+        """由最粗的汇总层级计算会话摘要：时长和各指标的平均/最小/最大值"""
+        meta = self.get_meta(session_id)
+        try:
+            with self.open(session_id) as reader:
+                timestamps = reader.timestamps(0, 1) + reader.timestamps(len(reader) - 1) if len(reader) else []
+            with self.open(session_id, max(ROLLUP_TIERS)) as reader:
+                _, columns = reader.read()
+        except KeyError:
+            return {'duration': 0.0, 'metrics': {}}
+        summary = {'duration': timestamps[-1] - timestamps[0] if timestamps else 0.0, 'metrics': {}}
+        counts = columns.get(COUNT_COLUMN, [])
+        for name in meta['metrics']:
+            total = weight = 0.0
+            low = high = None
+            rows = zip(columns.get(f'{name}.avg', []), columns.get(f'{name}.min', []),
+                       columns.get(f'{name}.max', []), counts)
+            for avg, bucket_min, bucket_max, count in rows:
+                if math.isnan(avg):
+                    continue
+                total += avg * count
+                weight += count
+                low = bucket_min if low is None else min(low, bucket_min)
+                high = bucket_max if high is None else max(high, bucket_max)
+            if weight:
+                summary['metrics'][name] = {'avg': round(total / weight, 2), 'min': low, 'max': high}
+        return summary
+
+    def quantiles(self, session_id, percentiles=DEFAULT_PERCENTILES):
+        """会话各指标的分位数统计（正在记录的会话为当前值），不存在时抛出KeyError
+
+        Returns:
+            dict: {指标: {'count', 'mean', 'min', 'max', 'p50', 'p90', 'p99'}}，没有有效样本的指标不输出
+        """
+        writer = self.writer(session_id)
+        if writer is not None:
+            return writer.quantiles(percentiles)
+        directory = self._session_dir(session_id)
+        meta = _read_meta(directory)
+        if meta is None:
+            raise KeyError(session_id)
+        with self.open(session_id) as reader:
+            count = len(reader)
+        return _load_sketches(directory, meta['metrics'], count).summary(percentiles)
+
+    def scores(self, session_id):
+        """会话的性能评分 {'current', 'session'}，不存在时抛出KeyError
+
+        已结束的会话直接取会话信息中记录的评分（current为None）；记录评分之前的会话由数据重新计算。
+        """
+        writer = self.writer(session_id)
+        if writer is not None:
+            return writer.scores()
+        directory = self._session_dir(session_id)
+        meta = _read_meta(directory)
+        if meta is None:
+            raise KeyError(session_id)
+        if meta.get('score'):
+            return {'current': None, 'session': meta['score']}
+        with self.open(session_id) as reader:
+            count = len(reader)
+        scorer = _replay_scores(directory, meta, count)
+        return {'current': scorer.current, 'session': scorer.summary()}
+
+    def get_meta(self, session_id):
+        """会话信息（含当前行数和是否仍在记录），不存在返回None"""
+        writer = self.writer(session_id)
+        if writer is not None:
+            meta = dict(writer.meta, samples=writer.count, last_ts=writer.last_ts)
+            if writer.scorer is not None:
+                meta['score'] = writer.scores()['session']
+        else:
+            meta = _read_meta(self._session_dir(session_id))
+            if meta is None:
+                return None
+            meta = dict(meta)
+        meta['recording'] = writer is not None
+        return meta
+
+    def open(self, session_id, resolution=0):
+        """打开会话的只读视图（正在记录的会话先把缓冲写盘），不存在时抛出KeyError
+
+        Args:
+            resolution: 0为原始数据，否则为 ROLLUP_TIERS 中的汇总层级（秒），
+                        汇总层级的列名为 <指标>.min/.max/.avg 和 count
+        """
+        directory = self._session_dir(session_id)
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"不支持的分辨率: {resolution}，可选 {RESOLUTIONS}")
+        if _read_meta(directory) is None:
+            raise KeyError(session_id)
+        writer = self.writer(session_id)
+        pending = None
+        if writer is not None:
+            writer.flush()
+            if resolution:
+                pending = writer.pending_rollup(resolution)
+        if resolution:
+            directory = rollup_dir(directory, resolution)
+        meta = _read_meta(directory)
+        if meta is None:
+            raise KeyError(session_id)
+        return SessionReader(directory, meta, pending)
+
+    def pick_resolution(self, session_id, start=None, end=None, max_points=1000):
+        """时间范围内行数不超过 max_points*OVERSAMPLE 的最细分辨率（都超出时取最粗的层级）"""
+        for resolution in RESOLUTIONS:
+            try:
+                with self.open(session_id, resolution) as reader:
+                    i0, i1 = reader.index_range(start, end)
+            except KeyError:
+                continue
+            if i1 - i0 <= max_points * OVERSAMPLE:
+                return resolution
+        return resolution
+
+    def read_series(self, session_id, metrics=None, start=None, end=None, max_points=1000, resolution=None,
+                    align=False):
+        """读取时间范围内的指标序列，自动选择分辨率并用LTTB把每个指标降到最多 max_points 个点
+
+        align为True时按第一个指标选点，所有指标使用相同的时间点（便于页面共用横坐标）
+
+        Returns:
+            dict: resolution, series {指标: {'ts': [...], 'value': [...], 'min': [...], 'max': [...]}}，
+                  原始分辨率没有min/max，缺失值为None
+        """
+        if resolution is None:
+            resolution = self.pick_resolution(session_id, start, end, max_points)
+        with self.open(session_id, resolution) as reader:
+            source = reader.metrics if not resolution else tuple(
+                m[:-len('.avg')] for m in reader.metrics if m.endswith('.avg'))
+            metrics = source if metrics is None else [m for m in metrics if m in source]
+            if resolution:
+                columns = [f'{m}.{stat}' for m in metrics for stat in ROLLUP_STATS]
+            else:
+                columns = list(metrics)
+            timestamps, data = reader.read(columns, start, end)
+
+        def clean(values, indices):
+            return [None if math.isnan(values[i]) else values[i] for i in indices]
+
+        shared = None
+        if align and metrics:
+            first = data[f'{metrics[0]}.avg'] if resolution else data[metrics[0]]
+            shared = lttb(timestamps, first, max_points)
+            if not shared and len(timestamps):
+                step = max(1, len(timestamps) // max_points)
+                shared = list(range(0, len(timestamps), step))[:max_points]
+        series = {}
+        for name in metrics:
+            values = data[f'{name}.avg'] if resolution else data[name]
+            indices = shared if shared is not None else lttb(timestamps, values, max_points)
+            item = {'ts': [timestamps[i] for i in indices], 'value': clean(values, indices)}
+            if resolution:
+                item['min'] = clean(data[f'{name}.min'], indices)
+                item['max'] = clean(data[f'{name}.max'], indices)
+            series[name] = item
+        return {'resolution': resolution, 'series': series}
+
+    def list_sessions(self, platform=None):
+        """所有已记录会话的信息，按开始时间从新到旧"""
+        sessions = []
+        for name in os.listdir(self.root_dir):
+            if not os.path.isdir(os.path.join(self.root_dir, name)):
+                continue
+            meta = self.get_meta(name)
+            if meta is None or (platform and meta.get('platform') != platform):
+                continue
+            sessions.append(meta)
+        sessions.sort(key=lambda m: m.get('started_at') or 0, reverse=True)
+        return sessions
+
+    def delete(self, session_id):
+        """删除会话数据（正在记录的会话先停止记录）"""
+        self.close(session_id)
+        directory = self._session_dir(session_id)
+        if self.catalog is not None:
+            self.catalog.remove(session_id)
+        if not os.path.isdir(directory):
+            return False
+        shutil.rmtree(directory)
+        return True
+
+
+def parse_series_args(args):
+    """把HTTP查询参数转换为 SessionStore.read_series 的参数
+
+    支持: metrics（逗号分隔）, from, to（时间戳或'YYYY-MM-DD HH:MM:SS'）, max_points, resolution（0/10/60，默认自动）,
+          align（1时所有指标使用相同的时间点）
+    """
+    metrics = args.get('metrics')
+    resolution = args.get('resolution')
+    return {
+        'metrics': [m for m in metrics.split(',') if m] if metrics else None,
+        'start': parse_time(args.get('from')),
+        'end': parse_time(args.get('to')),
+        'max_points': max(10, min(int(args.get('max_points', 1000)), MAX_SERIES_POINTS)),
+        'resolution': None if resolution in (None, '', 'auto') else int(resolution),
+        'align': args.get('align') in ('1', 'true'),
+    }
+
+
+def series_cache_info(meta, params):
+    """历史序列响应的 (ETag, Cache-Control)
+
+    已结束的会话、或结束时间早于最后一个汇总桶的时间范围，内容不会再变化，可以长期缓存；
+    其余情况ETag包含当前行数，有新数据时失效。
+    """
+    last_ts = meta.get('last_ts')
+    closed = not meta.get('recording') or (
+        params.get('end') is not None and last_ts is not None and params['end'] < last_ts - max(ROLLUP_TIERS))
+    key = [meta['session_id'], params.get('metrics'), params.get('start'), params.get('end'),
+           params.get('max_points'), params.get('resolution'), params.get('align')]
+    if not closed:
+        key.append(meta.get('samples'))
+    etag = hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest()
+    return etag, 'public, max-age=86400' if closed else 'no-cache'
+
+
+def iter_series_json(session_id, result):
+    """按指标分块输出 read_series 的结果（JSON），避免一次拼出整个响应"""
+    yield json.dumps({'success': True, 'session_id': session_id, 'resolution': result['resolution']})[:-1]
+    yield ', "series": {'
+    for i, (name, item) in enumerate(result['series'].items()):
+        yield (', ' if i else '') + json.dumps(name) + ': ' + json.dumps(item)
+    yield '}}'
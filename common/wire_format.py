@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# 实时性能数据的二进制传输格式（固定struct布局，小端，只依赖标准库）
+# 客户端通过 set_wire_format 选择 'struct' 后，performance_data 改为 performance_binary 事件发送二进制帧，
+# 合并发送的 performance_batch 帧中的性能数据放在 samples 字段；不支持时仍使用JSON。
+#
+# 帧头: 'PM' 版本(u8) 标志(u8) 样本数(u16) 指标掩码(u16) 会话ID长度(u8)+会话ID 进程名长度(u8)+进程名（UTF-8）
+# 样本: 时间戳(f64, 毫秒) PID(i32, -1为无) 掩码中每个指标一个f32（缺失为NaN） [评分: cpu/memory/fps/overall 各u8]
+# 评分字节的低7位为四舍五入后的分数；等级按原始分数判定，四舍五入跨过等级边界（如59.75显示60但为D）时置最高位。
+import math
+import struct
+import time
+
+from common.performance_score import grade_from_score
+
+WIRE_FORMATS = ('json', 'struct')
+BINARY_EVENT = 'performance_binary'
+
+MAGIC = b'PM'
+VERSION = 1
+# 指标在掩码中的位置（新增指标只能追加到末尾）
+WIRE_METRICS = ('cpu', 'memory', 'fps', 'threads', 'disk_reads', 'disk_writes',
+                'system_cpu', 'system_memory_used', 'system_memory_total')
+SCORE_FIELDS = ('cpu', 'memory', 'fps', 'overall')
+FLAG_SCORE = 1  # 样本带评分
+FLAG_FULL_TIME = 2  # time 字段为 'YYYY-MM-DD HH:MM:SS'（否则为 'HH:MM:SS'）
+NO_SCORE = 255
+GRADE_BELOW = 0x80  # 评分字节最高位：等级比按分数判定的低一档
+
+HEADER = struct.Struct('<2sBBHH')
+SAMPLE_HEAD = struct.Struct('<di')
+
+
+def parse_wire_format(value):
+    """客户端请求的传输格式，不支持的格式回退为JSON"""
+    value = str(value or '').lower()
+    return value if value in WIRE_FORMATS else 'json'
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _pid(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+
+def _text(value):
+    return str(value or '').encode('utf-8')[:255]
+
+
+def _score_byte(item):
+    if not item or item.get('score') is None:
+        return NO_SCORE
+    value = max(0, min(int(item['score']), 100))
+    grade = item.get('grade')
+    if grade is not None and grade != grade_from_score(value):
+        value |= GRADE_BELOW
+    return value
+
+
+def _score_item(value):
+    score = value & ~GRADE_BELOW
+    return {'score': score, 'grade': grade_from_score(score - 1 if value & GRADE_BELOW else score)}
+
+
+def encode_samples(samples):
+    """把一组 performance_data 数据编码为一个二进制帧（会话ID和进程名取第一条）"""
+    samples = list(samples)[:0xFFFF]
+    mask = 0
+    flags = 0
+    for sample in samples:
+        for bit, name in enumerate(WIRE_METRICS):
+            if sample.get(name) is not None:
+                mask |= 1 << bit
+        if isinstance(sample.get('score'), dict):
+            flags |= FLAG_SCORE
+    metrics = [name for bit, name in enumerate(WIRE_METRICS) if mask & (1 << bit)]
+    first = samples[0] if samples else {}
+    if len(str(first.get('time') or '')) > 8:
+        flags |= FLAG_FULL_TIME
+    session_id, name = _text(first.get('session_id')), _text(first.get('name'))
+
+    parts = [HEADER.pack(MAGIC, VERSION, flags, len(samples), mask),
+             bytes([len(session_id)]), session_id, bytes([len(name)]), name]
+    values = struct.Struct(f'<{len(metrics)}f')
+    for sample in samples:
+        parts.append(SAMPLE_HEAD.pack(_float(sample.get('ts', time.time())) * 1000.0, _pid(sample.get('pid'))))
+        parts.append(values.pack(*(_float(sample.get(name)) for name in metrics)))
+        if flags & FLAG_SCORE:
+            score = sample.get('score') or {}
+            parts.append(bytes(_score_byte(score.get(field)) for field in SCORE_FIELDS))
+    return b''.join(parts)
+
+
+def decode_samples(frame):
+    """解码二进制帧为 performance_data 数据列表"""
+    magic, version, flags, count, mask = HEADER.unpack_from(frame, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('不是性能数据二进制帧')
+    offset = HEADER.size
+    texts = []
+    for _ in range(2):
+        length = frame[offset]
+        texts.append(bytes(frame[offset + 1:offset + 1 + length]).decode('utf-8', 'replace'))
+        offset += 1 + length
+    session_id, name = texts
+    metrics = [name for bit, name in enumerate(WIRE_METRICS) if mask & (1 << bit)]
+    values = struct.Struct(f'<{len(metrics)}f')
+    time_format = '%Y-%m-%d %H:%M:%S' if flags & FLAG_FULL_TIME else '%H:%M:%S'
+    samples = []
+    for _ in range(count):
+        ts_ms, pid = SAMPLE_HEAD.unpack_from(frame, offset)
+        offset += SAMPLE_HEAD.size
+        sample = {'session_id': session_id or None, 'name': name or None, 'ts': ts_ms / 1000.0,
+                  'time': time.strftime(time_format, time.localtime(ts_ms / 1000.0)),
+                  'pid': pid if pid >= 0 else None}
+        for metric, value in zip(metrics, values.unpack_from(frame, offset)):
+            sample[metric] = None if math.isnan(value) else value
+        offset += values.size
+        if flags & FLAG_SCORE:
+            score = {field: _score_item(value) for field, value in zip(SCORE_FIELDS, frame[offset:offset + 4])
+                     if value != NO_SCORE}
+            if score:
+                sample['score'] = score
+            offset += len(SCORE_FIELDS)
+        samples.append(sample)
+    return samples
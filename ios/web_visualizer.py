@@ -11,301 +11,76 @@ import subprocess
 import sys
 import threading
 import time
+import uuid
 from datetime import datetime
-from flask import Flask, render_template, request
-from flask_socketio import SocketIO, emit
-
-# 导入iOS设备相关模块（与main.py完全一致）
-try:
-    import ios_device
-except ImportError:
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "py_ios_device"])
-try:
-    import pymobiledevice3
-except ImportError:
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "pymobiledevice3"])
-
-from ios_device.cli.base import InstrumentsBase
-from ios_device.cli.cli import print_json
-from ios_device.util.utils import convertBytes
-from ios_device.remote.remote_lockdown import RemoteLockdownClient
-
-# 内存泄漏检测算法
-class MemoryLeakDetector:
-    """内存泄漏检测器"""
-    
-    def __init__(self):
-        self.memory_history = []
-        self.leak_threshold = 50  # MB
-        self.time_window = 300    # 5分钟
-        self.min_samples = 10
-        self.growth_rate_threshold = 0.5  # MB/分钟
-        self.last_alert_time = 0
-        self.alert_cooldown = 60  # 1分钟冷却
-        
-        # 新增：基线追踪和回收检测
-        self.baseline_memory = None  # 初始基线内存
-        self.peak_memory = 0  # 峰值内存
-        self.last_drop_time = None  # 上次内存下降的时间
-        self.no_drop_threshold = 120  # 120秒内没有内存下降才认为可能泄漏
-        self.drop_threshold = 20  # 内存下降超过20MB认为是回收
-        
-    def add_memory_sample(self, memory_mb, timestamp):
-        """添加内存样本数据"""
-        # 设置初始基线
-        if self.baseline_memory is None:
-            self.baseline_memory = memory_mb
-        
-        # 检测内存下降（回收）
-        if len(self.memory_history) > 0:
-            last_memory = self.memory_history[-1]['memory']
-            # 如果内存下降超过阈值，认为发生了回收
-            if last_memory - memory_mb > self.drop_threshold:
-                self.last_drop_time = timestamp
-                print(f"🔄 检测到内存回收: {last_memory:.1f}MB -> {memory_mb:.1f}MB (下降{last_memory - memory_mb:.1f}MB)")
-        
-        # 更新峰值
-        if memory_mb > self.peak_memory:
-            self.peak_memory = memory_mb
-        
-        self.memory_history.append({
-            'memory': memory_mb,
-            'timestamp': timestamp,
-            'time_str': datetime.fromtimestamp(timestamp).strftime('%H:%M:%S')
-        })
-        
-        # 清理超出时间窗口的旧数据
-        current_time = timestamp
-        self.memory_history = [
-            sample for sample in self.memory_history 
-            if current_time - sample['timestamp'] <= self.time_window
-        ]
-        
-    def detect_memory_leak(self):
-        """检测内存泄漏 - 改进版：考虑实际使用场景"""
-        if len(self.memory_history) < self.min_samples:
-            return None
-        
-        current_time = time.time()
-        current_memory = self.memory_history[-1]['memory']
-        
-        # 关键改进1：检查是否有内存回收
-        # 如果最近有内存下降（回收），说明不是泄漏，是正常的加载-回收循环
-        if self.last_drop_time and (current_time - self.last_drop_time < self.no_drop_threshold):
-            # 最近有回收，不报警
-            return None
-        
-        # 关键改进2：只有在长时间持续增长且没有回收时才报警
-        leak_info = self._analyze_memory_trend()
-        
-        if not leak_info or not leak_info['is_leak']:
-            return None
-        
-        # 关键改进3：检查是否超出合理范围
-        # 如果当前内存比基线高太多，且长时间没有回收，才认为是泄漏
-        memory_increase_from_baseline = current_memory - self.baseline_memory
-        
-        # 判断条件：
-        # 1. 内存持续增长
-        # 2. 超过基线50MB以上
-        # 3. 120秒内没有发生内存回收
-        if (leak_info['is_leak'] and 
-            memory_increase_from_baseline > self.leak_threshold and
-            (self.last_drop_time is None or current_time - self.last_drop_time > self.no_drop_threshold)):
-            
-            # 检查是否需要发送提醒（冷却时间）
-            if current_time - self.last_alert_time > self.alert_cooldown:
-                self.last_alert_time = current_time
-                leak_info['baseline_memory'] = self.baseline_memory
-                leak_info['no_recycle_duration'] = (
-                    current_time - self.last_drop_time if self.last_drop_time 
-                    else current_time - self.memory_history[0]['timestamp']
-                )
-                return leak_info
-            
-        return None
-        
-    def _analyze_memory_trend(self):
-        """分析内存使用趋势"""
-        if len(self.memory_history) < self.min_samples:
-            return None
-            
-        # 获取最近的内存数据
-        recent_data = self.memory_history[-self.min_samples:]
-        
-        # 计算线性回归斜率（内存增长率）
-        x_values = [i for i in range(len(recent_data))]
-        y_values = [sample['memory'] for sample in recent_data]
-        
-        # 简单线性回归计算斜率
-        n = len(x_values)
-        sum_x = sum(x_values)
-        sum_y = sum(y_values)
-        sum_xy = sum(x * y for x, y in zip(x_values, y_values))
-        sum_x2 = sum(x * x for x in x_values)
-        
-        # 斜率计算
-        if n * sum_x2 - sum_x * sum_x != 0:
-            slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x * sum_x)
-        else:
-            slope = 0
-            
-        # 将斜率转换为每分钟MB增长率
-        time_span_minutes = (recent_data[-1]['timestamp'] - recent_data[0]['timestamp']) / 60
-        if time_span_minutes > 0:
-            growth_rate_per_minute = slope * (len(recent_data) / time_span_minutes)
-        else:
-            growth_rate_per_minute = 0
-            
-        # 计算当前内存使用量
-        current_memory = recent_data[-1]['memory']
-        max_memory = max(y_values)
-        min_memory = min(y_values)
-        memory_increase = max_memory - min_memory
-        
-        # 判断是否存在内存泄漏
-        is_leak = (
-            growth_rate_per_minute > self.growth_rate_threshold and
-            memory_increase > self.leak_threshold and
-            current_memory > min_memory + self.leak_threshold
-        )
-        
-        return {
-            'is_leak': is_leak,
-            'current_memory': current_memory,
-            'growth_rate': round(growth_rate_per_minute, 2),
-            'memory_increase': round(memory_increase, 2),
-            'time_span': round(time_span_minutes, 1),
-            'samples_count': len(recent_data),
-            'severity': self._calculate_severity(growth_rate_per_minute, memory_increase),
-            'recommendation': self._get_recommendation(growth_rate_per_minute, memory_increase)
-        }
-        
-    def _calculate_severity(self, growth_rate, memory_increase):
-        """计算泄漏严重程度"""
-        if growth_rate > 2.0 or memory_increase > 200:
-            return 'critical'  # 严重
-        elif growth_rate > 1.0 or memory_increase > 100:
-            return 'warning'   # 警告
-        else:
-            return 'minor'     # 轻微
-            
-    def _get_recommendation(self, growth_rate, memory_increase):
-        """获取优化建议 - 改进版"""
-        recommendations = []
-        
-        # 强调：长时间没有回收才是问题
-        recommendations.append("⚠️ 关键问题：长时间内存持续增长且没有回收")
-        
-        if growth_rate > 2.0:
-            recommendations.append("内存增长率过快，建议检查是否有循环引用或监听器未移除")
-        elif growth_rate > 1.0:
-            recommendations.append("内存持续增长，建议检查对象生命周期管理")
-            
-        if memory_increase > 200:
-            recommendations.append("内存增长超过200MB，建议检查：")
-            recommendations.append("  • 大对象（图片、视频）是否正确释放")
-            recommendations.append("  • 缓存策略是否合理")
-        elif memory_increase > 100:
-            recommendations.append("建议检查资源释放逻辑（如页面切换、播放器销毁）")
-        
-        # 提示正常场景
-        recommendations.append("💡 注意：进入播放器等场景的内存增长是正常的")
-        recommendations.append("💡 问题关键：退出后内存是否能回收")
-            
-        return recommendations
+from flask import Flask, Response, render_template, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 
-# 全局内存泄漏检测器实例
-leak_detector = MemoryLeakDetector()
+_startup_begin = time.perf_counter()
 
-# 内存泄漏事件日志记录
-class MemoryLeakLogger:
-    """内存泄漏事件日志记录器"""
-    
-    def __init__(self, log_file_path=None):
-        self.log_file_path = log_file_path or os.path.join(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 
-            'logs', 
-            'memory_leak_events.log'
-        )
-        self.ensure_log_directory()
-        
-    def ensure_log_directory(self):
-        """确保日志目录存在"""
-        log_dir = os.path.dirname(self.log_file_path)
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir, exist_ok=True)
-    
-    def log_leak_event(self, leak_info, app_info=None):
-        """记录内存泄漏事件"""
-        try:
-            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            log_entry = {
-                'timestamp': timestamp,
-                'event_type': 'memory_leak_detected',
-                'severity': leak_info['severity'],
-                'current_memory': leak_info['current_memory'],
-                'growth_rate': leak_info['growth_rate'],
-                'memory_increase': leak_info['memory_increase'],
-                'time_span': leak_info['time_span'],
-                'samples_count': leak_info['samples_count'],
-                'recommendations': leak_info['recommendation'],
-                'app_info': app_info or {}
-            }
-            
-            # 写入日志文件
-            with open(self.log_file_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(log_entry, ensure_ascii=False) + '\n')
-            
-            print(f"📝 内存泄漏事件已记录到日志: {self.log_file_path}")
-            
-        except Exception as e:
-            print(f"❌ 记录内存泄漏事件失败: {e}")
-    
-    def get_recent_leak_events(self, limit=50):
-        """获取最近的内存泄漏事件"""
+# 获取项目根目录路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+# 跨平台内存泄漏检测核心（轻量模块，不依赖iOS设备栈）
+from common.memory_leak import MemoryLeakLogger
+from common.quantile_sketch import PUSH_INTERVAL as QUANTILE_PUSH_INTERVAL, parse_percentiles
+from common.detector_registry import LeakDetectorRegistry
+from common.leak_event_index import parse_query_args, parse_time
+from common.live_frames import LiveFrames, parse_refresh_interval
+from common.wire_format import parse_wire_format
+from common.session_export import CONTENT_TYPES, Annotations, export_filename, export_session
+from common.session_catalog import CATALOG_FILE_NAME, SessionCatalog, clean_annotations, parse_catalog_args
+from common.session_compare import compare_sessions
+from common.session_import import import_session
+from common.session_store import (IOS_METRICS, SessionStore, iter_series_json, parse_series_args,
+                                   series_cache_info)
+
+# iOS设备相关模块（py_ios_device / pymobiledevice3）较重，
+# 延迟到第一个iOS监控会话启动时再导入，见 load_ios_stack()
+InstrumentsBase = None
+print_json = None
+convertBytes = None
+RemoteLockdownClient = None
+_ios_stack_lock = threading.Lock()
+
+
+def load_ios_stack():
+    """按需导入iOS设备通信模块（与main.py的导入逻辑一致，只执行一次）"""
+    global InstrumentsBase, print_json, convertBytes, RemoteLockdownClient
+    if InstrumentsBase is not None:
+        return
+    with _ios_stack_lock:
+        if InstrumentsBase is not None:
+            return
+        begin = time.perf_counter()
         try:
-            if not os.path.exists(self.log_file_path):
-                return []
-            
-            events = []
-            with open(self.log_file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                
-            # 获取最后limit行
-            recent_lines = lines[-limit:] if len(lines) > limit else lines
-            
-            for line in recent_lines:
-                try:
-                    event = json.loads(line.strip())
-                    events.append(event)
-                except json.JSONDecodeError:
-                    continue
-            
-            return events
-            
-        except Exception as e:
-            print(f"❌ 读取内存泄漏事件日志失败: {e}")
-            return []
-    
-    def clear_log(self):
-        """清空日志文件"""
+            import ios_device
+        except ImportError:
+            subprocess.check_call([sys.executable, "-m", "pip", "install", "py_ios_device"])
         try:
-            with open(self.log_file_path, 'w', encoding='utf-8') as f:
-                f.write('')
-            print(f"🗑️ 内存泄漏事件日志已清空")
-        except Exception as e:
-            print(f"❌ 清空内存泄漏事件日志失败: {e}")
+            import pymobiledevice3
+        except ImportError:
+            subprocess.check_call([sys.executable, "-m", "pip", "install", "pymobiledevice3"])
 
-# 全局内存泄漏日志记录器实例
-leak_logger = MemoryLeakLogger()
+        from ios_device.cli.base import InstrumentsBase as _InstrumentsBase
+        from ios_device.cli.cli import print_json as _print_json
+        from ios_device.util.utils import convertBytes as _convertBytes
+        from ios_device.remote.remote_lockdown import RemoteLockdownClient as _RemoteLockdownClient
 
+        print_json = _print_json
+        convertBytes = _convertBytes
+        RemoteLockdownClient = _RemoteLockdownClient
+        InstrumentsBase = _InstrumentsBase  # 最后赋值，作为"已加载"标志
+        print(f"📦 iOS设备模块已加载，耗时 {(time.perf_counter() - begin) * 1000:.0f}ms")
 
-import os
 
-# 获取项目根目录路径
-project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 内存泄漏检测器注册表：按 (平台, 设备, 应用, PID) 为每个被监控进程维护独立的检测器
+leak_detectors = LeakDetectorRegistry()
+
+# 全局内存泄漏日志记录器实例
+leak_logger = MemoryLeakLogger()
 
 # 配置Flask应用，指定模板和静态文件路径
 app = Flask(__name__, 
@@ -321,15 +96,13 @@ socketio = SocketIO(app,
                   logger=False,            # 禁用日志减少干扰
                   engineio_logger=False)   # 禁用engineio日志
 
-# 全局变量存储性能数据
-performance_data = {
-    'cpu_data': [],
-    'memory_data': [],
-    'fps_data': [],
-    'disk_reads_data': [],
-    'disk_writes_data': [],
-    'threads_data': []
-}
+# 实时事件发送：默认每条立即发送，客户端选择刷新间隔后按间隔合并为一帧
+live_frames = LiveFrames(lambda event, data, room: socketio.emit(event, data, to=room))
+
+# 性能数据按会话持久化到服务端（每个指标一个列文件），刷新页面或重启服务后仍可读取
+# 会话信息同时写入会话编目（SQLite），可按设备型号/应用版本/标签等检索
+session_store = SessionStore(os.path.join(project_root, 'data', 'sessions'),
+                             catalog=SessionCatalog(os.path.join(project_root, 'data', CATALOG_FILE_NAME)))
 
 # 内存泄漏检测相关变量
 memory_leak_detector = {
@@ -343,10 +116,84 @@ memory_leak_detector = {
     'growth_rate_threshold': 0.5  # 内存增长率阈值（MB/分钟）
 }
 
-# 监控状态管理
-monitoring_active = True
-monitoring_threads = []
-performance_analyzer = None
+# 监控会话管理（每台设备一个会话，支持同时监控多台iPhone）
+class MonitoringSession(object):
+    """单个设备/应用的监控会话，拥有独立的分析器和Socket.IO房间（泄漏检测器由leak_detectors按进程管理）"""
+
+    def __init__(self, udid, bundle_id, owner_sid=None, info=None):
+        self.session_id = uuid.uuid4().hex[:12]
+        self.udid = udid
+        self.bundle_id = bundle_id
+        self.owner_sid = owner_sid  # 发起监控的客户端
+        self.room = f'session_{self.session_id}'
+        self.active = True
+        self.analyzer = None
+        self.threads = []
+        self.mode = None  # 'legacy' 或 'ios17'
+        self.started_at = time.time()
+        self.recorder = session_store.create(self.session_id, 'ios', udid, bundle_id, IOS_METRICS,
+                                             started_at=self.started_at, info=info)
+        self.quantiles_sent_at = 0.0
+        self.leak_pids = set()  # 本会话使用过泄漏检测器的进程PID
+
+    def leak_detector(self, pid):
+        """本会话监控进程的泄漏检测器（记录PID，停止会话时只释放这些检测器）"""
+        self.leak_pids.add(pid)
+        return leak_detectors.get('ios', self.udid, self.bundle_id, pid)
+
+    def emit(self, event, data):
+        """只向订阅了本会话的客户端发送事件（性能数据同时写入会话存储并附带性能评分，定期推送各指标分位数）"""
+        if isinstance(data, dict):
+            data.setdefault('session_id', self.session_id)
+            # 数值时间戳（秒）随数据发送，二进制传输格式使用
+            if event == 'performance_data' and self.recorder.append_sample(data, data.setdefault('ts', time.time())):
+                data['score'] = self.recorder.scores()['current']
+        live_frames.publish(self.room, event, data)
+        if event == 'performance_data' and time.monotonic() - self.quantiles_sent_at >= QUANTILE_PUSH_INTERVAL:
+            self.quantiles_sent_at = time.monotonic()
+            live_frames.publish(self.room, 'performance_quantiles', {'session_id': self.session_id,
+                                                                     'samples': self.recorder.count,
+                                                                     'metrics': self.recorder.quantiles()})
+
+    def stop(self):
+        """停止本会话的所有采集线程"""
+        self.active = False
+        if self.analyzer:
+            try:
+                if hasattr(self.analyzer, 'stop_performance_collection'):
+                    self.analyzer.stop_performance_collection()
+                if hasattr(self.analyzer, 'stop_fps_collection'):
+                    self.analyzer.stop_fps_collection()
+            except Exception as e:
+                print(f"DEBUG: 停止会话 {self.session_id} 的analyzer时出错: {e}")
+
+        for thread in self.threads:
+            if thread.is_alive() and thread is not threading.current_thread():
+                thread.join(timeout=2.0)
+                if thread.is_alive():
+                    print(f"DEBUG: 会话 {self.session_id} 的线程 {thread} 仍在运行")
+        self.threads.clear()
+        self.analyzer = None
+
+    def to_dict(self):
+        return {
+            'session_id': self.session_id,
+            'udid': self.udid,
+            'bundle_id': self.bundle_id,
+            'mode': self.mode,
+            'active': self.active,
+            'samples': self.recorder.count,
+            'started_at': datetime.fromtimestamp(self.started_at).strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+
+monitoring_sessions = {}  # session_id -> MonitoringSession
+sessions_lock = threading.Lock()
+
+# 隧道复用：同一台设备的多个会话共享一条pymobiledevice3隧道
+tunnel_managers = {}  # udid -> TunnelManager
+tunnel_locks = {}  # udid -> Lock，同一设备的隧道只启动一次，不同设备互不等待
+tunnels_lock = threading.Lock()  # 只保护上面两个字典
 
 
 # 完全复制main.py的TunnelManager类（逻辑一模一样）
@@ -417,9 +264,13 @@ class TunnelManager(object):
         
         return None
 
-    def get_tunnel(self):
+    def get_tunnel(self, udid=None):
         def start_tunnel():
-            rp = subprocess.Popen([sys.executable, "-m", "pymobiledevice3", "remote", "start-tunnel"],
+            cmd = [sys.executable, "-m", "pymobiledevice3", "remote", "start-tunnel"]
+            if udid:
+                # 多台设备同时连接时必须指定UDID，否则start-tunnel会交互式询问
+                cmd.extend(["--udid", udid])
+            rp = subprocess.Popen(cmd,
                                   stdout=subprocess.PIPE,
                                   stderr=subprocess.STDOUT)
             while not rp.poll():
@@ -449,20 +300,49 @@ class TunnelManager(object):
                 else:
                     time.sleep(0.1)
 
-        threading.Thread(target=start_tunnel).start()
+        threading.Thread(target=start_tunnel, daemon=True).start()
         self.start_event.wait(timeout=30)
 
 
+def get_shared_tunnel(udid):
+    """获取设备隧道，同一UDID已有可用隧道时直接复用
+
+    启动隧道最多等待30秒，只持有该设备的锁，其他设备的会话可以同时启动。
+    """
+    with tunnels_lock:
+        device_lock = tunnel_locks.setdefault(udid, threading.Lock())
+    with device_lock:
+        with tunnels_lock:
+            manager = tunnel_managers.get(udid)
+        if manager and manager.tunnel_host and not manager.tunnel_error:
+            print(f"♻️ 复用设备 {udid} 的已有隧道 {manager.tunnel_host}:{manager.tunnel_port}")
+            return manager
+        manager = TunnelManager()
+        manager.get_tunnel(udid)
+        if manager.tunnel_host and not manager.tunnel_error:
+            with tunnels_lock:
+                tunnel_managers[udid] = manager
+        return manager
+
+
 # 完全复制main.py的PerformanceAnalyzer类，但修改输出到Web（保持核心逻辑不变）
 class LegacyIOSPerformanceAnalyzer(object):
     """iOS 15-16系统的性能监控（使用pyidevice）"""
     
-    def __init__(self, udid=None):
+    def __init__(self, udid=None, session=None):
         self.udid = udid
+        self.session = session  # 所属监控会话
         self.is_monitoring = False
         self.last_data = None  # 最后一条数据
         self.heartbeat_timer = None  # 心跳定时器
     
+    def emit(self, event, data):
+        """发送事件到所属会话的房间（无会话时广播）"""
+        if self.session:
+            self.session.emit(event, data)
+        else:
+            socketio.emit(event, data)
+    
     def monitor_app_performance(self, bundle_id):
         """使用pyidevice监控应用性能 - 简化版本"""
         if not bundle_id:
@@ -470,7 +350,7 @@ class LegacyIOSPerformanceAnalyzer(object):
             return
             
         print(f"📱 开始监控应用 {bundle_id} (iOS 15-16兼容模式)")
-        socketio.emit('monitoring_started', {'bundle_id': bundle_id, 'mode': 'legacy'})
+        self.emit('monitoring_started', {'bundle_id': bundle_id, 'mode': 'legacy'})
         
         try:
             # 尝试不同的pyidevice命令格式
@@ -545,13 +425,13 @@ class LegacyIOSPerformanceAnalyzer(object):
                         'pid': 0,
                         'name': 'No data - pyidevice timeout'
                     }
-                    socketio.emit('performance_data', status_data)
+                    self.emit('performance_data', status_data)
                     socketio.sleep(0)
                     break
                 
         except Exception as e:
             print(f"❌ pyidevice监控失败: {e}")
-            socketio.emit('monitoring_error', {'error': str(e)})
+            self.emit('monitoring_error', {'error': str(e)})
     
     def parse_pyidevice_output(self, output):
         """解析pyidevice instruments appmonitor的输出"""
@@ -593,11 +473,13 @@ class LegacyIOSPerformanceAnalyzer(object):
                     }
                     
                     # 添加内存样本到泄漏检测器
+                    detector = (self.session.leak_detector(pid) if self.session
+                                else leak_detectors.get('ios', self.udid, 'legacy_mode', pid))
                     current_timestamp = time.time()
-                    leak_detector.add_memory_sample(memory, current_timestamp)
+                    detector.add_memory_sample(memory, current_timestamp)
                     
                     # 检测内存泄漏
-                    leak_info = leak_detector.detect_memory_leak()
+                    leak_info = detector.detect_memory_leak()
                     if leak_info:
                         print(f"🚨 检测到内存泄漏 (Legacy): {leak_info}")
                         
@@ -605,12 +487,13 @@ class LegacyIOSPerformanceAnalyzer(object):
                         app_info = {
                             'pid': pid,
                             'name': name,
-                            'bundle_id': 'legacy_mode'
+                            'bundle_id': self.session.bundle_id if self.session else 'legacy_mode',
+                            'udid': self.udid
                         }
                         leak_logger.log_leak_event(leak_info, app_info)
                         
                         # 发送内存泄漏提醒
-                        socketio.emit('memory_leak_alert', {
+                        self.emit('memory_leak_alert', {
                             'detected': True,
                             'severity': leak_info['severity'],
                             'current_memory': leak_info['current_memory'],
@@ -618,6 +501,9 @@ class LegacyIOSPerformanceAnalyzer(object):
                             'memory_increase': leak_info['memory_increase'],
                             'time_span': leak_info['time_span'],
                             'recommendations': leak_info['recommendation'],
+                            'detection_method': leak_info.get('detection_method', 'trend'),
+                            'change_point': leak_info.get('change_point'),
+                            'retained_growth_per_cycle': leak_info.get('retained_growth_per_cycle'),
                             'timestamp': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                         })
                     
@@ -657,7 +543,7 @@ class LegacyIOSPerformanceAnalyzer(object):
                     'name': 'Legacy Monitor'
                 }
                 
-                socketio.emit('performance_data', data)
+                self.emit('performance_data', data)
                 socketio.sleep(0)
                 print_json(data, True)
                 return
@@ -681,7 +567,7 @@ class LegacyIOSPerformanceAnalyzer(object):
                     'name': 'Legacy Monitor'
                 }
                 
-                socketio.emit('performance_data', data)
+                self.emit('performance_data', data)
                 socketio.sleep(0)
                 print_json(data, True)
                 return
@@ -699,7 +585,7 @@ class LegacyIOSPerformanceAnalyzer(object):
     
     def send_performance_data(self, data):
         """发送性能数据到前端"""
-        socketio.emit('performance_data', data)
+        self.emit('performance_data', data)
         socketio.sleep(0)
     
     def start_1sec_timer(self):
@@ -717,7 +603,7 @@ class LegacyIOSPerformanceAnalyzer(object):
                     current_data['time'] = datetime.datetime.now().strftime('%H:%M:%S.%f')[:-3]
                     
                     # 发送数据
-                    socketio.emit('performance_data', current_data)
+                    self.emit('performance_data', current_data)
                     socketio.sleep(0)
                     print_json(current_data, True)
         
@@ -740,13 +626,27 @@ class LegacyIOSPerformanceAnalyzer(object):
 
 
 class WebPerformanceAnalyzer(object):
-    def __init__(self, udid, host, port):
+    def __init__(self, udid, host, port, session=None):
         self.udid = udid
         self.host = host
         self.port = port
+        self.session = session  # 所属监控会话
         self.fps = None
         self.is_monitoring = False
     
+    def emit(self, event, data):
+        """发送事件到所属会话的房间（无会话时广播）"""
+        if self.session:
+            self.session.emit(event, data)
+        else:
+            socketio.emit(event, data)
+    
+    def is_active(self):
+        """当前会话是否仍在监控"""
+        if self.session:
+            return self.session.active
+        return self.is_monitoring
+    
     def stop_performance_collection(self):
         """停止性能数据采集"""
         self.is_monitoring = False
@@ -764,10 +664,12 @@ class WebPerformanceAnalyzer(object):
         proc_filter = ['Pid', 'Name', 'CPU', 'Memory', 'DiskReads', 'DiskWrites', 'Threads']
         process_attributes = dataclasses.make_dataclass('SystemProcessAttributes', proc_filter)
         format = "json"
+        name = None
+        self.is_monitoring = True
 
         def on_callback_proc_message(res):
             # 检查监控是否仍在激活状态
-            if not monitoring_active:
+            if not self.is_active():
                 return
             
             if isinstance(res.selector, list):
@@ -812,11 +714,13 @@ class WebPerformanceAnalyzer(object):
                             }
                             
                             # 添加内存样本到泄漏检测器
+                            detector = (self.session.leak_detector(attrs.Pid) if self.session
+                                        else leak_detectors.get('ios', self.udid, bundle_id or 'unknown', attrs.Pid))
                             current_timestamp = time.time()
-                            leak_detector.add_memory_sample(memory_mb, current_timestamp)
+                            detector.add_memory_sample(memory_mb, current_timestamp)
                             
                             # 检测内存泄漏
-                            leak_info = leak_detector.detect_memory_leak()
+                            leak_info = detector.detect_memory_leak()
                             if leak_info:
                                 print(f"🚨 检测到内存泄漏: {leak_info}")
                                 
@@ -824,12 +728,13 @@ class WebPerformanceAnalyzer(object):
                                 app_info = {
                                     'pid': attrs.Pid,
                                     'name': attrs.Name,
-                                    'bundle_id': bundle_id if 'bundle_id' in locals() else 'unknown'
+                                    'bundle_id': bundle_id or 'unknown',
+                                    'udid': self.udid
                                 }
                                 leak_logger.log_leak_event(leak_info, app_info)
                                 
                                 # 发送内存泄漏提醒
-                                socketio.emit('memory_leak_alert', {
+                                self.emit('memory_leak_alert', {
                                     'detected': True,
                                     'severity': leak_info['severity'],
                                     'current_memory': leak_info['current_memory'],
@@ -837,11 +742,14 @@ class WebPerformanceAnalyzer(object):
                                     'memory_increase': leak_info['memory_increase'],
                                     'time_span': leak_info['time_span'],
                                     'recommendations': leak_info['recommendation'],
+                                    'detection_method': leak_info.get('detection_method', 'trend'),
+                                    'change_point': leak_info.get('change_point'),
+                                    'retained_growth_per_cycle': leak_info.get('retained_growth_per_cycle'),
                                     'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                                 })
                             
                             # 立即发送数据，强制实时传输
-                            socketio.emit('performance_data', data)
+                            self.emit('performance_data', data)
                             socketio.sleep(0)  # 强制flush
                             
                             # 同时保持原始的print_json输出（完全一致）
@@ -866,10 +774,11 @@ class WebPerformanceAnalyzer(object):
     def ios17_fps_perf(self):
         """ Get fps data - 与main.py逻辑完全一致 """
         format = "json"
+        self.is_monitoring = True
 
         def on_callback_fps_message(res):
             # 检查监控是否仍在激活状态
-            if not monitoring_active:
+            if not self.is_active():
                 return
                 
             data = res.selector
@@ -1193,6 +1102,200 @@ def api_devices():
         traceback.print_exc()
         return {'devices': [], 'success': False, 'error': str(e)}
 
+@app.route('/api/sessions')
+def api_sessions():
+    """API：获取当前监控会话列表"""
+    with sessions_lock:
+        sessions = [s.to_dict() for s in monitoring_sessions.values()]
+    return {'sessions': sessions, 'leak_detectors': leak_detectors.snapshot(), 'success': True}
+
+@app.route('/api/recorded_sessions')
+def api_recorded_sessions():
+    """API：服务端已记录的会话列表（含正在记录的会话）"""
+    return {'sessions': session_store.list_sessions('ios'), 'success': True}
+
+@app.route('/api/sessions/catalog')
+def api_session_catalog():
+    """API：按设备型号/系统版本/应用及版本/标签/场景/时间检索会话编目（服务端分页）
+
+    参数: app, app_version, device, device_model, os_version, tag, scene, source, from, to, page, page_size
+    """
+    try:
+        params = parse_catalog_args(request.args)
+        params['platform'] = 'ios'
+        result = session_store.catalog.query(**params)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    for meta in result['sessions']:
+        meta['recording'] = session_store.writer(meta['session_id']) is not None
+    result['success'] = True
+    return result
+
+@app.route('/api/sessions/<session_id>/annotations', methods=['POST'])
+def api_session_annotations(session_id):
+    """API：保存页面上的场景和标签（JSON: scenes/tags）到会话信息，同步到会话编目"""
+    meta = session_store.get_meta(session_id)
+    if meta is None or meta.get('platform') != 'ios':
+        return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+    fields = clean_annotations(request.get_json(silent=True) or {})
+    if fields:
+        session_store.update_meta(session_id, **fields)
+    return {'success': True}
+
+@app.route('/api/sessions/<session_id>/quantiles')
+def api_session_quantiles(session_id):
+    """API：会话各指标的分位数统计（正在记录的会话为当前值，由服务端分位数草图计算）
+
+    参数: percentiles（逗号分隔的百分位，默认50,90,99）
+    """
+    try:
+        percentiles = parse_percentiles(request.args.get('percentiles'))
+        meta = session_store.get_meta(session_id)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    if meta is None or meta.get('platform') != 'ios':
+        return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+    try:
+        metrics = session_store.quantiles(session_id, percentiles)
+    except KeyError:
+        return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+    return {'success': True, 'session_id': session_id, 'samples': meta['samples'], 'metrics': metrics}
+
+@app.route('/api/sessions/<session_id>/score')
+def api_session_score(session_id):
+    """API：会话的性能评分（服务端随采样增量计算）：current为最新样本的评分，session为会话平均评分"""
+    meta = session_store.get_meta(session_id)
+    if meta is None or meta.get('platform') != 'ios':
+        return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+    try:
+        scores = session_store.scores(session_id)
+    except KeyError:
+        return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+    return dict(scores, success=True, session_id=session_id)
+
+@app.route('/api/sessions/<session_id>/series')
+def api_session_series(session_id):
+    """API：读取已记录会话的历史指标序列（自动选择汇总层级，LTTB降采样，分块输出）
+
+    参数: metrics（逗号分隔，如cpu,memory）, from, to（时间戳或'YYYY-MM-DD HH:MM:SS'）, max_points, resolution（可选）
+    支持ETag/If-None-Match，已结束的会话或已结束的时间范围可长期缓存
+    """
+    try:
+        params = parse_series_args(request.args)
+        meta = session_store.get_meta(session_id)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    if meta is None or meta.get('platform') != 'ios':
+        return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+    
+    etag, cache_control = series_cache_info(meta, params)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        try:
+            result = session_store.read_series(session_id, **params)
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}, 400
+        except KeyError:
+            return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+        response = Response(iter_series_json(session_id, result), mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+@app.route('/api/sessions/<session_id>/export', methods=['GET', 'POST'])
+def api_session_export(session_id):
+    """API：流式导出已记录的会话，列与页面导出的CSV一致
+
+    参数: format（csv/csv.gz/parquet/arrow，默认csv.gz）, from, to
+    POST表单可附带页面上的场景和标签（scenes/tags，JSON数组），填入Scene/Tags列
+    """
+    fmt = request.values.get('format', 'csv.gz')
+    try:
+        meta = session_store.get_meta(session_id)
+        if meta is None or meta.get('platform') != 'ios':
+            return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+        annotations = Annotations(json.loads(request.values.get('scenes') or '[]'),
+                                  json.loads(request.values.get('tags') or '[]'))
+        stream = export_session(session_store, session_id, fmt, parse_time(request.values.get('from')),
+                                parse_time(request.values.get('to')), annotations)
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    
+    response = Response(stream, mimetype=CONTENT_TYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{export_filename(meta, fmt)}"'
+    return response
+
+@app.route('/api/sessions/import', methods=['POST'])
+def api_session_import():
+    """API：把页面导出的JSON/CSV文件（可gzip压缩）流式导入为服务端会话，页面随后通过历史数据API读取
+
+    请求体为文件内容（?name=文件名），或multipart表单的file字段
+    """
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('file')
+        if upload is None:
+            return {'success': False, 'error': '缺少上传文件'}, 400
+        stream, file_name = upload.stream, upload.filename
+    else:
+        stream, file_name = request.stream, request.args.get('name')
+    
+    try:
+        result = import_session(session_store, stream, 'ios', file_name, IOS_METRICS)
+    except ValueError as e:
+        print(f"❌ 导入会话失败: {e}")
+        return {'success': False, 'error': str(e)}, 400
+    print(f"📥 已导入会话 {result['session_id']}: {result['samples']} 条记录，跳过 {result['skipped']} 条")
+    result['success'] = True
+    return result
+
+@app.route('/api/sessions/compare', methods=['GET', 'POST'])
+def api_session_compare():
+    """API：对比两个已记录的会话（基线构建 vs 候选构建），返回各指标分布差异和显著性
+
+    参数: baseline, candidate（会话ID）, align（start/tag/scene，默认start）, anchor（对齐用的标签备注或场景名称）,
+          metrics（逗号分隔，默认两个会话共有的指标）
+    POST表单可附带两个会话在页面上的场景和标签（baseline_scenes/baseline_tags/candidate_scenes/candidate_tags，JSON数组）
+    """
+    baseline, candidate = request.values.get('baseline'), request.values.get('candidate')
+    for session_id in (baseline, candidate):
+        meta = session_store.get_meta(session_id) if session_id else None
+        if meta is None or meta.get('platform') != 'ios':
+            return {'success': False, 'error': f'会话不存在: {session_id}'}, 404
+    metrics = request.values.get('metrics')
+    try:
+        annotations = {role: {key: json.loads(request.values[f'{role}_{key}'])
+                              for key in ('scenes', 'tags') if request.values.get(f'{role}_{key}')}
+                       for role in ('baseline', 'candidate')}
+        report = compare_sessions(session_store, baseline, candidate, request.values.get('align', 'start'),
+                                  request.values.get('anchor'), metrics.split(',') if metrics else None,
+                                  annotations['baseline'], annotations['candidate'])
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    report['success'] = True
+    return report
+
+@app.route('/api/leak_events')
+def api_leak_events():
+    """API：按平台/应用/严重程度/时间范围查询内存泄漏事件（服务端分页）
+
+    参数: platform, app, severity（逗号分隔）, start, end（时间戳或'YYYY-MM-DD HH:MM:SS'）, page, page_size, cursor
+    """
+    try:
+        result = leak_logger.search_leak_events(**parse_query_args(request.args))
+        result['success'] = True
+        return result
+    except ValueError as e:
+        return {'success': False, 'error': str(e)}, 400
+    except Exception as e:
+        print(f"❌ 查询内存泄漏事件失败: {e}")
+        return {'success': False, 'error': str(e)}, 500
+
+@app.route('/api/log_writer_stats')
+def api_log_writer_stats():
+    """API：日志后台写入队列深度、已写入和丢弃的记录数"""
+    return {'success': True, 'writers': [leak_logger.writer_stats()]}
+
 @app.route('/api/apps')
 def api_apps():
     """API：获取应用列表"""
@@ -1210,20 +1313,49 @@ def api_apps():
 
 @socketio.on('start_monitoring')
 def handle_start_monitoring(data):
-    global monitoring_active, monitoring_threads, performance_analyzer
     udid = data.get('udid', '')
     bundle_id = data.get('bundle_id', '')
+    # 可选：直接使用已有的共享隧道（如pymobiledevice3 tunneld）
+    tunnel_host = data.get('tunnel_host')
+    tunnel_port = data.get('tunnel_port')
     
-    # 重置监控状态
-    monitoring_active = True
+    # 页面从设备/应用列表中带上的设备名称、型号、系统版本和应用版本，记录到会话编目
+    info = {key: data.get(key) or None for key in ('device_name', 'device_model', 'os_version', 'app_version')}
+    # 页面上的CPU/内存阈值，服务端按此计算性能评分
+    info['score_thresholds'] = data.get('score_thresholds') if isinstance(data.get('score_thresholds'), dict) else None
+    
+    with sessions_lock:
+        # 同一设备、同一应用已有会话时作为查看者加入，避免两个会话重复采样同一进程
+        session = next((s for s in monitoring_sessions.values()
+                        if s.active and s.udid == udid and s.bundle_id == bundle_id), None)
+        if session is None:
+            session = MonitoringSession(udid, bundle_id, owner_sid=request.sid, info=info)
+            monitoring_sessions[session.session_id] = session
+            attached = False
+        else:
+            attached = True
+    join_room(live_frames.join(request.sid, session.room))
+    if attached:
+        print(f"👥 {udid} / {bundle_id} 已有监控会话 {session.session_id}，作为查看者加入")
+        emit('monitoring_started', {'status': 'success', 'session_id': session.session_id, 'attached': True})
+        return
+    print(f"🆕 创建监控会话 {session.session_id}: {udid} / {bundle_id}")
     
     def start_performance_monitoring():
-        global performance_analyzer
+        # 第一个iOS会话启动时才加载设备通信模块
+        try:
+            load_ios_stack()
+        except Exception as e:
+            print(f"❌ 加载iOS设备模块失败: {e}")
+            session.emit('monitoring_error', {'error': f'加载iOS设备模块失败: {e}'})
+            return
         
         # 首先检测iOS版本
         tunnel_manager = TunnelManager()
         ios_version = tunnel_manager.get_ios_version(udid)
         print(f"🔍 版本检测结果: '{ios_version}'")
+        if ios_version:
+            session_store.update_meta(session.session_id, os_version=ios_version)
         
         # 判断iOS版本：15.x和16.x使用pyidevice，17+使用pymobiledevice3
         # 注意：26.x实际上是iOS 17.x的内部版本号
@@ -1235,82 +1367,164 @@ def handle_start_monitoring(data):
                 # 只有15和16才是legacy
                 is_legacy = major_version in [15, 16]
         
+        if not session.active:
+            return  # 启动过程中会话已被停止
+        
         if is_legacy:
             # iOS 15-16：使用pyidevice
             print(f"🔄 检测到iOS {ios_version}，使用pyidevice兼容模式")
-            performance_analyzer = LegacyIOSPerformanceAnalyzer(udid)
+            session.mode = 'legacy'
+            session.analyzer = LegacyIOSPerformanceAnalyzer(udid, session=session)
             
             # 启动pyidevice监控
-            monitoring_thread = threading.Thread(target=performance_analyzer.monitor_app_performance, args=(bundle_id,))
+            monitoring_thread = threading.Thread(target=session.analyzer.monitor_app_performance, args=(bundle_id,))
             monitoring_thread.start()
-            monitoring_threads.append(monitoring_thread)
+            session.threads.append(monitoring_thread)
             
             return  # iOS 15-16模式不需要执行后续的iOS 17代码
             
         else:
             # iOS 17+：使用pymobiledevice3隧道模式
             print(f"🔄 检测到iOS {ios_version or '17+'}，使用pymobiledevice3隧道模式")
-            tunnel_manager.get_tunnel()
-            
-            if tunnel_manager.tunnel_error:
-                print(f"❌ 隧道创建失败: {tunnel_manager.tunnel_error}")
-                socketio.emit('monitoring_error', {'error': tunnel_manager.tunnel_error})
-                return
+            session.mode = 'ios17'
+            if tunnel_host and tunnel_port:
+                host, port = tunnel_host, int(tunnel_port)
+                print(f"♻️ 使用共享隧道 {host}:{port}")
+            else:
+                tunnel_manager = get_shared_tunnel(udid)
+                if tunnel_manager.tunnel_error or not tunnel_manager.tunnel_host:
+                    error = tunnel_manager.tunnel_error or 'Tunnel start timeout'
+                    print(f"❌ 隧道创建失败: {error}")
+                    session.emit('monitoring_error', {'error': error})
+                    return
+                host, port = tunnel_manager.tunnel_host, tunnel_manager.tunnel_port
                 
-            performance_analyzer = WebPerformanceAnalyzer(udid, tunnel_manager.tunnel_host, tunnel_manager.tunnel_port)
+            session.analyzer = WebPerformanceAnalyzer(udid, host, port, session=session)
             
             # 与main.py完全一致的线程启动方式（仅iOS 17+）
-            proc_thread = threading.Thread(target=performance_analyzer.ios17_proc_perf, args=(bundle_id,))
-            fps_thread = threading.Thread(target=performance_analyzer.ios17_fps_perf)
+            proc_thread = threading.Thread(target=session.analyzer.ios17_proc_perf, args=(bundle_id,), daemon=True)
+            fps_thread = threading.Thread(target=session.analyzer.ios17_fps_perf, daemon=True)
             
             proc_thread.start()
             time.sleep(0.1)
             fps_thread.start()
             
             # 存储线程引用
-            monitoring_threads.clear()
-            monitoring_threads.append(proc_thread)
-            monitoring_threads.append(fps_thread)
+            session.threads.append(proc_thread)
+            session.threads.append(fps_thread)
     
     # 在后台启动性能监控
-    threading.Thread(target=start_performance_monitoring).start()
-    emit('monitoring_started', {'status': 'success'})
+    threading.Thread(target=start_performance_monitoring, daemon=True).start()
+    emit('monitoring_started', {'status': 'success', 'session_id': session.session_id})
+
+
+def stop_session(session_id):
+    """停止并移除一个监控会话"""
+    with sessions_lock:
+        session = monitoring_sessions.pop(session_id, None)
+    if session is None:
+        return False
+    session.stop()
+    session_store.close(session_id)
+    # 通知正在查看本会话的其他客户端
+    live_frames.publish(session.room, 'session_ended', {'session_id': session_id})
+    # 释放该会话的泄漏检测器，重新开始监控时重新建立基线
+    for pid in session.leak_pids:
+        leak_detectors.reset('ios', session.udid, session.bundle_id, pid)
+    print(f"🛑 监控会话 {session_id} 已停止")
+    return True
 
 
 @socketio.on('stop_monitoring')
-def handle_stop_monitoring():
-    global monitoring_active, monitoring_threads, performance_analyzer
+def handle_stop_monitoring(data=None):
     print("DEBUG: 收到停止监控请求")
+    session_id = data.get('session_id') if data else None
     
-    # 设置监控为非激活状态
-    monitoring_active = False
-    
-    # 停止performance_analyzer的监控
-    if performance_analyzer:
-        try:
-            # 如果analyzer有停止方法，调用它们
-            if hasattr(performance_analyzer, 'stop_performance_collection'):
-                performance_analyzer.stop_performance_collection()
-            if hasattr(performance_analyzer, 'stop_fps_collection'):
-                performance_analyzer.stop_fps_collection()
-            print("DEBUG: 已调用performance_analyzer的停止方法")
-        except Exception as e:
-            print(f"DEBUG: 停止performance_analyzer时出错: {e}")
+    if session_id:
+        session_ids = [session_id]
+    else:
+        # 未指定会话时，停止本客户端发起的所有会话
+        with sessions_lock:
+            session_ids = [sid for sid, s in monitoring_sessions.items() if s.owner_sid == request.sid]
     
-    # 等待线程结束
-    for thread in monitoring_threads:
-        if thread.is_alive():
-            print(f"DEBUG: 等待线程 {thread} 结束")
-            thread.join(timeout=2.0)
-            if thread.is_alive():
-                print(f"DEBUG: 线程 {thread} 仍在运行")
+    for sid in session_ids:
+        stop_session(sid)
+        leave_room(live_frames.leave(request.sid, f'session_{sid}') or f'session_{sid}')
     
-    monitoring_threads.clear()
-    performance_analyzer = None
-    emit('monitoring_stopped', {'status': 'success'})
+    emit('monitoring_stopped', {'status': 'success', 'session_ids': session_ids})
     print("DEBUG: 监控已完全停止")
 
 
+@socketio.on('list_sessions')
+def handle_list_sessions():
+    """列出当前所有监控会话"""
+    with sessions_lock:
+        sessions = [s.to_dict() for s in monitoring_sessions.values()]
+    emit('sessions_list', {'sessions': sessions})
+
+
+@socketio.on('join_session')
+def handle_join_session(data):
+    """订阅某个会话的实时数据（用于多人同时查看）"""
+    session_id = data.get('session_id') if data else None
+    with sessions_lock:
+        session = monitoring_sessions.get(session_id)
+    if session is None:
+        emit('session_joined', {'success': False, 'error': f'会话不存在: {session_id}'})
+        return
+    join_room(live_frames.join(request.sid, session.room))
+    emit('session_joined', {'success': True, 'session': session.to_dict()})
+
+
+@socketio.on('leave_session')
+def handle_leave_session(data):
+    """取消订阅某个会话"""
+    session_id = data.get('session_id') if data else None
+    if session_id:
+        leave_room(live_frames.leave(request.sid, f'session_{session_id}') or f'session_{session_id}')
+    emit('session_left', {'success': True, 'session_id': session_id})
+
+
+@socketio.on('set_refresh_rate')
+def handle_set_refresh_rate(data):
+    """设置本客户端的实时数据刷新间隔（interval，毫秒；0为每条立即发送），非0时按间隔合并为 performance_batch 帧"""
+    try:
+        interval = parse_refresh_interval((data or {}).get('interval'))
+    except ValueError as e:
+        emit('refresh_rate', {'success': False, 'error': str(e)})
+        return
+    for old_room, new_room in live_frames.set_interval(request.sid, interval):
+        leave_room(old_room)
+        join_room(new_room)
+    emit('refresh_rate', {'success': True, 'interval': interval})
+
+
+@socketio.on('set_wire_format')
+def handle_set_wire_format(data):
+    """选择本客户端的实时数据传输格式（format: json/struct），不支持的格式回退为JSON，回复实际使用的格式"""
+    wire_format = parse_wire_format((data or {}).get('format'))
+    for old_room, new_room in live_frames.set_format(request.sid, wire_format):
+        leave_room(old_room)
+        join_room(new_room)
+    emit('wire_format', {'success': True, 'format': wire_format})
+
+
+@socketio.on('disconnect')
+def handle_disconnect():
+    """客户端断开：其发起的会话交给仍在查看的客户端，没有人查看时停止会话"""
+    live_frames.disconnect(request.sid)
+    with sessions_lock:
+        owned = [s for s in monitoring_sessions.values() if s.owner_sid == request.sid]
+    for session in owned:
+        watchers = live_frames.members(session.room)
+        if watchers:
+            session.owner_sid = watchers[0]
+            print(f"👥 会话 {session.session_id} 的发起者已断开，转交给查看者 {watchers[0]}")
+        else:
+            print(f"🔌 会话 {session.session_id} 的发起者已断开且无人查看，停止会话")
+            stop_session(session.session_id)
+
+
 @socketio.on('get_devices')
 def handle_get_devices():
     """获取设备列表"""
@@ -1337,28 +1551,27 @@ def handle_get_apps(data):
         emit('apps_list', {'apps': [], 'error': str(e)})
 
 
+def get_leak_settings_scope(data):
+    """根据请求中的session_id确定设置生效范围：指定会话时只作用于该设备/应用，否则作用于所有iOS会话"""
+    session_id = data.get('session_id') if data else None
+    if session_id:
+        with sessions_lock:
+            session = monitoring_sessions.get(session_id)
+        if session is not None:
+            return {'device': session.udid, 'app': session.bundle_id}
+    return {}
+
+
 @socketio.on('update_leak_settings')
 def handle_update_leak_settings(data):
     """更新内存泄漏检测设置"""
     try:
-        if 'leak_threshold' in data:
-            leak_detector.leak_threshold = float(data['leak_threshold'])
-        if 'time_window' in data:
-            leak_detector.time_window = int(data['time_window'])
-        if 'growth_rate_threshold' in data:
-            leak_detector.growth_rate_threshold = float(data['growth_rate_threshold'])
-        if 'alert_cooldown' in data:
-            leak_detector.alert_cooldown = int(data['alert_cooldown'])
-            
+        settings = leak_detectors.update_settings(data, 'ios', **get_leak_settings_scope(data))
+        settings.pop('min_samples', None)
         print(f"📋 内存泄漏检测设置已更新: {data}")
         emit('leak_settings_updated', {
             'success': True,
-            'settings': {
-                'leak_threshold': leak_detector.leak_threshold,
-                'time_window': leak_detector.time_window,
-                'growth_rate_threshold': leak_detector.growth_rate_threshold,
-                'alert_cooldown': leak_detector.alert_cooldown
-            }
+            'settings': settings
         })
     except Exception as e:
         print(f"❌ 更新内存泄漏设置失败: {e}")
@@ -1366,24 +1579,17 @@ def handle_update_leak_settings(data):
 
 
 @socketio.on('get_leak_settings')
-def handle_get_leak_settings():
+def handle_get_leak_settings(data=None):
     """获取当前内存泄漏检测设置"""
-    emit('leak_settings', {
-        'leak_threshold': leak_detector.leak_threshold,
-        'time_window': leak_detector.time_window,
-        'growth_rate_threshold': leak_detector.growth_rate_threshold,
-        'alert_cooldown': leak_detector.alert_cooldown,
-        'min_samples': leak_detector.min_samples
-    })
+    emit('leak_settings', leak_detectors.settings_for('ios', **get_leak_settings_scope(data)))
 
 
 @socketio.on('reset_leak_detector')
-def handle_reset_leak_detector():
+def handle_reset_leak_detector(data=None):
     """重置内存泄漏检测器"""
     try:
-        leak_detector.memory_history.clear()
-        leak_detector.last_alert_time = 0
-        print("🔄 内存泄漏检测器已重置")
+        removed = leak_detectors.reset('ios', **get_leak_settings_scope(data))
+        print(f"🔄 内存泄漏检测器已重置 ({removed} 个)")
         emit('leak_detector_reset', {'success': True})
     except Exception as e:
         print(f"❌ 重置内存泄漏检测器失败: {e}")
@@ -1404,10 +1610,10 @@ def handle_get_leak_events(data):
 
 
 @socketio.on('clear_leak_log')
-def handle_clear_leak_log():
-    """清空内存泄漏事件日志"""
+def handle_clear_leak_log(data=None):
+    """清空内存泄漏事件日志（可通过before指定只删除该时间戳之前的历史日志段）"""
     try:
-        leak_logger.clear_log()
+        leak_logger.clear_log(data.get('before') if data else None)
         print("🗑️ 内存泄漏事件日志已清空")
         emit('leak_log_cleared', {'success': True})
     except Exception as e:
@@ -1521,15 +1727,24 @@ if __name__ == '__main__':
     
     local_ip = get_local_ip()
     
+    # 端口可通过 --port 参数或 IOS_MONITOR_PORT 环境变量指定（默认5002）
+    import argparse
+    parser = argparse.ArgumentParser(description='iOS性能监控Web界面')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('IOS_MONITOR_PORT', 5002)))
+    args, _ = parser.parse_known_args()
+    port = args.port
+    
+    print(f"⏱️ 模块初始化耗时: {(time.perf_counter() - _startup_begin) * 1000:.0f}ms（iOS设备模块将在开始监控时加载）")
     print("🚀 启动iOS性能监控Web界面...")
     print("="*60)
-    print(f"📱 本地访问地址: http://localhost:5002")
-    print(f"🌐 外网分享地址: http://{local_ip}:5002")
+    print(f"📱 本地访问地址: http://localhost:{port}")
+    print(f"🌐 外网分享地址: http://{local_ip}:{port}")
     print("="*60)
     print("💡 分享说明:")
     print("• 把外网分享地址发给同事/朋友，他们可以实时查看你的性能数据")
     print("• 确保你的设备和他们在同一个网络环境中（如同一WiFi）")
-    print("• 如果无法访问，可能需要关闭防火墙或允许端口5002")
+    print(f"• 如果无法访问，可能需要关闭防火墙或允许端口{port}")
+    print("• 支持同时监控多台设备：每次开始监控都会创建独立会话")
     print("="*60)
     
-    socketio.run(app, host='0.0.0.0', port=5002, debug=False, allow_unsafe_werkzeug=True)
+    socketio.run(app, host='0.0.0.0', port=port, debug=False, allow_unsafe_werkzeug=True)
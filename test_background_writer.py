@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+后台写入线程测试脚本
+验证慢磁盘不阻塞put、队列满时丢弃计数、批量写入、定期fsync以及关闭时写完剩余记录
+"""
+
+import os
+import sys
+import threading
+import time
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common.background_writer import BackgroundWriter
+
+
+class SlowSink(object):
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.records = []
+        self.batches = []
+        self.fsyncs = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, records, fsync):
+        self.release.wait()
+        time.sleep(self.delay)
+        self.records.extend(records)
+        if records:
+            self.batches.append(len(records))
+        if fsync:
+            self.fsyncs += 1
+
+
+def test_put_does_not_wait_for_disk():
+    sink = SlowSink(delay=0.2)
+    writer = BackgroundWriter(sink, max_queue=1000, flush_interval=0.01)
+
+    begin = time.perf_counter()
+    for i in range(500):
+        assert writer.put(i)
+    assert time.perf_counter() - begin < 0.1
+
+    assert writer.flush(timeout=5)
+    assert sink.records == list(range(500))
+    assert len(sink.batches) < 500
+    writer.close()
+
+
+def test_full_queue_drops_and_counts():
+    sink = SlowSink()
+    sink.release.clear()  # 模拟磁盘卡住
+    writer = BackgroundWriter(sink, max_queue=10, flush_interval=0.01)
+    time.sleep(0.05)
+
+    accepted = sum(writer.put(i) for i in range(100))
+    stats = writer.stats()
+    assert stats['dropped'] == 100 - accepted
+    assert stats['queue_depth'] <= 10
+
+    sink.release.set()
+    assert writer.flush(timeout=5)
+    assert writer.stats()['written'] == accepted
+    writer.close()
+
+
+def test_close_flushes_and_fsyncs():
+    sink = SlowSink()
+    writer = BackgroundWriter(sink, flush_interval=0.01, fsync_interval=3600)
+    for i in range(20):
+        writer.put(i)
+    writer.close()
+
+    assert sink.records == list(range(20))
+    assert sink.fsyncs >= 1
+    assert not writer.put(21)
+    assert writer.stats()['dropped'] == 1
+
+
+def test_periodic_fsync():
+    sink = SlowSink()
+    writer = BackgroundWriter(sink, flush_interval=0.01, fsync_interval=0.05)
+    writer.put(1)
+    time.sleep(0.3)
+
+    assert sink.fsyncs >= 1
+    assert writer.stats()['last_fsync'] is not None
+    writer.close()
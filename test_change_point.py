@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+变点检测测试脚本
+验证 CUSUM 变点检测对阶跃式水位抬升敏感、对平稳抖动和GC锯齿不误报，
+以及变点结果出现在 MemoryLeakDetector 的泄漏提醒中
+"""
+
+import os
+import random
+import sys
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common import memory_leak
+from common.memory_leak import ChangePointDetector
+
+
+def collect_changes(generator, count=3600, seed=0):
+    rnd = random.Random(seed)
+    detector = ChangePointDetector()
+    changes = []
+    for i in range(count):
+        change = detector.update(float(i), generator(i, rnd))
+        if change:
+            changes.append(change)
+    return changes
+
+
+def test_steady_and_sawtooth_are_ignored():
+    """平稳抖动和一分钟周期的GC锯齿不产生变点"""
+    for seed in range(3):
+        assert collect_changes(lambda i, rnd: 200 + rnd.gauss(0, 8), seed=seed) == []
+        assert collect_changes(lambda i, rnd: 200 + (i % 60) * 1.5 + rnd.gauss(0, 2), seed=seed) == []
+
+
+def test_step_reports_start_time():
+    """阶跃抬升被检测到，起始时间接近真实变点"""
+    changes = collect_changes(lambda i, rnd: 200 + (40 if i >= 1000 else 0) + rnd.gauss(0, 2))
+
+    assert len(changes) == 1
+    change = changes[0]
+    assert change['direction'] == 'up'
+    assert 990 <= change['start_time'] <= 1000
+    assert change['shift'] > 30
+    assert change['detected_time'] - 1000 <= 150
+
+
+def test_change_point_in_leak_alert():
+    """低于leak_threshold的水位抬升趋势分析不会提醒，由变点单独产生提醒，字段与趋势提醒一致"""
+    detector = memory_leak.MemoryLeakDetector()
+    detector.verbose = False
+    rnd = random.Random(1)
+    alerts = []
+    for i in range(1500):
+        now = 1.7e9 + i
+        detector.add_memory_sample(200 + (30 if i >= 1000 else 0) + rnd.gauss(0, 2), now)
+        leak_info = detector.detect_memory_leak(now=now)
+        if leak_info:
+            alerts.append(leak_info)
+
+    assert len(alerts) == 1
+    alert = alerts[0]
+    assert alert['detection_method'] == 'change_point'
+    assert abs(alert['change_point']['start_time'] - (1.7e9 + 1000)) <= 10
+    assert alert['memory_increase'] > 20
+    for key in ('severity', 'current_memory', 'growth_rate', 'time_span', 'samples_count', 'recommendation'):
+        assert key in alert
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检测器注册表测试脚本
+验证 common/detector_registry.py 按会话隔离检测器、限制样本数、淘汰空闲检测器以及按范围更新设置
+"""
+
+import os
+import sys
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common.detector_registry import LeakDetectorRegistry
+
+
+def test_sessions_are_isolated():
+    """不同设备/应用/PID使用不同的检测器，同一进程复用同一个"""
+    registry = LeakDetectorRegistry()
+    legacy = registry.get('ios', 'udid-1', 'com.demo.app', 100)
+    ios17 = registry.get('ios', 'udid-2', 'com.demo.app', 100)
+    relaunched = registry.get('ios', 'udid-1', 'com.demo.app', 101)
+
+    assert legacy is not ios17
+    assert legacy is not relaunched
+    assert registry.get('ios', 'udid-1', 'com.demo.app', 100) is legacy
+    assert len(registry) == 3
+
+
+def test_history_is_bounded():
+    """每个检测器的样本数不超过max_samples"""
+    registry = LeakDetectorRegistry(max_samples=50)
+    detector = registry.get('android', 'serial', 'com.demo', 1)
+    for i in range(500):
+        detector.add_memory_sample(100 + i * 0.01, 1000.0 + i * 0.1)
+
+    assert len(detector.memory_history) == 50
+    assert detector.memory_history[-1] == (1000.0 + 499 * 0.1, 100 + 499 * 0.01)
+
+
+def test_idle_detectors_are_evicted():
+    """超过idle_timeout没有新样本的检测器被淘汰"""
+    registry = LeakDetectorRegistry(idle_timeout=10)
+    registry.get('ios', 'udid-1', 'com.demo.app', 100)
+    registry.get('ios', 'udid-2', 'com.demo.app', 100)
+    now = registry._entries[('ios', 'udid-1', 'com.demo.app', 100)][1]
+    registry._entries[('ios', 'udid-2', 'com.demo.app', 100)][1] = now - 60
+
+    assert registry.evict_idle(now) == 1
+    assert [entry['device'] for entry in registry.snapshot()] == ['udid-1']
+
+
+def test_settings_apply_per_scope():
+    """会话级设置只影响对应设备/应用，平台级设置影响所有会话，新建检测器继承设置"""
+    registry = LeakDetectorRegistry()
+    first = registry.get('ios', 'udid-1', 'com.demo.app', 100)
+    second = registry.get('ios', 'udid-2', 'com.demo.app', 100)
+
+    registry.update_settings({'leak_threshold': '80', 'unknown': 1}, 'ios', 'udid-1', 'com.demo.app')
+    assert first.leak_threshold == 80.0
+    assert second.leak_threshold == 50
+
+    registry.update_settings({'time_window': 120}, 'ios')
+    assert first.time_window == 120 and second.time_window == 120
+
+    relaunched = registry.get('ios', 'udid-1', 'com.demo.app', 101)
+    assert relaunched.leak_threshold == 80.0 and relaunched.time_window == 120
+    assert registry.settings_for('ios', 'udid-2', 'com.demo.app')['leak_threshold'] == 50
+    assert registry.settings_for('android')['time_window'] == 300
+
+    assert registry.reset('ios', 'udid-1') == 2
+    assert len(registry) == 1
+
+
+def test_broader_settings_do_not_override_narrower():
+    """平台级设置更新后，已有检测器仍以更小范围的设置为准（与新建检测器和 settings_for 一致）"""
+    registry = LeakDetectorRegistry()
+    detector = registry.get('ios', 'd1', 'app', 100)
+
+    registry.update_settings({'leak_threshold': 100}, 'ios', 'd1', 'app')
+    registry.update_settings({'leak_threshold': 300, 'time_window': 120}, 'ios')
+
+    assert detector.leak_threshold == 100 and detector.time_window == 120
+    assert registry.get('ios', 'd1', 'app', 101).leak_threshold == 100
+    assert registry.settings_for('ios', 'd1', 'app')['leak_threshold'] == 100
+    assert registry.get('ios', 'd2', 'app', 100).leak_threshold == 300
+
+
+def test_reset_single_process():
+    registry = LeakDetectorRegistry()
+    registry.get('ios', 'd1', 'app', 100)
+    kept = registry.get('ios', 'd1', 'app', 101)
+
+    assert registry.reset('ios', 'd1', 'app', 100) == 1
+    assert registry.get('ios', 'd1', 'app', 101) is kept
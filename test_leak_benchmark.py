@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内存泄漏检测准确率回归测试
+用 tools/leak_benchmark.py 的确定性曲线运行检测器，误报率/漏报率/检测延迟不得比保存的基线差
+（检测算法有意调整后用 python tools/leak_benchmark.py --save-baseline 更新基线；
+已知问题的指标改善后也必须更新基线）
+"""
+
+import os
+import sys
+
+import pytest
+
+# 添加项目路径
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(project_root, 'tools'))
+
+import leak_benchmark
+
+
+def test_generators_are_deterministic():
+    first = leak_benchmark.generate_traces('gc_leak', 2, seed=7)
+    second = leak_benchmark.generate_traces('gc_leak', 2, seed=7)
+    assert first == second
+
+
+@pytest.mark.parametrize('mode', leak_benchmark.MODES)
+def test_accuracy_not_worse_than_baseline(mode):
+    baseline = leak_benchmark.load_baseline(leak_benchmark.DEFAULT_BASELINE)
+    if not baseline or mode not in baseline.get('modes', {}):
+        pytest.skip('没有保存的基线')
+
+    results = leak_benchmark.evaluate(mode, baseline['traces'], baseline['seed'])
+    regressions, _ = leak_benchmark.compare(results, baseline['modes'][mode])
+
+    assert regressions == []
+    # 已知问题改善后需要收紧基线，防止再次退化
+    assert leak_benchmark.known_issue_improvements(results, baseline['modes'][mode]) == []
+
+
+def test_known_issue_improvement_requires_tighter_baseline():
+    baseline = {'scenarios': {'load_recycle': {'fp_rate': 1.0, 'false_alerts_per_hour': 10.5},
+                              'steady': {'fp_rate': 0.2, 'false_alerts_per_hour': 1.0}}}
+    results = {'mode': 'trend', 'scenarios': {'load_recycle': {'fp_rate': 0.5, 'false_alerts_per_hour': 10.5},
+                                              'steady': {'fp_rate': 0.0, 'false_alerts_per_hour': 0.0}}}
+
+    assert leak_benchmark.known_issue_improvements(results, baseline) == ['load_recycle.fp_rate: 1.0 -> 0.5']
+    assert leak_benchmark.known_issue_improvements(dict(results, mode='trough'), baseline) == []
+
+
+def test_trough_known_issues_ratchet_misses_and_latency():
+    baseline = {'scenarios': {'slow_leak': {'fp_rate': 0.0, 'fn_rate': 1.0, 'latency_median': None},
+                              'gc_leak': {'fp_rate': 0.0, 'fn_rate': 0.0, 'latency_median': 206.3}}}
+    results = {'mode': 'trough', 'scenarios': {'slow_leak': {'fp_rate': 0.0, 'fn_rate': 0.6, 'latency_median': 400.0},
+                                               'gc_leak': {'fp_rate': 0.0, 'fn_rate': 0.0, 'latency_median': 120.0}}}
+
+    assert leak_benchmark.known_issue_improvements(results, baseline) == [
+        'slow_leak.fn_rate: 1.0 -> 0.6', 'gc_leak.latency_median: 206.3s -> 120.0s']
+    # 小幅波动不要求更新基线，变差由 compare 报告
+    results['scenarios']['gc_leak']['latency_median'] = 190.0
+    assert leak_benchmark.known_issue_improvements(results, baseline) == ['slow_leak.fn_rate: 1.0 -> 0.6']
+    results['scenarios']['gc_leak']['latency_median'] = 300.0
+    assert leak_benchmark.compare(results, baseline)[0] == ['gc_leak.latency_median: 206.3s -> 300.0s']
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+泄漏事件索引查询测试脚本
+验证按应用/严重程度/时间过滤、页码和游标分页、重复事件去重、历史日志补建索引以及清空日志同步删除索引
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common.leak_event_index import LeakEventIndex, parse_query_args
+from common.memory_leak import MemoryLeakLogger
+
+
+def make_events(count, start=1.7e9, step=60):
+    return [{'ts': start + i * step, 'severity': 'critical' if i % 5 == 0 else 'warning',
+             'current_memory': 200 + i, 'app_info': {'bundle_id': f'com.demo.{"ab"[i % 2]}', 'seq': i}}
+            for i in range(count)]
+
+
+def test_filters_and_total(tmp_path):
+    index = LeakEventIndex(str(tmp_path / 'events.sqlite3'))
+    events = make_events(100)
+    assert index.add_events('ios', events) == 100
+    index.add_events('android', make_events(10))
+
+    result = index.query(platform='ios', app='com.demo.a', severity='critical', page_size=100)
+    assert result['total'] == 10
+    assert [e['app_info']['seq'] for e in result['events']] == list(range(90, -1, -10))
+
+    result = index.query(platform='ios', start=events[20]['ts'], end=events[29]['ts'])
+    assert result['total'] == 10
+    assert all(e['platform'] == 'ios' for e in result['events'])
+    assert index.query(severity=['warning', 'critical'])['total'] == 110
+
+
+def test_page_and_cursor_pagination(tmp_path):
+    index = LeakEventIndex(str(tmp_path / 'events.sqlite3'))
+    index.add_events('ios', make_events(45))
+
+    by_page, page = [], 1
+    while True:
+        result = index.query(page=page, page_size=10)
+        by_page += [e['app_info']['seq'] for e in result['events']]
+        if not result['has_more']:
+            break
+        page += 1
+
+    by_cursor, cursor = [], None
+    while True:
+        result = index.query(page_size=10, cursor=cursor)
+        by_cursor += [e['app_info']['seq'] for e in result['events']]
+        cursor = result['next_cursor']
+        if cursor is None:
+            break
+
+    assert by_page == by_cursor == list(range(44, -1, -1))
+
+
+def test_duplicate_events_ignored(tmp_path):
+    index = LeakEventIndex(str(tmp_path / 'events.sqlite3'))
+    events = make_events(20)
+    index.add_events('ios', events)
+    assert index.add_events('ios', events) == 0
+    assert index.count('ios') == 20
+
+
+def test_backfill_existing_log(tmp_path):
+    path = tmp_path / 'events.log'
+    with open(path, 'w', encoding='utf-8') as f:
+        for event in make_events(30):
+            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+    logger = MemoryLeakLogger(str(path))
+    deadline = time.time() + 5
+    while logger.index.count('ios') < 30 and time.time() < deadline:
+        time.sleep(0.02)
+
+    result = logger.search_leak_events(app='com.demo.b', page_size=5)
+    assert result['total'] == 15
+    assert [e['app_info']['seq'] for e in result['events']] == [29, 27, 25, 23, 21]
+
+
+def test_clear_log_clears_index_for_platform(tmp_path):
+    logger = MemoryLeakLogger(str(tmp_path / 'ios.log'))
+    android_logger = MemoryLeakLogger(str(tmp_path / 'android.log'), platform='android')
+    leak_info = {'severity': 'warning', 'current_memory': 300, 'growth_rate': 1.5, 'memory_increase': 80,
+                 'time_span': 5, 'samples_count': 10, 'recommendation': []}
+    logger.log_leak_event(leak_info, {'bundle_id': 'com.demo.a'})
+    android_logger.log_leak_event(leak_info, {'package_name': 'com.demo.a'})
+
+    android_logger.flush()
+    assert logger.search_leak_events()['total'] == 2
+
+    logger.clear_log()
+    result = logger.search_leak_events()
+    assert result['total'] == 1
+    assert result['events'][0]['platform'] == 'android'
+
+
+def test_parse_query_args():
+    args = parse_query_args({'app': 'com.demo.a', 'severity': 'warning,critical', 'start': '2024-01-01',
+                             'end': '1700000000', 'page': '2', 'page_size': '20'})
+
+    assert args['severity'] == ['warning', 'critical']
+    assert args['end'] == 1700000000.0
+    assert args['start'] == datetime(2024, 1, 1).timestamp()
+    assert args['page'] == 2 and args['page_size'] == 20
+    assert args['platform'] is None and args['cursor'] is None
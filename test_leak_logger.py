@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+泄漏事件日志读取测试脚本
+验证从文件末尾反向读取的结果与整文件读取一致，包括跨块的中文行和未写完的末尾行
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common import memory_leak
+from common.memory_leak import MemoryLeakLogger
+from common.segment_log import iter_lines_reversed
+
+
+def write_events(path, count):
+    events = [{'index': i, 'severity': 'warning', 'recommendations': ['内存增长过快，建议检查资源释放'] * (i % 3)}
+              for i in range(count)]
+    with open(path, 'w', encoding='utf-8') as f:
+        for event in events:
+            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+    return events
+
+
+@pytest.mark.parametrize('block_size', [1, 7, 64, 64 * 1024])
+def test_reverse_lines_match_forward_read(tmp_path, block_size):
+    path = tmp_path / 'events.log'
+    path.write_bytes('第一行\n\n第三行 中文跨块\r\nlast line without newline'.encode('utf-8'))
+
+    lines = list(iter_lines_reversed(str(path), block_size=block_size))
+
+    assert lines[::-1] == path.read_bytes().split(b'\n')
+
+
+def test_recent_events_from_tail(tmp_path):
+    path = tmp_path / 'events.log'
+    events = write_events(str(path), 500)
+    logger = MemoryLeakLogger(str(path))
+
+    assert logger.get_recent_leak_events(50) == events[-50:]
+    assert logger.get_recent_leak_events(1000) == events
+    assert logger.get_recent_leak_events(0) == []
+
+
+def test_partial_trailing_line_is_skipped(tmp_path):
+    path = tmp_path / 'events.log'
+    events = write_events(str(path), 10)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('not json\n')
+        f.write('{"index": 10, "severity": "crit')  # 正在写入的行
+
+    logger = MemoryLeakLogger(str(path))
+
+    assert logger.get_recent_leak_events(3) == events[-3:]
+
+
+def test_missing_file(tmp_path):
+    assert MemoryLeakLogger(str(tmp_path / 'missing.log')).get_recent_leak_events() == []
+
+
+def log_events(logger, monkeypatch, count, start=1.7e9, step=600, apps=('com.demo.a', 'com.demo.b')):
+    """按固定时间间隔记录事件，返回记录的时间戳"""
+    clock = [start]
+    monkeypatch.setattr(memory_leak.time, 'time', lambda: clock[0])
+    leak_info = {'severity': 'warning', 'current_memory': 300, 'growth_rate': 1.5, 'memory_increase': 80,
+                 'time_span': 5, 'samples_count': 10, 'recommendation': ['检查资源释放']}
+    stamps = []
+    for i in range(count):
+        clock[0] = start + i * step
+        logger.log_leak_event(leak_info, {'bundle_id': apps[i % len(apps)], 'seq': i})
+        stamps.append(clock[0])
+    logger.flush()
+    return stamps
+
+
+def test_rotation_keeps_all_events(tmp_path, monkeypatch):
+    logger = MemoryLeakLogger(str(tmp_path / 'events.log'), max_bytes=4096)
+    log_events(logger, monkeypatch, 300)
+
+    segments = logger.store.segments
+    assert len(segments) > 3
+    assert all((tmp_path / segment['file']).exists() for segment in segments)
+    assert os.path.getsize(tmp_path / 'events.log') < 4096
+
+    recent = logger.get_recent_leak_events(100)
+    assert [event['app_info']['seq'] for event in recent] == list(range(200, 300))
+
+    reopened = MemoryLeakLogger(str(tmp_path / 'events.log'), max_bytes=4096)
+    assert [event['app_info']['seq'] for event in reopened.query_leak_events()] == list(range(300))
+
+
+def test_time_based_rotation(tmp_path, monkeypatch):
+    logger = MemoryLeakLogger(str(tmp_path / 'events.log'), max_age=3600)
+    log_events(logger, monkeypatch, 30, step=600)
+
+    assert len(logger.store.segments) == 4
+    for segment in logger.store.segments:
+        assert segment['end'] - segment['start'] < 3600
+
+
+def test_query_reads_only_relevant_segments(tmp_path, monkeypatch):
+    logger = MemoryLeakLogger(str(tmp_path / 'events.log'), max_bytes=4096)
+    stamps = log_events(logger, monkeypatch, 300)
+    logger.store.rotate()
+
+    reads = []
+    original = logger.store._read_block
+    monkeypatch.setattr(logger.store, '_read_block', lambda segment, block: reads.append(1) or original(segment, block))
+
+    events = logger.query_leak_events(start=stamps[100], end=stamps[119], app='com.demo.a')
+
+    assert [event['app_info']['seq'] for event in events] == list(range(100, 120, 2))
+    assert 0 < len(reads) <= 3
+
+
+def test_clear_before(tmp_path, monkeypatch):
+    logger = MemoryLeakLogger(str(tmp_path / 'events.log'), max_bytes=4096)
+    stamps = log_events(logger, monkeypatch, 300)
+
+    logger.clear_log(before=stamps[150])
+    remaining = logger.query_leak_events()
+    assert remaining[-1]['app_info']['seq'] == 299
+    assert 100 < remaining[0]['app_info']['seq'] <= 150
+
+    logger.clear_log()
+    assert logger.get_recent_leak_events() == []
+    assert logger.store.segments == []
+
+
+def test_clear_before_keeps_index_in_sync(tmp_path, monkeypatch):
+    logger = MemoryLeakLogger(str(tmp_path / 'events.log'), max_bytes=4096)
+    stamps = log_events(logger, monkeypatch, 300)
+    assert logger.index is not None
+
+    # 时间点落在某个日志段中间：该段和当前文件中的事件都保留，索引与日志一致
+    logger.clear_log(before=stamps[150])
+    remaining = [event['app_info']['seq'] for event in logger.query_leak_events()]
+    assert remaining[0] < 150 and remaining[-1] == 299
+
+    result = logger.search_leak_events(page_size=500)
+    assert result['total'] == len(remaining)
+    assert [event['app_info']['seq'] for event in result['events']] == remaining[::-1]
+
+
+def test_evicted_segments_leave_index(tmp_path, monkeypatch):
+    """超出 max_segments 被删除的段同时从索引中删除，索引查询与日志扫描结果一致"""
+    logger = MemoryLeakLogger(str(tmp_path / 'events.log'), max_bytes=4096, max_segments=2)
+    log_events(logger, monkeypatch, 300)
+
+    remaining = [event['app_info']['seq'] for event in logger.query_leak_events()]
+    assert remaining[0] > 0 and remaining[-1] == 299
+
+    result = logger.search_leak_events(page_size=500)
+    assert result['total'] == len(remaining)
+    assert [event['app_info']['seq'] for event in result['events']] == remaining[::-1]
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线回放测试脚本
+验证向量化回放 (common/leak_replay.py) 与逐样本调用 MemoryLeakDetector 的告警结果一致
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common import memory_leak
+from common.leak_replay import _window_stats, replay_leak_detection, sweep_leak_detection
+
+
+def generate_trace(seed, count=400):
+    """生成带随机回收的内存序列（采样间隔不均匀）"""
+    rnd = random.Random(seed)
+    slope = rnd.choice([0, 0.5, 2, 5])
+    timestamps, memory = [], []
+    t, m = 1.7e9, 100.0
+    for _ in range(count):
+        t += rnd.choice([0.5, 1, 2, 4])
+        m += slope + rnd.uniform(-3, 3)
+        if rnd.random() < 0.01:
+            m -= 40
+        timestamps.append(t)
+        memory.append(m)
+    return timestamps, memory
+
+
+def stream_alerts(timestamps, memory, params):
+    """逐样本调用检测器，检测时刻取样本时间戳"""
+    detector = memory_leak.MemoryLeakDetector()
+    detector.change_point_enabled = False  # 回放只覆盖趋势分析
+    detector.verbose = False
+    for key, value in params.items():
+        setattr(detector, key, value)
+    alerts = []
+    for index, (t, m) in enumerate(zip(timestamps, memory)):
+        detector.add_memory_sample(m, t)
+        leak_info = detector.detect_memory_leak(now=t)
+        if leak_info:
+            alerts.append((index, leak_info))
+    return alerts
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_replay_matches_streaming_detector(seed):
+    timestamps, memory = generate_trace(seed)
+    params = {'leak_threshold': 20, 'regression_window': 5 + seed % 3 * 10, 'alert_cooldown': 30}
+
+    expected = stream_alerts(timestamps, memory, params)
+    replayed = replay_leak_detection(np.array(timestamps), np.array(memory), **params)['alerts']
+
+    assert [index for index, _ in expected] == [alert['index'] for alert in replayed]
+    for (_, leak_info), alert in zip(expected, replayed):
+        for key, value in leak_info.items():
+            assert alert[key] == pytest.approx(value)
+
+
+def test_sweep_matches_single_replay():
+    timestamps, memory = generate_trace(3, count=600)
+    grid = {'leak_threshold': [20, 50], 'growth_rate_threshold': [0.3, 1.0], 'regression_window': [10, 20]}
+
+    results = sweep_leak_detection(timestamps, memory, grid)
+
+    assert len(results) == 8
+    for result in results:
+        single = replay_leak_detection(timestamps, memory, **result['params'])
+        assert result['alert_count'] == len(single['alerts'])
+        assert list(result['alert_timestamps']) == [alert['timestamp'] for alert in single['alerts']]
+
+
+def test_window_stats_long_session():
+    """长会话、长回归窗口：窗口统计量不随 样本数×窗口长度 占用内存，结果与逐窗口直接计算一致"""
+    rng = np.random.default_rng(7)
+    count, width = 100000, 1500
+    timestamps = 1.7e9 + np.cumsum(rng.choice([0.5, 1.0, 2.0], count))
+    memory = 500 + np.cumsum(rng.normal(0.05, 2, count))
+
+    stats = _window_stats(timestamps, memory, 3600, width)
+
+    for i in list(range(0, 3000, 97)) + list(range(count - 3000, count, 131)):
+        first = i - stats['trend_len'][i] + 1
+        window_t, window_y = timestamps[first:i + 1] - timestamps[i], memory[first:i + 1]
+        assert stats['window_max'][i] == window_y.max() and stats['window_min'][i] == window_y.min()
+        if len(window_t) >= 2:
+            expected = np.polyfit(window_t, window_y, 1)[0]
+            assert stats['slope'][i] * 60 == pytest.approx(expected * 60, abs=1e-6)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+实时事件合并发送测试脚本
+验证刷新间隔的档位、客户端切换间隔时的房间变化、按间隔合并为一帧、只保留最新的事件和断开连接后的清理
+"""
+
+import os
+import sys
+
+import pytest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common.live_frames import BATCH_EVENT, LiveFrames, parse_refresh_interval
+
+
+@pytest.fixture
+def sent():
+    return []
+
+
+@pytest.fixture
+def frames(sent):
+    return LiveFrames(lambda event, data, room: sent.append((event, data, room)), background=False)
+
+
+def test_parse_refresh_interval():
+    assert parse_refresh_interval('0') == 0
+    assert parse_refresh_interval(300) == 250
+    assert parse_refresh_interval(60000) == 5000
+    for value in (None, 'fast', -1):
+        with pytest.raises(ValueError):
+            parse_refresh_interval(value)
+
+
+def test_rooms_follow_client_interval(frames):
+    assert frames.join('a', 'session_1') == 'session_1'
+    assert frames.set_interval('a', 500) == [('session_1', 'session_1@500')]
+    assert frames.join('a', 'session_2') == 'session_2@500'
+    assert frames.set_interval('a', 500) == []
+    assert frames.leave('a', 'session_2') == 'session_2@500'
+    assert frames.leave('a', 'session_2') is None
+    with pytest.raises(ValueError):
+        frames.set_interval('a', 300)
+
+
+def test_coalesces_per_interval(frames, sent):
+    frames.join('live', 'session_1')
+    frames.join('batched', 'session_1')
+    frames.set_interval('batched', 1000)
+
+    for i in range(5):
+        frames.publish('session_1', 'performance_data', {'cpu': i})
+        frames.publish('session_1', 'thread_details', {'threads': i})
+    frames.publish('session_1', 'monitoring_error', {'error': 'x'})
+
+    # 实时客户端每条立即收到；不合并的事件也立即发给按间隔接收的客户端
+    assert len([s for s in sent if s[2] == 'session_1']) == 11
+    assert sent[-1] == ('monitoring_error', {'error': 'x'}, 'session_1@1000')
+
+    del sent[:]
+    assert frames.flush() == 0  # 未到期
+    assert frames.flush(force=True) == 1
+    (event, frame, room), = sent
+    assert event == BATCH_EVENT and room == 'session_1@1000' and frame['interval'] == 1000
+    assert [name for name, _ in frame['events']] == ['performance_data'] * 5 + ['thread_details']
+    assert frame['events'][-1][1] == {'threads': 4}
+    assert frames.flush(force=True) == 0
+
+
+def test_no_buffer_without_subscribers(frames, sent):
+    frames.join('a', 'session_1')
+    frames.set_interval('a', 250)
+    frames.disconnect('a')
+    frames.publish('session_1', 'performance_data', {'cpu': 1})
+    assert frames.flush(force=True) == 0
+    assert sent == [('performance_data', {'cpu': 1}, 'session_1')]
+    assert frames.interval('a') == 0
+
+
+def test_members(frames):
+    frames.join('a', 'session_1')
+    frames.join('b', 'session_1')
+    frames.set_interval('b', 1000)
+    assert sorted(frames.members('session_1')) == ['a', 'b']
+    frames.disconnect('a')
+    assert frames.members('session_1') == ['b']
+    assert frames.members('session_2') == []
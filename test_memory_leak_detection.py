@@ -15,7 +15,7 @@ from datetime import datetime
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # 导入内存泄漏检测器
-from ios.web_visualizer import MemoryLeakDetector, MemoryLeakLogger
+from common.memory_leak import MemoryLeakDetector, MemoryLeakLogger
 
 def test_memory_leak_detection():
     """测试内存泄漏检测功能"""
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+无界面性能门禁测试脚本
+验证监控脚本输出行的解析、按时长/场景命令结束记录、阈值规则判定和退出状态
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import pytest
+
+# 添加项目路径
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(project_root, 'tools'))
+
+import perf_gate
+from common.session_store import SessionStore
+
+START = 1.7e9
+
+
+def android_line(i, memory, cpu=20.0, fps=58):
+    return json.dumps({'Pid': 1, 'Name': 'com.demo.app', 'CPU': f'{cpu:.2f} %', 'Memory': f'{memory:.2f} MB',
+                       'DiskReads': '1.00 MB', 'DiskWrites': '0.50 MB', 'Threads': 20, 'FPS': fps,
+                       'Time': datetime.fromtimestamp(START + i).strftime('%Y-%m-%d %H:%M:%S')}) + '\n'
+
+
+def write_input(tmp_path, lines):
+    path = tmp_path / 'monitor.txt'
+    path.write_text('📱 开始监控Android应用 com.demo.app\n' + ''.join(lines), encoding='utf-8')
+    return str(path)
+
+
+def run(tmp_path, *argv):
+    return perf_gate.main(list(argv) + ['--data-dir', str(tmp_path / 'data')])
+
+
+def test_parse_ios_output():
+    parser = perf_gate.SampleParser()
+    assert parser.feed("{'currentTime': '2024-01-01 00:00:00', 'fps': 59}\n") is None
+    ts, sample = parser.feed("{'Pid': 5672, 'Name': 'Demo', 'CPU': '29.23 %', 'Memory': '1.5 GiB', "
+                             "'DiskReads': '512.0 KiB', 'DiskWrites': '0 B', 'Threads': 67}\n")
+    assert sample == {'cpu': 29.23, 'memory': 1536.0, 'threads': 67.0, 'disk_reads': 0.5, 'disk_writes': 0.0,
+                      'fps': 59.0}
+    assert parser.feed('Tunnel started\n') is None
+
+
+def test_record_and_gate(tmp_path):
+    path = write_input(tmp_path, [android_line(i, 300 + i % 10, cpu=10 + i % 50, fps=0 if i == 5 else 58)
+                                  for i in range(100)])
+    report = tmp_path / 'report.json'
+
+    code = run(tmp_path, 'record', '--platform', 'android', '--app', 'com.demo.app', '--input', path,
+               '--max-memory', '305', '--p90-cpu', '60', '--min-fps', '50', '--report', str(report))
+
+    assert code == perf_gate.EXIT_VIOLATION
+    result = json.loads(report.read_text(encoding='utf-8'))
+    assert [r['passed'] for r in result['rules']] == [False, True, True]
+    assert result['summary']['memory']['max'] == 309
+    assert result['summary']['fps']['samples'] == 99  # FPS为0的采样不参与统计
+
+    assert run(tmp_path, 'check', result['session_id'], '--rule', 'memory.max<=310', '--rule',
+               'cpu.p50<=40') == perf_gate.EXIT_OK
+
+
+def test_leak_alert_rule(tmp_path):
+    # 持续上涨不回收的内存
+    path = write_input(tmp_path, [android_line(i, 200 + i * 0.5) for i in range(900)])
+    assert run(tmp_path, 'record', '--platform', 'android', '--app', 'com.demo.app', '--input', path,
+               '--max-leak-alerts', '0') == perf_gate.EXIT_VIOLATION
+
+
+def test_duration_and_scenario_stop_recording(tmp_path):
+    store = SessionStore(str(tmp_path))
+
+    def endless():
+        i = 0
+        while True:
+            yield android_line(i, 300)
+            i += 1
+            time.sleep(0.01)
+
+    begin = time.monotonic()
+    samples, code = perf_gate.record_session(store, 'timed', 'android', endless(), duration=0.5)
+    assert time.monotonic() - begin < 2 and samples > 0 and code is None
+
+    scenario = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(0.3); raise SystemExit(3)'])
+    samples, code = perf_gate.record_session(store, 'scenario', 'android', endless(), scenario=scenario)
+    assert code == 3 and samples > 0
+    assert store.get_meta('scenario')['source'] == 'cli'
+
+
+def test_score_rule(tmp_path):
+    path = write_input(tmp_path, [android_line(i, 150, cpu=30, fps=40) for i in range(30)])
+    report = tmp_path / 'report.json'
+
+    code = run(tmp_path, 'record', '--platform', 'android', '--app', 'com.demo.app', '--input', path,
+               '--memory-threshold', '1000', '--min-score', '95', '--rule', 'score.cpu>=100', '--report', str(report))
+
+    assert code == perf_gate.EXIT_VIOLATION
+    result = json.loads(report.read_text(encoding='utf-8'))
+    assert [(r['value'], r['passed']) for r in result['rules']] == [(100, True), (92, False)]
+    assert result['summary']['score']['fps'] == {'score': 75, 'grade': 'B'}
+
+
+@pytest.mark.parametrize('rule', ['memory<=1', 'cpu.avg<=1', 'cpu.p90=1', 'score.p90>=1'])
+def test_invalid_rules(tmp_path, rule):
+    assert run(tmp_path, 'check', 'missing', '--rule', rule) == perf_gate.EXIT_ERROR
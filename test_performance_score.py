@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能评分测试脚本
+验证与页面相同的分档规则和等级、FPS为0沿用上一次的FPS、会话平均评分，以及会话存储中记录/重建评分
+"""
+
+import os
+import sys
+
+import pytest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common.performance_score import (PerformanceScorer, fps_score, grade_from_score, round_score,
+                                      threshold_score)
+from common.session_store import SessionStore
+
+
+@pytest.mark.parametrize('value, expected', [
+    (0, 100), (40, 100), (56, 90), (68, 75), (80, 60), (100, 47.5), (400, 0),
+])
+def test_threshold_score(value, expected):
+    assert threshold_score(value, 80) == expected
+
+
+@pytest.mark.parametrize('fps, expected', [(0, 100), (58, 100), (50, 90), (30, 75), (20, 60), (10, 30)])
+def test_fps_score(fps, expected):
+    assert fps_score(fps) == pytest.approx(expected)
+
+
+def test_grades_and_rounding():
+    assert [grade_from_score(s) for s in (100, 90, 89, 75, 60, 50, 49)] == ['A+', 'A+', 'A', 'B', 'C', 'D', 'F']
+    assert round_score(47.5) == 48 and round_score(0.5) == 1  # 与JS的Math.round一致
+
+
+def test_scorer_current_and_session_average():
+    scorer = PerformanceScorer({'cpu': 50, 'memory': 'bad'})
+    assert scorer.thresholds == {'cpu': 50.0, 'memory': 200.0}
+
+    current = scorer.add(20, 90, 30)
+    assert current == {'cpu': {'score': 100, 'grade': 'A+'}, 'memory': {'score': 100, 'grade': 'A+'},
+                       'fps': {'score': 75, 'grade': 'B'}, 'overall': {'score': 92, 'grade': 'A+'}}
+    # FPS为0时沿用上一次的FPS
+    current = scorer.add_sample({'cpu': 60, 'memory': 250, 'fps': 0})
+    assert current['fps']['score'] == 75
+    assert current['cpu']['score'] == 50 and current['memory']['score'] == 48
+
+    summary = scorer.summary()
+    assert summary['samples'] == 2
+    assert summary['cpu'] == {'score': 75, 'grade': 'B'}
+    assert summary['overall']['score'] == 75
+
+
+def test_missing_values_and_raw_score_grades():
+    assert threshold_score(None, 80) == 100 and fps_score(None) == 100
+    current = PerformanceScorer().add(None, None, None)
+    assert current['overall'] == {'score': 100, 'grade': 'A+'}
+
+    # 等级按原始分数判定，59.75分显示60但为D（与页面一致）
+    current = PerformanceScorer().add(80.4, 10, 60)
+    assert current['cpu'] == {'score': 60, 'grade': 'D'}
+
+
+def test_store_records_scores(tmp_path):
+    store = SessionStore(str(tmp_path))
+    writer = store.create('s1', 'android', 'serial-1', 'com.demo.app', started_at=0,
+                          info={'score_thresholds': {'cpu': 40, 'memory': 300}})
+    for i in range(100):
+        writer.append(i, {'cpu': 10 if i < 50 else 32, 'memory': 100, 'fps': 60})
+
+    live = store.scores('s1')
+    assert live['current']['cpu'] == {'score': 75, 'grade': 'B'}
+    assert store.get_meta('s1')['score']['cpu']['score'] == 88
+
+    store.close('s1')
+    meta = store.get_meta('s1')
+    assert meta['score'] == live['session']
+    assert meta['score']['thresholds'] == {'cpu': 40.0, 'memory': 300.0}
+
+    # 记录评分之前的会话由数据重新计算；重新打开的会话继续累计
+    store.update_meta('s1', score=None)
+    assert store.scores('s1')['session'] == live['session']
+    writer = store.create('s1', 'android', 'serial-1', 'com.demo.app')
+    writer.append(100, {'cpu': 10, 'memory': 100, 'fps': 60})
+    assert store.scores('s1')['session']['samples'] == 101
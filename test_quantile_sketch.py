@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分位数草图测试脚本
+验证分位数的相对误差、合并与整体统计一致、桶数上限、序列化，以及会话存储中实时/结束后/重建的分位数
+"""
+
+import math
+import os
+import random
+import sys
+
+import pytest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common.quantile_sketch import MetricSketches, QuantileSketch, parse_percentiles
+from common.session_store import SKETCH_FILE_NAME, SessionStore
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_relative_error_bound():
+    rng = random.Random(1)
+    values = [rng.lognormvariate(3, 1.5) for _ in range(50000)] + [0.0] * 100 + [-5.0] * 10
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values + [math.nan]:
+        sketch.add(value)
+
+    assert sketch.count == len(values)
+    for q in (0.01, 0.5, 0.9, 0.99, 0.999):
+        expected = exact_quantile(values, q)
+        assert sketch.quantile(q) == pytest.approx(expected, rel=0.01)
+    assert sketch.quantile(0) == -5.0 and sketch.quantile(1) == max(values)
+    assert sketch.quantile(0.0021) == 0.0  # 前110个为负数和零
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_merge_matches_single_sketch():
+    rng = random.Random(2)
+    parts = [[rng.uniform(10, 90) for _ in range(3000)] for _ in range(4)]
+    whole = QuantileSketch()
+    merged = QuantileSketch()
+    for part in parts:
+        sketch = QuantileSketch()
+        for value in part:
+            sketch.add(value)
+            whole.add(value)
+        merged.merge(sketch)
+
+    assert merged.summary() == whole.summary()
+    with pytest.raises(ValueError):
+        merged.merge(QuantileSketch(relative_accuracy=0.05))
+
+
+def test_fixed_memory_and_round_trip():
+    sketch = QuantileSketch(max_buckets=100)
+    for i in range(1, 100001):
+        sketch.add(i * 0.001)
+    assert len(sketch.to_dict()['positive']) <= 100
+    # 只有最低的分位数受桶合并影响
+    assert sketch.quantile(0.9) == pytest.approx(90, rel=0.01)
+
+    copy = QuantileSketch.from_dict(sketch.to_dict())
+    assert copy.summary((50, 99.9)) == sketch.summary((50, 99.9))
+    assert parse_percentiles('50, 99.9') == (50, 99.9)
+    with pytest.raises(ValueError):
+        parse_percentiles('101')
+
+
+def test_metric_sketches_skip_idle_fps():
+    sketches = MetricSketches(('cpu', 'fps'))
+    sketches.add({'cpu': 10, 'fps': 0})
+    sketches.add({'cpu': '20', 'fps': 60})
+    sketches.add({'cpu': None, 'fps': 58})
+
+    summary = sketches.summary()
+    assert sketches.samples == 3
+    assert summary['cpu']['count'] == 2 and summary['fps']['count'] == 2
+    assert summary['fps']['min'] == 58
+
+
+def test_store_quantiles(tmp_path):
+    store = SessionStore(str(tmp_path), batch_size=16)
+    writer = store.create('s1', 'ios', 'udid-1', 'com.demo.app', metrics=('cpu', 'memory'), started_at=0)
+    for i in range(1000):
+        writer.append(i, {'cpu': i % 100, 'memory': 200 + i})
+
+    live = store.quantiles('s1')
+    assert live['cpu']['p50'] == pytest.approx(49, rel=0.01)
+    assert live['memory']['p99'] == pytest.approx(1189, rel=0.01)
+
+    store.close('s1')
+    assert os.path.exists(tmp_path / 's1' / SKETCH_FILE_NAME)
+    assert store.quantiles('s1') == live
+
+    # 草图文件丢失时由原始数据重建；重新打开的会话继续累计
+    os.remove(tmp_path / 's1' / SKETCH_FILE_NAME)
+    assert store.quantiles('s1') == live
+    writer = store.create('s1', 'ios', 'udid-1', 'com.demo.app', metrics=('cpu', 'memory'))
+    writer.append(1000, {'cpu': 50, 'memory': 1200})
+    assert store.quantiles('s1')['cpu']['count'] == 1001
+    with pytest.raises(KeyError):
+        store.quantiles('missing')
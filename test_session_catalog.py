@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话编目测试脚本
+验证会话创建/结束/更新信息时同步编目、按应用版本+设备型号和标签/场景检索、摘要统计、补建编目以及删除
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common.session_catalog import SessionCatalog, clean_annotations, parse_catalog_args
+from common.session_store import SessionStore
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    return SessionCatalog(str(tmp_path / 'catalog.sqlite3'))
+
+
+def test_store_keeps_catalog_in_sync(tmp_path, catalog):
+    store = SessionStore(str(tmp_path / 'sessions'), catalog=catalog)
+    info = {'device_model': 'Pixel 7', 'os_version': '14', 'app_version': '4.2'}
+    writer = store.create('s1', 'android', 'serial-1', 'com.demo.app', started_at=100, info=info)
+    for i in range(120):
+        writer.append(100 + i, {'cpu': i % 10, 'memory': 200 + i})
+    store.create('s2', 'android', 'serial-1', 'com.demo.app', started_at=200, info=dict(info, app_version='4.3'))
+
+    assert [m['session_id'] for m in catalog.query(app='com.demo.app', app_version='4.2',
+                                                   device_model='pixel 7')['sessions']] == ['s1']
+
+    store.close('s1')
+    meta = catalog.query(app_version='4.2')['sessions'][0]
+    assert meta['samples'] == 120
+    assert meta['summary']['duration'] == 119
+    assert meta['summary']['metrics']['memory'] == {'avg': 259.5, 'min': 200, 'max': 319}
+
+    store.update_meta('s2', tags=[{'time': 210, 'note': '登录'}], scenes=[{'name': '首页', 'startTime': 205}])
+    assert [m['session_id'] for m in catalog.query(tag='登录')['sessions']] == ['s2']
+    assert [m['session_id'] for m in catalog.query(scene='首页', platform='android')['sessions']] == ['s2']
+    assert catalog.query(tag='首页')['total'] == 0
+
+    assert store.delete('s2')
+    assert catalog.session_ids() == {'s1'}
+
+
+def test_sync_existing_sessions(tmp_path, catalog):
+    store = SessionStore(str(tmp_path / 'sessions'))
+    store.create('old', 'ios', 'udid-1', 'com.demo.app', started_at=100)
+    store.close('old')
+    catalog.put({'session_id': 'gone', 'platform': 'ios'})
+
+    SessionStore(str(tmp_path / 'sessions'), catalog=catalog)
+
+    assert catalog.session_ids() == {'old'}
+    assert catalog.query(device='udid-1')['total'] == 1
+
+
+def test_query_thousands_paged(catalog):
+    for i in range(1500):
+        catalog.put({'session_id': f's{i}', 'platform': 'android', 'app': 'com.demo.app',
+                     'app_version': f'4.{i % 5}', 'device_model': ('Pixel 7', 'Pixel 8', 'SM-S918B')[i % 3],
+                     'started_at': 1.7e9 + i})
+
+    begin = time.perf_counter()
+    result = catalog.query(**parse_catalog_args({'app': 'com.demo.app', 'app_version': '4.2',
+                                                 'device_model': 'Pixel 7', 'page_size': '20'}))
+    assert time.perf_counter() - begin < 0.1
+    assert result['total'] == 100 and result['has_more']
+    assert result['sessions'][0]['session_id'] == 's1497'
+    assert catalog.query(app_version='4.2', device_model='Pixel 7', page=5, page_size=20)['has_more'] is False
+
+
+def test_clean_annotations():
+    fields = clean_annotations({'scenes': [{'name': 'a', 'data': [1, 2]}, 'x'], 'tags': 'bad'})
+    assert fields == {'scenes': [{'name': 'a'}]}
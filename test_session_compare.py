@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话对比测试脚本
+验证按起点/标签/场景对齐、分位数与高水位差异、FPS低帧和Jank统计、显著性判断以及一小时会话的对比耗时
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+np = pytest.importorskip('numpy')
+
+from common.session_compare import compare_sessions, count_jank
+from common.session_store import SessionStore
+
+START = 1.7e9
+
+
+def record(store, session_id, count, cpu_offset=0.0, memory_offset=0.0, fps_drops=(), start=START, seed=1):
+    """带噪声的一段会话：CPU约30%，内存缓慢增长，FPS约58；fps_drops 中的下标FPS掉到10"""
+    rng = np.random.default_rng(seed)
+    cpu = 30 + cpu_offset + rng.normal(0, 3, count)
+    memory = 200 + memory_offset + np.arange(count) * 0.01 + rng.normal(0, 1, count)
+    fps = np.clip(58 + rng.normal(0, 1, count), 0, 60)
+    fps[list(fps_drops)] = 10
+    writer = store.create(session_id, 'ios', 'udid-1', 'com.demo.app', metrics=('cpu', 'memory', 'fps'),
+                          started_at=start)
+    for i in range(count):
+        writer.append(start + i, {'cpu': cpu[i], 'memory': memory[i], 'fps': fps[i]})
+    store.close(session_id)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SessionStore(str(tmp_path))
+
+
+def test_detects_regressions(store):
+    record(store, 'base', 600, fps_drops=[100])
+    record(store, 'cand', 600, cpu_offset=6, memory_offset=40, fps_drops=[100, 200, 300, 400, 450, 500, 550],
+           start=START + 86400, seed=2)
+
+    report = compare_sessions(store, 'base', 'cand')
+
+    assert report['duration'] == 599
+    cpu = report['metrics']['cpu']['deltas']
+    assert cpu['p50']['delta'] == pytest.approx(6, abs=1)
+    assert cpu['p50']['regression'] and cpu['p50']['ci'][0] > 0
+    assert report['metrics']['memory']['deltas']['max']['delta'] == pytest.approx(40, abs=5)
+    fps = report['metrics']['fps']
+    assert fps['baseline']['jank'] == 1 and fps['candidate']['jank'] == 7
+    assert fps['deltas']['jank']['regression']
+    assert {(r['metric'], r['stat']) for r in report['regressions']} >= {('cpu', 'p90'), ('memory', 'mean')}
+
+
+def test_same_build_not_significant(store):
+    record(store, 'a', 600, seed=3)
+    record(store, 'b', 600, seed=4)
+
+    report = compare_sessions(store, 'a', 'b')
+
+    assert report['regressions'] == []
+    assert not report['metrics']['cpu']['deltas']['p50']['significant']
+
+
+def test_align_by_tag_and_scene(store):
+    record(store, 'base', 300)
+    record(store, 'cand', 400, start=START + 1000)
+    tags = {'tags': [{'time': START + 50, 'note': '开始滑动'}]}
+    cand_tags = {'tags': [{'time': START + 1150, 'note': '开始滑动'}],
+                 'scenes': [{'name': '列表', 'startTime': START + 1200, 'endTime': START + 1260}]}
+
+    report = compare_sessions(store, 'base', 'cand', align='tag', anchor='开始滑动',
+                              baseline_annotations=tags, candidate_annotations=cand_tags)
+    assert report['baseline']['start'] == START + 50 and report['candidate']['start'] == START + 1150
+    assert report['duration'] == 249  # 基线剩余的时长
+    assert report['metrics']['cpu']['baseline']['samples'] == 250
+
+    base_scene = {'scenes': [{'name': '列表', 'startTime': START + 10, 'endTime': START + 100}]}
+    report = compare_sessions(store, 'base', 'cand', align='scene', anchor='列表',
+                              baseline_annotations=base_scene, candidate_annotations=cand_tags)
+    assert report['duration'] == 60
+
+    with pytest.raises(ValueError):
+        compare_sessions(store, 'base', 'cand', align='tag', anchor='不存在', baseline_annotations=tags)
+    with pytest.raises(KeyError):
+        compare_sessions(store, 'base', 'missing')
+
+
+def test_count_jank():
+    fps = np.array([60, 60, 60, 20, 60, 60, 60, 5, 60, 55, 50, 45], dtype=np.float64)
+    assert count_jank(fps) == (2, 1)
+
+
+def test_hour_long_sessions_compare_fast(store):
+    record(store, 'base', 3600)
+    record(store, 'cand', 3600, cpu_offset=1, seed=2)
+
+    begin = time.perf_counter()
+    compare_sessions(store, 'base', 'cand')
+    assert time.perf_counter() - begin < 1.0
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话流式导出测试脚本
+验证CSV/gzip CSV的列与页面导出一致、场景和标签填充、时间范围过滤，以及Parquet/Arrow（需要pyarrow）
+"""
+
+import csv
+import gzip
+import io
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common.session_export import CSV_HEADERS, Annotations, export_session
+from common.session_store import SessionStore
+
+START = 1.7e9
+
+
+def label(ts):
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SessionStore(str(tmp_path))
+    writer = store.create('s1', 'ios')
+    for i in range(10000):
+        writer.append(START + i, {'cpu': i % 100 + 0.3, 'memory': 150.5, 'fps': 59.94, 'threads': 21})
+    store.close('s1')
+    return store
+
+
+def read_csv(data):
+    text = data.decode('utf-8')
+    assert text.startswith('\ufeff')
+    return list(csv.reader(io.StringIO(text[1:])))
+
+
+def test_csv_matches_page_export(store):
+    annotations = Annotations(scenes=[{'name': '登录, 首页', 'startTime': label(START + 10), 'endTime': label(START + 12)}],
+                              tags=[{'time': label(START + 100), 'note': '点击'}])
+    chunks = list(export_session(store, 's1', 'csv', annotations=annotations))
+    rows = read_csv(b''.join(chunks))
+
+    assert len(chunks) > 2  # 分块输出
+    assert rows[0] == CSV_HEADERS
+    assert len(rows) == 10001
+    assert rows[1][0] == label(START)
+    assert rows[1][2:6] == ['0.30', '150.50', '59.9', '21']
+    assert [row[6] for row in rows[10:15]] == ['', '登录, 首页', '登录, 首页', '登录, 首页', '']
+    assert [row[7] for row in rows[95:107]].count('点击') == 9
+
+
+def test_gzip_csv_time_range(store):
+    data = b''.join(export_session(store, 's1', 'csv.gz', start=START + 500, end=START + 599))
+    rows = read_csv(gzip.decompress(data))
+
+    assert len(rows) == 101
+    assert rows[1][0] == label(START + 500)
+
+
+def test_unknown_format(store):
+    with pytest.raises(ValueError):
+        export_session(store, 's1', 'xlsx')
+
+
+@pytest.mark.parametrize('fmt', ['parquet', 'arrow'])
+def test_arrow_formats(store, fmt):
+    pa = pytest.importorskip('pyarrow')
+    import pyarrow.parquet as pq
+
+    data = b''.join(export_session(store, 's1', fmt))
+    table = pq.read_table(io.BytesIO(data)) if fmt == 'parquet' else pa.ipc.open_stream(data).read_all()
+
+    assert table.column_names == CSV_HEADERS
+    assert table.num_rows == 10000
+    assert table.slice(1, 1).to_pylist()[0]['CPU Usage (%)'] == 1.3
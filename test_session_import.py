@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话流式导入测试脚本
+验证页面导出的JSON/CSV/gzip CSV导入会话存储、小块读取时的增量解析、无效行跳过以及错误过多时中止并清理
+"""
+
+import gzip
+import io
+import json
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common import session_import
+from common.session_export import Annotations, export_session
+from common.session_import import import_session
+from common.session_store import SessionStore
+
+START = 1.7e9
+
+
+def label(ts):
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def page_json(count):
+    """与页面 saveDataWithScenes 导出的结构一致"""
+    return {
+        'timestamp': '2023-11-14T22:13:20.000Z',
+        'device_udid': 'udid-1',
+        'bundle_id': 'com.demo.app',
+        'data': [{'timestamp': label(START + i), 'cpu': i % 50, 'memory': 100 + i, 'fps': 60, 'threads': 20}
+                 for i in range(count)],
+        'scenes': [{'name': '登录', 'startTime': label(START + 5), 'endTime': label(START + 9),
+                    'data': [{'cpu': 1}] * 5}],
+        'tags': [{'time': label(START + 3), 'note': '点击', 'id': 1}],
+        'settings': {'windowSize': 50},
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SessionStore(str(tmp_path))
+
+
+def test_import_page_json_in_small_reads(store, monkeypatch):
+    monkeypatch.setattr(session_import, 'READ_SIZE', 7)  # 强制每个值都跨越缓冲区边界
+    body = json.dumps(page_json(300), ensure_ascii=False, indent=2).encode('utf-8')
+
+    result = import_session(store, io.BytesIO(body), 'ios', 'export.json')
+
+    assert result['format'] == 'json'
+    assert result['samples'] == 300 and result['skipped'] == 0
+    assert result['device'] == 'udid-1' and result['app'] == 'com.demo.app'
+    assert result['scenes'] == [{'name': '登录', 'startTime': label(START + 5), 'endTime': label(START + 9)}]
+    assert result['tags'][0]['note'] == '点击'
+    meta = store.get_meta(result['session_id'])
+    assert meta['source'] == 'import' and meta['recording'] is False
+    with store.open(result['session_id']) as reader:
+        ts, columns = reader.read(['memory'])
+    assert list(ts) == [START + i for i in range(300)]
+    assert list(columns['memory']) == [100 + i for i in range(300)]
+
+
+def test_export_import_roundtrip_csv_gz(store):
+    writer = store.create('src', 'ios')
+    for i in range(5000):
+        writer.append(START + i, {'cpu': i % 100, 'memory': 150.25, 'fps': 59.9, 'threads': 21})
+    store.close('src')
+    annotations = Annotations(scenes=[{'name': '首页, 列表', 'startTime': label(START + 10), 'endTime': label(START + 20)}])
+    data = b''.join(export_session(store, 'src', 'csv.gz', annotations=annotations))
+
+    result = import_session(store, io.BytesIO(data), 'ios', 'export.csv.gz')
+
+    assert result['format'] == 'csv' and result['samples'] == 5000
+    assert result['scenes'] == [{'name': '首页, 列表', 'startTime': label(START + 10), 'endTime': label(START + 20)}]
+    with store.open(result['session_id']) as reader:
+        ts, columns = reader.read(['cpu', 'memory'])
+    assert ts[-1] == START + 4999
+    assert columns['cpu'][99] == 99 and columns['memory'][0] == 150.25
+
+
+def test_invalid_rows_skipped(store):
+    rows = ['Timestamp,Time,CPU Usage (%),Memory Usage (MB),FPS,Thread Count,Scene,Tags',
+            f'{label(START)},,1.00,100.00,60.0,20,,',
+            'not a time,,1,1,1,1,,',
+            f'{label(START + 1)},,abc,100,60,20,,',
+            f'{label(START - 10)},,1,1,1,1,,',
+            '',
+            f'{label(START + 2)},,3.00,102.00,60.0,20,,点击']
+    result = import_session(store, io.BytesIO('\n'.join(rows).encode('utf-8')), 'ios')
+
+    assert result['samples'] == 2
+    assert result['skipped'] == 3
+    assert result['errors'][0].startswith('第3行')
+    assert result['tags'] == [{'time': label(START + 2), 'note': '点击', 'id': 'csv_tag_7'}]
+
+
+def test_too_many_errors_aborts_and_cleans_up(store):
+    rows = ['Timestamp,CPU Usage (%),Memory Usage (MB),FPS,Thread Count', f'{label(START)},1,1,1,1']
+    rows += ['bad,1,1,1,1'] * 20
+    with pytest.raises(ValueError, match='中止'):
+        import_session(store, io.BytesIO('\n'.join(rows).encode('utf-8')), 'ios', max_errors=10)
+    assert store.list_sessions() == []
+
+
+@pytest.mark.parametrize('body', [b'{"data": [{"cpu": 1, "timestamp": ', b'Time,Value\n1,2\n', b'', b'{"data": []}'])
+def test_invalid_files_rejected(store, body):
+    with pytest.raises(ValueError):
+        import_session(store, io.BytesIO(gzip.compress(body)), 'ios')
+    assert store.list_sessions() == []
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话列式存储测试脚本
+验证追加写入后按时间范围读取、缓冲写盘、缺失值、重新打开续写、半行截断以及会话列表/删除
+"""
+
+import json
+import math
+import os
+import sys
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common.downsample import lttb
+from common.session_store import SessionStore, iter_series_json, parse_series_args, series_cache_info
+
+
+def record(store, session_id, count, start=1.7e9, step=1.0, **kwargs):
+    writer = store.create(session_id, 'ios', 'udid-1', 'com.demo.app', **kwargs)
+    for i in range(count):
+        writer.append(start + i * step, {'cpu': i % 100, 'memory': 100 + i * 0.5, 'fps': 60, 'threads': 20})
+    return writer
+
+
+def test_append_and_read_range(tmp_path):
+    store = SessionStore(str(tmp_path))
+    record(store, 's1', 1000)
+
+    with store.open('s1') as reader:
+        assert len(reader) == 1000
+        ts, columns = reader.read(['memory', 'cpu', 'unknown'], start=1.7e9 + 100, end=1.7e9 + 199)
+        assert list(ts) == [1.7e9 + i for i in range(100, 200)]
+        assert list(columns['memory']) == [100 + i * 0.5 for i in range(100, 200)]
+        assert set(columns) == {'memory', 'cpu'}
+        assert math.isnan(reader.column('disk_reads')[0])
+
+
+def test_buffered_until_flush(tmp_path):
+    store = SessionStore(str(tmp_path), batch_size=1000, flush_interval=3600)
+    writer = record(store, 's1', 10)
+
+    assert os.path.getsize(tmp_path / 's1' / 'ts.f64') == 0
+    with store.open('s1') as reader:  # 读取正在记录的会话时先写盘
+        assert len(reader) == 10
+    assert store.get_meta('s1')['recording'] is True
+
+    store.close('s1')
+    meta = store.get_meta('s1')
+    assert meta['samples'] == 10 and meta['recording'] is False
+    assert not writer.append(0, {})
+
+
+def test_reopen_truncates_partial_row(tmp_path):
+    store = SessionStore(str(tmp_path))
+    record(store, 's1', 20)
+    store.close('s1')
+    with open(tmp_path / 's1' / 'memory.f64', 'ab') as f:
+        f.write(b'\x00' * 12)  # 模拟异常退出时写了一半
+
+    writer = record(store, 's1', 5, start=1.7e9 + 20)
+    assert writer.count == 25
+    store.close('s1')
+
+    with store.open('s1') as reader:
+        assert list(reader.timestamps()) == [1.7e9 + i for i in range(25)]
+        assert reader.column('memory')[-1] == 102.0
+
+
+def test_list_and_delete(tmp_path):
+    store = SessionStore(str(tmp_path))
+    record(store, 'old', 3, started_at=100)
+    record(store, 'new', 3, started_at=200)
+    store.create('other', 'android', 'serial', 'com.demo.app')
+
+    assert [m['session_id'] for m in store.list_sessions('ios')] == ['new', 'old']
+    assert store.delete('old')
+    assert store.get_meta('old') is None
+    assert [m['session_id'] for m in store.list_sessions()] == ['other', 'new']
+
+
+def test_rollup_tiers(tmp_path):
+    store = SessionStore(str(tmp_path))
+    writer = store.create('s1', 'ios', metrics=('cpu', 'memory'))
+    for i in range(125):  # 从整分钟开始，每秒一个样本
+        writer.append(1.7e9 - 20 + i, {'cpu': i, 'memory': math.nan if i < 10 else 100})
+
+    with store.open('s1', resolution=10) as reader:
+        ts, columns = reader.read(['cpu.min', 'cpu.max', 'cpu.avg', 'memory.avg', 'count'])
+        assert list(ts) == [1.7e9 - 20 + i * 10 for i in range(13)]  # 最后一个未结束的桶也返回
+        assert list(columns['cpu.min'][:2]) == [0, 10]
+        assert list(columns['cpu.max'][:2]) == [9, 19]
+        assert columns['cpu.avg'][0] == 4.5
+        assert math.isnan(columns['memory.avg'][0]) and columns['memory.avg'][1] == 100
+        assert list(columns['count']) == [10] * 12 + [5]
+
+    with store.open('s1', resolution=60) as reader:
+        ts, columns = reader.read(['cpu.avg', 'count'])
+        assert list(columns['count']) == [60, 60, 5]
+        assert columns['cpu.avg'][0] == sum(range(60)) / 60
+
+    store.close('s1')
+    with store.open('s1', resolution=60) as reader:
+        assert len(reader) == 3
+
+
+def test_lttb_keeps_peaks_and_bounds_points():
+    xs = list(range(10000))
+    ys = [math.sin(x / 300.0) for x in xs]
+    ys[4321] = 50.0
+    ys[100] = math.nan
+
+    indices = lttb(xs, ys, 1000)
+
+    assert len(indices) == 1000
+    assert indices[0] == 0 and indices[-1] == 9999
+    assert indices == sorted(indices)
+    assert 4321 in indices and 100 not in indices
+    assert lttb(xs[:50], ys[:50], 1000) == list(range(50))
+
+
+def test_read_series_picks_tier_and_bounds_points(tmp_path):
+    store = SessionStore(str(tmp_path))
+    record(store, 's1', 8 * 3600)  # 8小时，每秒一个样本
+
+    result = store.read_series('s1', ['memory', 'cpu'], max_points=1000)
+    assert result['resolution'] == 10
+    assert len(result['series']['memory']['ts']) <= 1000
+    assert result['series']['cpu']['max'][0] == 9
+
+    start = 1.7e9 + 3600
+    result = store.read_series('s1', ['memory'], start=start, end=start + 600, max_points=1000)
+    assert result['resolution'] == 0
+    assert result['series']['memory']['ts'][0] == start
+    assert len(result['series']['memory']['value']) == 601
+
+
+def test_series_args_cache_and_stream(tmp_path):
+    store = SessionStore(str(tmp_path))
+    writer = record(store, 's1', 600)
+    params = parse_series_args({'metrics': 'cpu,memory', 'from': '1700000000', 'max_points': '50000'})
+    assert params['metrics'] == ['cpu', 'memory'] and params['max_points'] == 10000
+    assert params['end'] is None and params['resolution'] is None
+
+    live_etag, cache_control = series_cache_info(store.get_meta('s1'), params)
+    assert cache_control == 'no-cache'
+    writer.append(1.7e9 + 600, {})
+    assert series_cache_info(store.get_meta('s1'), params)[0] != live_etag
+
+    # 已经过去的时间范围不随新数据变化
+    past = dict(params, end=1.7e9 + 100)
+    etag, cache_control = series_cache_info(store.get_meta('s1'), past)
+    writer.append(1.7e9 + 601, {})
+    assert series_cache_info(store.get_meta('s1'), past) == (etag, cache_control)
+    assert cache_control.startswith('public')
+
+    result = store.read_series('s1', **past)
+    body = json.loads(''.join(iter_series_json('s1', result)))
+    assert body['resolution'] == 0 and body['series']['cpu']['value'] == [i % 100 for i in range(101)]
+
+
+def test_read_series_aligned(tmp_path):
+    store = SessionStore(str(tmp_path))
+    record(store, 's1', 5000)
+
+    result = store.read_series('s1', ['memory', 'cpu'], max_points=200, resolution=0, align=True)
+
+    series = result['series']
+    assert series['memory']['ts'] == series['cpu']['ts']
+    assert len(series['cpu']['ts']) == 200
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+滑动窗口线性回归测试脚本
+验证 SlidingLinearRegression 的斜率/截距与最小二乘结果一致（不均匀采样），窗口滑动时的淘汰和极值，
+运行中修改检测器的 regression_window，以及长时间运行时定期重算滑动和的数值稳定性
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common.memory_leak import MemoryLeakDetector, SlidingLinearRegression
+
+
+def least_squares(samples):
+    """按定义计算 (斜率, 首个样本时刻的截距)，以均值为中心避免精度损失"""
+    n = len(samples)
+    t0 = samples[0][0]
+    mean_t = sum(t - t0 for t, _ in samples) / n
+    mean_y = sum(y for _, y in samples) / n
+    stt = sum((t - t0 - mean_t) ** 2 for t, _ in samples)
+    sty = sum((t - t0 - mean_t) * (y - mean_y) for t, y in samples)
+    slope = sty / stt
+    return slope, mean_y - slope * mean_t
+
+
+def irregular_samples(count, seed=0, start=1.7e9, slope=0.05):
+    rnd = random.Random(seed)
+    samples, t = [], start
+    for _ in range(count):
+        t += rnd.choice([0.3, 1.0, 1.7, 4.0])
+        samples.append((t, 300 + slope * (t - start) + rnd.gauss(0, 3)))
+    return samples
+
+
+def test_matches_least_squares_with_irregular_timestamps():
+    samples = irregular_samples(200)
+    regression = SlidingLinearRegression(500)
+    for t, y in samples:
+        regression.push(t, y)
+
+    slope, intercept = least_squares(samples)
+    assert regression.slope() == pytest.approx(slope, rel=1e-9)
+    assert regression.intercept() == pytest.approx(intercept, rel=1e-9)
+    assert regression.time_span() == pytest.approx(samples[-1][0] - samples[0][0])
+
+
+def test_window_slides_and_evicts():
+    samples = irregular_samples(300, seed=1)
+    regression = SlidingLinearRegression(50)
+    for index, (t, y) in enumerate(samples):
+        regression.push(t, y)
+        window = samples[max(0, index - 49):index + 1]
+        assert len(regression) == len(window)
+        assert regression.max() == max(y for _, y in window)
+        assert regression.min() == min(y for _, y in window)
+        if len(window) >= 2:
+            assert regression.slope() == pytest.approx(least_squares(window)[0], rel=1e-9, abs=1e-12)
+
+    # 按时间淘汰（与检测器的时间窗口一致）
+    cutoff = samples[-20][0]
+    regression.evict_before(cutoff)
+    assert len(regression) == 20
+    assert regression.intercept() == pytest.approx(least_squares(samples[-20:])[1], rel=1e-9)
+
+
+def test_regression_window_resized_at_runtime():
+    detector = MemoryLeakDetector()
+    detector.verbose = False
+    samples = irregular_samples(120, seed=2)
+    for t, y in samples:
+        detector.add_memory_sample(y, t)
+    assert len(detector._trend) == 10
+
+    # 扩大窗口时用时间窗口内的历史样本补齐，缩小时只保留最近的样本
+    detector.regression_window = 60
+    assert len(detector._trend) == 60
+    assert detector._trend.slope() == pytest.approx(least_squares(samples[-60:])[0], rel=1e-9)
+    detector.regression_window = 15
+    assert len(detector._trend) == 15
+    assert detector._trend.slope() == pytest.approx(least_squares(samples[-15:])[0], rel=1e-9)
+
+    t, y = samples[-1][0] + 1, samples[-1][1]
+    detector.add_memory_sample(y, t)
+    assert len(detector._trend) == 15
+    assert detector._trend.slope() == pytest.approx(least_squares(samples[-14:] + [(t, y)])[0], rel=1e-9)
+
+
+def test_periodic_recompute_keeps_sums_stable():
+    """长时间运行（淘汰次数远超 RECOMPUTE_INTERVAL）时滑动和不累积误差，参考点随窗口移动"""
+    samples = irregular_samples(50000, seed=3, slope=0.002)
+    regression = SlidingLinearRegression(100)
+    for t, y in samples:
+        regression.push(t, y)
+
+    assert regression._pops_since_recompute < SlidingLinearRegression.RECOMPUTE_INTERVAL
+    assert regression._t_ref >= samples[-100 - SlidingLinearRegression.RECOMPUTE_INTERVAL][0]
+    slope, intercept = least_squares(samples[-100:])
+    assert regression.slope() == pytest.approx(slope, rel=1e-8)
+    assert regression.intercept() == pytest.approx(intercept, rel=1e-9)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+谷值包络测试脚本
+验证 TroughEnvelope 识别GC锯齿的谷值，以及谷值包络模式下
+只有回收后残留内存持续增长才触发泄漏提醒
+"""
+
+import os
+import random
+import sys
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common import memory_leak
+from common.detector_registry import LeakDetectorRegistry
+from common.memory_leak import TroughEnvelope
+
+
+def sawtooth(retained_per_cycle):
+    """一分钟一次GC的锯齿，每次回收后残留 retained_per_cycle MB"""
+    return lambda i, rnd: 200 + (i % 60) * 1.5 + (i // 60) * retained_per_cycle + rnd.gauss(0, 2)
+
+
+def stream_alerts(generator, count=3600, seed=0):
+    detector = memory_leak.MemoryLeakDetector()
+    detector.detection_mode = 'trough'
+    detector.verbose = False
+    rnd = random.Random(seed)
+    alerts = []
+    for i in range(count):
+        now = 1.7e9 + i
+        detector.add_memory_sample(generator(i, rnd), now)
+        leak_info = detector.detect_memory_leak(now=now)
+        if leak_info:
+            alerts.append(leak_info)
+    return alerts
+
+
+def test_troughs_follow_gc_cycles():
+    """每个GC周期确认一个谷值，窗口只保留最近的谷值"""
+    envelope = TroughEnvelope(hysteresis=20, window=8)
+    rnd = random.Random(0)
+    generator = sawtooth(3)
+    troughs = [envelope.update(float(i), generator(i, rnd)) for i in range(1200)]
+    troughs = [trough for trough in troughs if trough]
+
+    assert envelope.cycles == len(troughs) == 20
+    assert len(envelope) == 8
+    assert all(min(trough[0] % 60, 60 - trough[0] % 60) <= 5 for trough in troughs)
+    assert abs(envelope.retained_per_cycle() - 3) < 0.5
+
+
+def test_sawtooth_without_retention_is_ignored():
+    for seed in range(3):
+        assert stream_alerts(sawtooth(0), seed=seed) == []
+
+
+def test_retained_growth_is_reported():
+    alerts = stream_alerts(sawtooth(3))
+
+    assert alerts
+    alert = alerts[0]
+    assert alert['detection_method'] == 'trough'
+    assert abs(alert['retained_growth_per_cycle'] - 3) < 0.5
+    assert alert['trough_envelope']['trough_count'] >= 4
+    assert '每次回收后仍残留' in alert['recommendation'][0]
+
+
+def test_drop_threshold_updates_hysteresis():
+    """修改回收阈值（如通过设置接口）时谷值包络的滞回阈值同步变化"""
+    registry = LeakDetectorRegistry()
+    detector = registry.get('ios', 'udid-1', 'com.demo.app', 100)
+    assert detector.trough_envelope.hysteresis == detector.drop_threshold == 20
+
+    registry.update_settings({'drop_threshold': '35'}, 'ios')
+    assert detector.drop_threshold == 35.0
+    assert detector.trough_envelope.hysteresis == 35.0
+    assert registry.get('ios', 'udid-2', 'com.demo.app', 100).trough_envelope.hysteresis == 35.0
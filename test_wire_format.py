@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+二进制传输格式测试脚本
+验证性能数据编码/解码往返、缺失指标和评分、帧大小、格式协商回退，以及按客户端格式发送的二进制帧
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+# 添加项目路径
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common.live_frames import BATCH_EVENT, LiveFrames
+from common.wire_format import BINARY_EVENT, decode_samples, encode_samples, parse_wire_format
+
+
+def make_sample(i, **extra):
+    sample = {'session_id': 'abc123', 'name': 'Demo', 'pid': 4321, 'time': '12:00:00',
+              'ts': 1700000000.0 + i, 'cpu': 12.34 + i, 'memory': 256.5, 'fps': 59.0, 'threads': 20,
+              'disk_reads': 0.5, 'disk_writes': 0.25}
+    sample.update(extra)
+    return sample
+
+
+def test_round_trip():
+    score = {'cpu': {'score': 100, 'grade': 'A+'}, 'memory': {'score': 75, 'grade': 'B'},
+             'fps': {'score': 100, 'grade': 'A+'}, 'overall': {'score': 92, 'grade': 'A+'}}
+    samples = [make_sample(0, score=score), make_sample(1, fps=None, pid=None)]
+    first, second = decode_samples(encode_samples(samples))
+
+    assert first['session_id'] == 'abc123' and first['name'] == 'Demo' and first['pid'] == 4321
+    assert first['ts'] == 1700000000.0 and len(first['time']) == 8
+    assert first['cpu'] == pytest.approx(12.34, abs=1e-4) and first['threads'] == 20
+    assert first['score'] == score
+    # 缺失的指标和评分解码后仍为缺失
+    assert second['fps'] is None and second['pid'] is None and 'score' not in second
+    assert 'system_cpu' not in second
+
+
+def test_score_grade_below_rounded_score():
+    # 59.75分显示60但等级为D，二进制帧需保留按原始分数判定的等级
+    score = {'cpu': {'score': 60, 'grade': 'D'}, 'overall': {'score': 60, 'grade': 'C'}}
+    sample, = decode_samples(encode_samples([make_sample(0, score=score)]))
+    assert sample['score'] == score
+
+
+def test_full_time_and_empty_frame():
+    sample, = decode_samples(encode_samples([make_sample(0, time='2023-11-14 22:13:20')]))
+    assert len(sample['time']) == 19
+    assert decode_samples(encode_samples([])) == []
+    with pytest.raises(ValueError):
+        decode_samples(b'{"cpu": 1}')
+
+
+def test_frame_smaller_than_json():
+    samples = [make_sample(i) for i in range(20)]
+    assert len(encode_samples(samples)) * 3 < len(json.dumps(samples))
+
+
+def test_parse_wire_format():
+    assert parse_wire_format('STRUCT') == 'struct'
+    for value in (None, '', 'msgpack'):
+        assert parse_wire_format(value) == 'json'
+
+
+def test_live_frames_binary_clients():
+    sent = []
+    frames = LiveFrames(lambda event, data, room: sent.append((event, data, room)), background=False)
+    frames.join('json', 'session_1')
+    frames.join('binary', 'session_1')
+    assert frames.set_format('binary', 'struct') == [('session_1', 'session_1.struct')]
+    frames.join('batched', 'session_1')
+    frames.set_interval('batched', 500)
+    frames.set_format('batched', 'struct')
+    with pytest.raises(ValueError):
+        frames.set_format('batched', 'msgpack')
+
+    frames.publish('session_1', 'performance_data', make_sample(0))
+    frames.publish('session_1', 'thread_details', {'threads': 1})
+    # 立即发送的二进制客户端收到二进制帧，其他事件仍为JSON；按间隔接收的客户端等待合并
+    assert [(event, room) for event, _, room in sent] == [
+        ('performance_data', 'session_1'), (BINARY_EVENT, 'session_1.struct'),
+        ('thread_details', 'session_1'), ('thread_details', 'session_1.struct')]
+    assert decode_samples(sent[1][1])[0]['cpu'] == pytest.approx(12.34, abs=1e-4)
+
+    del sent[:]
+    assert frames.flush(force=True) == 1
+    (event, payload, room), = sent
+    assert event == BATCH_EVENT and room == 'session_1@500.struct'
+    assert payload['events'] == [['thread_details', {'threads': 1}]]
+    assert len(decode_samples(payload['samples'])) == 1
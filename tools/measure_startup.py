@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Web服务启动耗时测量脚本
+
+在全新的Python进程中分别导入iOS/Android的Web服务模块，统计导入耗时（中位数），
+用于验证Android服务不再加载iOS设备栈（py_ios_device / pymobiledevice3）。
+
+使用方法:
+    python tools/measure_startup.py            # 默认每项测量5次
+    python tools/measure_startup.py --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 名称 -> (模块所在目录, 导入语句)
+TARGETS = [
+    ('Android Web服务', os.path.join(project_root, 'android'), 'import android_web_visualizer'),
+    ('iOS Web服务', os.path.join(project_root, 'ios'), 'import web_visualizer'),
+    ('内存泄漏检测核心', project_root, 'import common.memory_leak'),
+    ('iOS设备栈', project_root,
+     'from ios_device.cli.base import InstrumentsBase; '
+     'from ios_device.remote.remote_lockdown import RemoteLockdownClient'),
+]
+
+PROBE = '''
+import sys, time
+sys.path.insert(0, {path!r})
+begin = time.perf_counter()
+{stmt}
+elapsed = time.perf_counter() - begin
+heavy = [m for m in ('ios_device', 'pymobiledevice3') if m in sys.modules]
+print('%.6f %s' % (elapsed, ','.join(heavy) or '-'))
+'''
+
+
+def measure(path, stmt, runs):
+    """在独立进程中重复导入，返回 (耗时列表, 已加载的iOS模块)"""
+    timings = []
+    heavy = '-'
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', PROBE.format(path=path, stmt=stmt)],
+                                capture_output=True, text=True, cwd=project_root)
+        if result.returncode != 0:
+            return None, result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'error'
+        # 模块导入时可能有打印输出，只取最后一行
+        elapsed, heavy = result.stdout.strip().splitlines()[-1].split()
+        timings.append(float(elapsed))
+    return timings, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description='测量Web服务模块的导入（启动）耗时')
+    parser.add_argument('--runs', type=int, default=5, help='每项测量次数')
+    args = parser.parse_args()
+
+    print("⏱️ 启动耗时测量（独立进程导入，取中位数）")
+    print("=" * 70)
+    for name, path, stmt in TARGETS:
+        timings, heavy = measure(path, stmt, args.runs)
+        if timings is None:
+            print(f"  {name:<12} ❌ 无法导入: {heavy}")
+            continue
+        median_ms = statistics.median(timings) * 1000
+        print(f"  {name:<12} {median_ms:8.1f} ms   已加载iOS设备模块: {heavy}")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
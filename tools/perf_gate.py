@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+无界面性能门禁（CI用）
+
+record: 运行 ios/main.py 或 android/android_main.py（也可从文件/标准输入读取它们输出的JSON行），
+        按固定时长或在场景命令（如UI自动化脚本）运行期间记录一个会话到会话存储，
+        结束后按阈值规则判定，有规则不满足时以非零状态退出。
+check:  对已记录的会话重新按规则判定。
+
+规则格式为 <指标>.<统计量><比较符><阈值>，统计量为 min/max/mean/pNN（如p90），比较符为 <= >= < >；
+leak_alerts 为内存泄漏检测提醒次数（与Web界面使用相同的检测器）。FPS为0的采样（页面静止或不支持FPS）不参与统计。
+score.<cpu/memory/fps/overall> 为会话平均性能评分（0~100，与Web界面的评分规则相同）。
+
+退出状态: 0 全部通过，1 有规则不满足，2 运行错误（没有采集到数据、场景命令失败等）
+
+使用方法:
+    python tools/perf_gate.py record --platform android --app com.demo.app --duration 300 \\
+        --max-memory 800 --p90-cpu 60 --min-fps 30 --max-leak-alerts 0 --min-score 75
+    python tools/perf_gate.py record --platform ios --device <udid> --app com.demo.app \\
+        --scenario "python run_ui_test.py" --rule "memory.p99<=700" --report report.json
+    python android/android_main.py com.demo.app | python tools/perf_gate.py record --platform android \\
+        --app com.demo.app --input - --duration 60 --max-memory 800
+    python tools/perf_gate.py check <session_id> --rule "cpu.mean<=40" --baseline <基线会话ID>
+"""
+import argparse
+import ast
+import json
+import math
+import os
+import queue
+import re
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from common.leak_event_index import parse_time
+from common.session_catalog import CATALOG_FILE_NAME, SessionCatalog
+from common.performance_score import DEFAULT_THRESHOLDS, SCORE_ITEMS
+from common.session_store import IOS_METRICS, SessionStore
+from leak_benchmark import run_trace
+
+DEFAULT_DATA_DIR = os.path.join(project_root, 'data')
+MONITOR_SCRIPTS = {
+    'ios': os.path.join(project_root, 'ios', 'main.py'),
+    'android': os.path.join(project_root, 'android', 'android_main.py'),
+}
+
+# 两个平台的命令行监控脚本输出相同的指标
+RECORD_METRICS = IOS_METRICS
+
+EXIT_OK, EXIT_VIOLATION, EXIT_ERROR = 0, 1, 2
+
+RULE_PATTERN = re.compile(r'^\s*(\w+)(?:\.(\w+))?\s*(<=|>=|<|>)\s*(-?\d+(?:\.\d+)?)\s*$')
+OPERATORS = {
+    '<=': lambda a, b: a <= b,
+    '>=': lambda a, b: a >= b,
+    '<': lambda a, b: a < b,
+    '>': lambda a, b: a > b,
+}
+LEAK_ALERTS = 'leak_alerts'
+SCORE = 'score'
+SCORE_STATS = SCORE_ITEMS + ('overall',)
+
+# 容量单位换算为MB（ios/main.py输出MiB/KiB/GiB，android_main.py输出MB）
+UNITS = {'B': 1.0 / 1024 / 1024, 'KB': 1.0 / 1024, 'KIB': 1.0 / 1024, 'MB': 1.0, 'MIB': 1.0, 'GB': 1024.0,
+         'GIB': 1024.0}
+
+
+def parse_rule(text):
+    """解析规则，返回 (指标, 统计量, 比较符, 阈值)，格式错误时抛出ValueError"""
+    match = RULE_PATTERN.match(text)
+    if not match:
+        raise ValueError(f'无效的规则: {text}（格式如 memory.max<=800、fps.p5>=30、leak_alerts<=0）')
+    metric, stat, op, threshold = match.groups()
+    if metric != LEAK_ALERTS and not stat:
+        raise ValueError(f'规则缺少统计量: {text}')
+    if metric == SCORE:
+        if stat not in SCORE_STATS:
+            raise ValueError(f"不支持的评分项: {stat}（可选 {'/'.join(SCORE_STATS)}）")
+    elif stat and not (stat in ('min', 'max', 'mean') or re.match(r'^p\d{1,2}$', stat)):
+        raise ValueError(f'不支持的统计量: {stat}（可选 min/max/mean/pNN）')
+    return metric, stat, op, float(threshold)
+
+
+def _number(value):
+    """'29.23 %'、'390.78 MiB' 等带单位的数值转换为数字（容量统一为MB），无法解析返回None"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.match(r'^\s*(-?\d+(?:\.\d+)?)\s*([A-Za-z%]*)\s*$', str(value or ''))
+    if not match:
+        return None
+    number, unit = float(match.group(1)), match.group(2).upper()
+    return number * UNITS.get(unit, 1.0)
+
+
+def parse_line(line):
+    """解析监控脚本输出的一行（JSON或Python字典），不是字典时返回None"""
+    line = line.strip()
+    if not line.startswith('{'):
+        return None
+    try:
+        data = json.loads(line)
+    except ValueError:
+        try:
+            data = ast.literal_eval(line)
+        except (ValueError, SyntaxError):
+            return None
+    return data if isinstance(data, dict) else None
+
+
+class SampleParser(object):
+    """把监控脚本的输出行转换为性能数据；iOS的FPS单独输出，合并到下一条进程数据中"""
+
+    def __init__(self):
+        self.fps = None
+
+    def feed(self, line):
+        """返回 (时间戳, 性能数据)，不是进程数据的行返回None"""
+        data = parse_line(line)
+        if data is None:
+            return None
+        if 'CPU' not in data:
+            if 'fps' in data:
+                self.fps = _number(data['fps'])
+            return None
+        try:
+            ts = parse_time(data.get('Time')) or time.time()
+        except ValueError:
+            ts = time.time()
+        sample = {
+            'cpu': _number(data.get('CPU')),
+            'memory': _number(data.get('Memory')),
+            'threads': _number(data.get('Threads')),
+            'disk_reads': _number(data.get('DiskReads')),
+            'disk_writes': _number(data.get('DiskWrites')),
+            'fps': _number(data['FPS']) if 'FPS' in data else self.fps,
+        }
+        return ts, sample
+
+
+def _percentile(values, p):
+    """线性插值分位数（与numpy默认方法一致），values已排序"""
+    position = (len(values) - 1) * p / 100.0
+    low = int(math.floor(position))
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def session_stats(store, session_id):
+    """读取会话，返回 (时间戳, {指标: 列}, {指标: {samples, values}})，values为排序后的有效值"""
+    with store.open(session_id) as reader:
+        timestamps, columns = reader.read()
+    stats = {}
+    for metric, column in columns.items():
+        values = sorted(v for v in column if not math.isnan(v) and not (metric == 'fps' and v <= 0))
+        if values:
+            stats[metric] = {'samples': len(values), 'values': values}
+    return timestamps, columns, stats
+
+
+def stat_value(item, stat):
+    values = item['values']
+    if stat == 'min':
+        return values[0]
+    if stat == 'max':
+        return values[-1]
+    if stat == 'mean':
+        return sum(values) / len(values)
+    return _percentile(values, int(stat[1:]))
+
+
+def count_leak_alerts(timestamps, memory, mode='trend'):
+    """用与Web界面相同的内存泄漏检测器回放内存序列，返回提醒次数"""
+    samples = [(ts, value) for ts, value in zip(timestamps, memory) if not math.isnan(value)]
+    if not samples:
+        return 0
+    alerts, _ = run_trace([ts for ts, _ in samples], [value for _, value in samples], mode)
+    return len(alerts)
+
+
+def evaluate(store, session_id, rules, leak_mode='trend'):
+    """按规则判定会话，返回 (结果列表, 统计摘要)"""
+    timestamps, columns, stats = session_stats(store, session_id)
+    scores = store.scores(session_id)['session']
+    leak_alerts = None
+    results = []
+    for text in rules:
+        metric, stat, op, threshold = parse_rule(text)
+        if metric == SCORE:
+            value = scores[stat]['score'] if stat in scores else None
+        elif metric == LEAK_ALERTS:
+            if leak_alerts is None:
+                leak_alerts = count_leak_alerts(timestamps, columns.get('memory', []), leak_mode)
+            value = leak_alerts
+        elif metric in stats:
+            value = stat_value(stats[metric], stat)
+        else:
+            value = None
+        results.append({'rule': text, 'value': value, 'passed': value is not None and OPERATORS[op](value, threshold)})
+    summary = {metric: {'samples': item['samples'], 'mean': stat_value(item, 'mean'), 'min': item['values'][0],
+                        'p50': stat_value(item, 'p50'), 'p90': stat_value(item, 'p90'), 'max': item['values'][-1]}
+               for metric, item in stats.items()}
+    if leak_alerts is not None:
+        summary[LEAK_ALERTS] = leak_alerts
+    if scores.get('samples'):
+        summary[SCORE] = {name: scores[name] for name in SCORE_STATS}
+    return results, summary
+
+
+def collect_rules(args):
+    """命令行的规则参数汇总为规则列表"""
+    rules = list(args.rule or [])
+    if args.rules_file:
+        with open(args.rules_file, 'r', encoding='utf-8') as f:
+            rules.extend(json.load(f))
+    if args.max_memory is not None:
+        rules.append(f'memory.max<={args.max_memory}')
+    if args.p90_cpu is not None:
+        rules.append(f'cpu.p90<={args.p90_cpu}')
+    if args.min_fps is not None:
+        rules.append(f'fps.min>={args.min_fps}')
+    if args.max_leak_alerts is not None:
+        rules.append(f'{LEAK_ALERTS}<={args.max_leak_alerts}')
+    if args.min_score is not None:
+        rules.append(f'{SCORE}.overall>={args.min_score}')
+    for rule in rules:
+        parse_rule(rule)
+    return rules
+
+
+def _pump(stream, lines):
+    """后台线程：把输出行放入队列，结束时放入None"""
+    try:
+        for line in stream:
+            lines.put(line)
+    finally:
+        lines.put(None)
+
+
+def _stop(process):
+    if process is None or process.poll() is not None:
+        return
+    process.terminate()
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def record_session(store, session_id, platform, stream, device=None, app=None, duration=None, scenario=None,
+                   score_thresholds=None):
+    """从输出行中记录会话，直到输出结束、到达时长或场景命令结束；返回 (样本数, 场景命令退出码)
+
+    score_thresholds 为性能评分的CPU/内存阈值（{'cpu': %, 'memory': MB}，默认与Web界面相同）
+    """
+    writer = store.create(session_id, platform, device, app, RECORD_METRICS,
+                          info={'source': 'cli', 'score_thresholds': score_thresholds})
+    parser = SampleParser()
+    lines = queue.Queue()
+    threading.Thread(target=_pump, args=(stream, lines), daemon=True).start()
+    deadline = time.monotonic() + duration if duration else None
+    scenario_code = None
+    try:
+        while True:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if scenario is not None and scenario.poll() is not None:
+                scenario_code = scenario.returncode
+                break
+            try:
+                line = lines.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if line is None:
+                break
+            parsed = parser.feed(line)
+            if parsed:
+                writer.append(*parsed)
+    finally:
+        store.close(session_id)
+    return writer.count, scenario_code
+
+
+def print_report(session_id, results, summary):
+    print("=" * 70)
+    print(f"📊 会话 {session_id}")
+    for metric, item in summary.items():
+        if metric == LEAK_ALERTS:
+            print(f"  {'leak_alerts':<12}{item}")
+            continue
+        if metric == SCORE:
+            print(f"  {'score':<12}" + '  '.join(f"{name} {item[name]['score']}({item[name]['grade']})"
+                                                 for name in SCORE_STATS))
+            continue
+        print(f"  {metric:<12}样本 {item['samples']:>6}  平均 {item['mean']:>9.2f}  最小 {item['min']:>9.2f}  "
+              f"P50 {item['p50']:>9.2f}  P90 {item['p90']:>9.2f}  最大 {item['max']:>9.2f}")
+    print("-" * 70)
+    for result in results:
+        value = '-' if result['value'] is None else f"{result['value']:.2f}"
+        print(f"  {'✅' if result['passed'] else '❌'} {result['rule']:<24} 实际 {value}")
+    print("=" * 70)
+
+
+def gate(store, session_id, args, rules):
+    """判定会话并输出报告，返回退出状态"""
+    results, summary = evaluate(store, session_id, rules, args.leak_mode)
+    regressions = []
+    if args.baseline:
+        from common.session_compare import compare_sessions
+        regressions = compare_sessions(store, args.baseline, session_id)['regressions']
+        for item in regressions:
+            results.append({'rule': f"baseline:{item['metric']}.{item['stat']}", 'value': item['delta'],
+                            'passed': False})
+    print_report(session_id, results, summary)
+    failed = [r for r in results if not r['passed']]
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'session_id': session_id, 'passed': not failed, 'rules': results, 'summary': summary,
+                       'regressions': regressions}, f, ensure_ascii=False, indent=2)
+        print(f"💾 报告已保存: {args.report}")
+    if failed:
+        print(f"❌ {len(failed)} 条规则不满足")
+        return EXIT_VIOLATION
+    print("✅ 全部规则通过")
+    return EXIT_OK
+
+
+def cmd_record(store, args, rules):
+    if not (args.duration or args.scenario or args.input):
+        print("❌ 需要指定 --duration、--scenario 或 --input")
+        return EXIT_ERROR
+    monitor = scenario = None
+    if args.input:
+        stream = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+    else:
+        if args.platform == 'ios' and not args.device:
+            print("❌ iOS需要指定 --device（设备UDID）")
+            return EXIT_ERROR
+        command = [sys.executable, MONITOR_SCRIPTS[args.platform]] + ([args.device] if args.device else []) + [args.app]
+        monitor = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+        stream = monitor.stdout
+    session_id = uuid.uuid4().hex[:12]
+    print(f"🎬 开始记录会话 {session_id}: {args.platform} / {args.app}")
+    try:
+        if args.scenario:
+            scenario = subprocess.Popen(args.scenario, shell=True)
+        samples, scenario_code = record_session(store, session_id, args.platform, stream, args.device, args.app,
+                                                args.duration, scenario,
+                                                {'cpu': args.cpu_threshold, 'memory': args.memory_threshold})
+    finally:
+        _stop(scenario)
+        _stop(monitor)
+        if stream is not sys.stdin:
+            stream.close()
+    print(f"⏹️ 记录结束: {samples} 个样本")
+    if not samples:
+        print("❌ 没有采集到性能数据")
+        return EXIT_ERROR
+    code = gate(store, session_id, args, rules)
+    if scenario_code:
+        print(f"❌ 场景命令失败（退出码 {scenario_code}）")
+        return EXIT_ERROR
+    return code
+
+
+def cmd_check(store, args, rules):
+    if store.get_meta(args.session_id) is None:
+        print(f"❌ 会话不存在: {args.session_id}")
+        return EXIT_ERROR
+    return gate(store, args.session_id, args, rules)
+
+
+def add_rule_arguments(parser):
+    parser.add_argument('--rule', action='append', help='判定规则，可重复，如 cpu.p90<=60')
+    parser.add_argument('--rules-file', help='JSON文件，内容为规则字符串数组')
+    parser.add_argument('--max-memory', type=float, help='内存峰值上限（MB），即 memory.max<=X')
+    parser.add_argument('--p90-cpu', type=float, help='CPU P90上限（%%），即 cpu.p90<=X')
+    parser.add_argument('--min-fps', type=float, help='FPS下限，即 fps.min>=X')
+    parser.add_argument('--max-leak-alerts', type=int, help='内存泄漏提醒次数上限，即 leak_alerts<=X')
+    parser.add_argument('--min-score', type=float, help='会话平均总评分下限（0~100），即 score.overall>=X')
+    parser.add_argument('--leak-mode', choices=('trend', 'trough'), default='trend', help='内存泄漏检测模式')
+    parser.add_argument('--baseline', help='基线会话ID，与之对比出现显著劣化时也判定失败（需要numpy）')
+    parser.add_argument('--report', help='判定报告保存路径（JSON）')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='数据目录（与Web服务共用时可在页面查看会话）')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='无界面性能门禁：记录会话并按阈值规则判定')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help='记录一个会话并判定')
+    record.add_argument('--platform', choices=('ios', 'android'), required=True)
+    record.add_argument('--app', required=True, help='Bundle ID / 包名')
+    record.add_argument('--device', help='设备UDID / 序列号（Android默认第一个设备）')
+    record.add_argument('--duration', type=float, help='记录时长（秒）')
+    record.add_argument('--scenario', help='场景命令，运行期间记录，结束后停止')
+    record.add_argument('--input', help="从文件读取监控脚本的输出行（'-' 为标准输入），不启动监控脚本")
+    record.add_argument('--cpu-threshold', type=float, default=DEFAULT_THRESHOLDS['cpu'],
+                        help='性能评分的CPU阈值（%%），与Web界面的CPU阈值相同')
+    record.add_argument('--memory-threshold', type=float, default=DEFAULT_THRESHOLDS['memory'],
+                        help='性能评分的内存阈值（MB），与Web界面的内存阈值相同')
+    add_rule_arguments(record)
+
+    check = commands.add_parser('check', help='按规则判定已记录的会话')
+    check.add_argument('session_id')
+    add_rule_arguments(check)
+
+    args = parser.parse_args(argv)
+    try:
+        rules = collect_rules(args)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return EXIT_ERROR
+    store = SessionStore(os.path.join(args.data_dir, 'sessions'),
+                         catalog=SessionCatalog(os.path.join(args.data_dir, CATALOG_FILE_NAME)))
+    try:
+        if args.command == 'record':
+            return cmd_record(store, args, rules)
+        return cmd_check(store, args, rules)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return EXIT_ERROR
+
+
+if __name__ == '__main__':
+    sys.exit(main())